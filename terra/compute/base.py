@@ -4,7 +4,6 @@ import time
 import atexit
 import signal
 from logging import StreamHandler
-from logging.handlers import SocketHandler
 import threading
 import warnings
 import shlex
@@ -16,7 +15,8 @@ import terra.compute.utils
 from terra.utils.cli import extra_arguments
 from terra.executor import Executor
 from terra.logger import (
-  getLogger, LogRecordSocketReceiver, SkipStdErrAddFilter
+  getLogger, LogRecordSocketReceiver, SkipStdErrAddFilter,
+  BatchingSocketHandler, BackgroundQueueHandler
 )
 from vsi.utils import file_utils
 logger = getLogger(__name__)
@@ -334,7 +334,8 @@ class BaseCompute:
       # setup the TCP socket listener
       sender.tcp_logging_server = LogRecordSocketReceiver(
           settings.logging.server.listen_address,
-          settings.logging.server.family)
+          settings.logging.server.family,
+          allow_pickle=settings.logging.server.allow_pickle)
 
       if settings.logging.server.family.startswith("AF_INET"):
         # Get and store the value of the port used, so the runners/tasks will
@@ -371,15 +372,19 @@ class BaseCompute:
                         RuntimeWarning)
     elif settings.terra.zone == 'runner':
       if settings.logging.server.family in ('AF_UNIX', 'AF_PIPE'):
-        sender.main_log_handler = SocketHandler(
+        socket_handler = BatchingSocketHandler.from_settings(
             settings.logging.server.listen_address, None)
       elif settings.logging.server.family in ('AF_INET', 'AF_INET6'):
-        sender.main_log_handler = SocketHandler(
+        socket_handler = BatchingSocketHandler.from_settings(
             settings.logging.server.hostname,
             settings.logging.server.listen_address[0])
       else:
         raise Exception(
             f"Server family {settings.logging.server.family} not supported")
+      # The socket is written to by a background thread, so logging never
+      # waits on the controller
+      sender.main_log_handler = BackgroundQueueHandler.from_settings(
+          socket_handler)
       # All runners have access to the master controller's stderr by virtue of
       # running on the same host. By default, we go ahead and let them log
       # there. Consequently, there is no need for the master controller to echo
@@ -413,10 +418,10 @@ class BaseCompute:
     elif settings.terra.zone == 'runner':
       # Only if it's changed (shared worker across multiple terra runs support)
       # Primarily this is only celery which is only going to work via TCP
-      if settings.logging.server.family.startswith('INET') and (
-        settings.logging.server.hostname != sender.main_log_handler.host
-        or settings.logging.server.listen_address[1]
-              != sender.main_log_handler.port):
+      server = settings.logging.server
+      if server.family.startswith('INET') and (
+        server.hostname != sender.main_log_handler.target.host
+        or server.listen_address[1] != sender.main_log_handler.target.port):
         # Reconnect Socket Handler
         sender.main_log_handler.close()
         try:
@@ -424,9 +429,10 @@ class BaseCompute:
         except ValueError:  # pragma: no cover
           pass
 
-        sender.main_log_handler = SocketHandler(
-            settings.logging.server.hostname,
-            settings.logging.server.listen_address[1])
+        sender.main_log_handler = BackgroundQueueHandler.from_settings(
+            BatchingSocketHandler.from_settings(
+                settings.logging.server.hostname,
+                settings.logging.server.listen_address[1]))
         sender.root_logger.addHandler(sender.main_log_handler)
 
 
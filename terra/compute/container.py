@@ -7,7 +7,9 @@ from tempfile import TemporaryDirectory
 import json
 
 from terra import settings
-from terra.core.settings import TerraJSONEncoder
+from terra.core.settings import (
+    TerraJSONEncoder, snapshot_dump, snapshot_extension
+)
 from terra.compute import compute
 from terra.utils.path import translate_settings_paths
 from terra.compute.base import BaseService
@@ -89,8 +91,12 @@ class ContainerService(BaseService):
     logger.debug4("Compute Volume map: %s", settings.compute.volume_map)
 
     # Setup config file for container
+    if self.env.get('TERRA_SETTINGS_SNAPSHOT', None) == "1":
+      config_name = 'config' + snapshot_extension
+    else:
+      config_name = 'config.json'
 
-    self.env['TERRA_SETTINGS_FILE'] = '/tmp_settings/config.json'
+    self.env['TERRA_SETTINGS_FILE'] = f'/tmp_settings/{config_name}'
 
     container_config = translate_settings_paths(
         TerraJSONEncoder.serializableSettings(settings),
@@ -104,10 +110,16 @@ class ContainerService(BaseService):
       self.env['TERRA_AUTO_ESCAPE'] = self.env['TERRA_AUTO_ESCAPE'] \
           + '|TERRA_SETTINGS_FILE'
 
-    # Dump the settings
-    container_config['terra']['zone'] = 'runner'
-    with open(temp_dir / 'config.json', 'w') as fid:
-      json.dump(container_config, fid)
+    # Dump the settings. Copy the part that is changed, rather than changing
+    # the shared serialized settings
+    container_config = {**container_config,
+                        'terra': {**container_config['terra'],
+                                  'zone': 'runner'}}
+    if config_name.endswith(snapshot_extension):
+      snapshot_dump(container_config, temp_dir / config_name)
+    else:
+      with open(temp_dir / config_name, 'w') as fid:
+        json.dump(container_config, fid, cls=TerraJSONEncoder)
 
     self.env['JUST_IGNORE_EXIT_CODES'] = '62'
 
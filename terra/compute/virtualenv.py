@@ -8,7 +8,9 @@ from vsi.tools.diff import dict_diff
 from vsi.tools.dir_util import is_subdir
 
 from terra.compute.base import BaseService, BaseCompute, ServiceRunFailed
-from terra.core.settings import TerraJSONEncoder
+from terra.core.settings import (
+    TerraJSONEncoder, snapshot_dump, snapshot_extension
+)
 from terra import settings
 from terra.logger import getLogger, DEBUG1
 logger = getLogger(__name__)
@@ -104,16 +106,24 @@ class Service(BaseService):
     if self.env.get('TERRA_KEEP_TEMP_DIR', None) == "1":
       self.temp_dir._finalizer.detach()
 
-    # Use a config.json file to store settings within that temp directory
-    temp_config_file = os.path.join(self.temp_dir.name, 'config.json')
+    # Use a config.json file (or binary snapshot) to store settings within
+    # that temp directory
+    if self.env.get('TERRA_SETTINGS_SNAPSHOT', None) == "1":
+      config_name = 'config' + snapshot_extension
+    else:
+      config_name = 'config.json'
+    temp_config_file = os.path.join(self.temp_dir.name, config_name)
 
     # Serialize config file
     venv_config = TerraJSONEncoder.serializableSettings(settings)
 
     # Dump the serialized config to the temp config file
     venv_config['terra']['zone'] = 'runner'
-    with open(temp_config_file, 'w') as fid:
-      json.dump(venv_config, fid)
+    if config_name.endswith(snapshot_extension):
+      snapshot_dump(venv_config, temp_config_file)
+    else:
+      with open(temp_config_file, 'w') as fid:
+        json.dump(venv_config, fid, cls=TerraJSONEncoder)
 
     # Set the Terra settings file for this service runner to the temp config
     # file
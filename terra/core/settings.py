@@ -76,6 +76,23 @@ don't do this in an app:
 
     settings.DEBUG = True   # Don't do this!
 
+Freezing settings
+-----------------
+
+Once settings are configured, :func:`settings.freeze()<Settings.freeze>`
+evaluates every :func:`settings_property`, expands every string and returns a
+:class:`FrozenSettings` snapshot. The snapshot is immutable, which makes it
+cheap to read and a stable object to hand to other workers.
+
+.. rubric:: Example
+
+.. code-block:: python
+
+    from terra import settings
+
+    frozen = settings.freeze()
+    frozen.processing_dir  # No more lazy evaluation
+
 Available settings
 ------------------
 
@@ -153,8 +170,9 @@ from uuid import uuid4
 # from datetime import datetime
 from logging.handlers import DEFAULT_TCP_LOGGING_PORT
 from inspect import isfunction
-from functools import wraps
-from json import JSONEncoder
+from collections.abc import Mapping
+from functools import wraps, lru_cache, partial
+from json import JSONEncoder, loads as _stdlib_json_loads
 import multiprocessing
 import socket
 import ipaddress
@@ -162,17 +180,30 @@ import platform
 import warnings
 import threading
 import concurrent.futures
+import contextvars
+from contextlib import contextmanager
 import copy
+from types import FunctionType
+import time
+import tempfile
+import re
+import stat
+import pickle
+import hashlib
+import weakref
+import itertools
+import heapq
 from json.decoder import JSONDecodeError
 import difflib
 
+from terra.core.utils import PathList
 from terra.core.exceptions import (
   ImproperlyConfigured, ConfigurationWarning, ranButFailedExitCode
 )
 # Do not import terra.logger or terra.signals here, or any module that
 # imports them
 from vsi.tools.python import (
-    nested_patch_inplace, nested_patch, nested_update, nested_in_dict
+    nested_patch_inplace, nested_update
 )
 
 try:
@@ -180,6 +211,11 @@ try:
 except ImportError:  # pragma: no cover
   import json
 
+try:
+  import orjson
+except ImportError:  # pragma: no cover
+  orjson = None
+
 ENVIRONMENT_VARIABLE = "TERRA_SETTINGS_FILE"
 '''str: The environment variable that store the file name of the configuration
 file
@@ -189,13 +225,31 @@ filename_suffixes = ['_file', '_files', '_dir', '_dirs', '_path', '_paths']
 '''list: The list key suffixes that are to be considered for volume translation
 '''
 
+snapshot_extension = '.pkl'
+'''str: The file extension of a binary settings snapshot, see
+:func:`snapshot_dump`
+'''
+
 json_include_suffixes = ['_json']
 '''list: The list key suffixes that are to be considered executing json
-include replacement at load time.
+include replacement. The json file is loaded the first time the setting is
+accessed.
 '''
 
+_scalar_types = (str, int, float, bool, type(None))
+# Values of these types can be assigned straight into a node, since there is
+# nothing for nested_update to merge or convert
 
-def settings_property(func):
+
+@lru_cache(maxsize=4096)
+def _split_name(name):
+  '''
+  Split (and cache) a dot delimited attribute name into a tuple of keys
+  '''
+  return tuple(name.split('.'))
+
+
+def settings_property(func=None, *, io_bound=False):
   '''
   Functions wrapped with this decorator will only be called once, and the value
   from the call will be cached, and replace the function altogether in the
@@ -208,16 +262,160 @@ def settings_property(func):
   ---------
   func : :term:`function`
       Function being decorated
+  io_bound : bool, optional
+      Mark a function that spends most of its time waiting on I/O (file
+      system, DNS, etc...), e.g. ``@settings_property(io_bound=True)``. When
+      :envvar:`TERRA_EAGER_SETTINGS_PROPERTIES` is ``1``, these are evaluated
+      concurrently while the settings are configured.
   '''
 
+  if func is None:
+    return partial(settings_property, io_bound=io_bound)
+
   @wraps(func)
   def wrapper(*args, **kwargs):
     return func(*args, **kwargs)
 
   wrapper.settings_property = True
+  wrapper.io_bound = io_bound
   return wrapper
 
 
+class SettingsPropertyTrace:
+  '''
+  Records the wall time of every :func:`settings_property` evaluation, and
+  which settings_properties each one used (directly or via their cached
+  values), i.e. the dependency graph. Properties are identified by their
+  function's ``__qualname__``.
+
+  Use the global :data:`settings_property_trace`. It is thread safe, since
+  settings properties can be evaluated in several threads (e.g.
+  :envvar:`TERRA_EAGER_SETTINGS_PROPERTIES`).
+
+  Attributes
+  ----------
+  wall_time : dict
+      Total seconds spent evaluating each property, including the time spent
+      evaluating the properties it uses
+  dependencies : dict
+      The :class:`set` of properties used by each property
+  active : int
+      The number of evaluations currently in progress, in all threads
+  '''
+
+  def __init__(self):
+    self._local = threading.local()
+    self._lock = threading.Lock()
+    self._origins = {}
+    self.active = 0
+    self.clear()
+
+  def clear(self):
+    '''
+    Forget everything recorded so far
+    '''
+    with self._lock:
+      self.wall_time = {}
+      self.dependencies = {}
+      self._origins.clear()
+
+  def _stack(self):
+    try:
+      return self._local.stack
+    except AttributeError:
+      self._local.stack = []
+      return self._local.stack
+
+  def evaluate(self, func, node, key):
+    '''
+    Evaluate the settings_property ``func`` that is stored in ``node[key]``,
+    and record it
+    '''
+    name = func.__qualname__
+    stack = self._stack()
+    with self._lock:
+      if stack:
+        self.dependencies.setdefault(stack[-1], set()).add(name)
+      self.dependencies.setdefault(name, set())
+      self.active += 1
+    _read_hooks_add(1)
+
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+      # Ok this ONE line is a bit of a hack :( But I argue it's specific to
+      # this singleton implementation, so I approve!
+      return func(settings)
+    finally:
+      elapsed = time.perf_counter() - start
+      stack.pop()
+      _read_hooks_add(-1)
+      with self._lock:
+        self.active -= 1
+        self.wall_time[name] = self.wall_time.get(name, 0) + elapsed
+        self._origins[(id(node), key)] = (name, weakref.ref(node))
+      logger.debug4(f'settings_property {name} evaluated in {elapsed:.6f}s')
+
+  def read(self, node, key):
+    '''
+    Record that a (possibly cached) value was read while evaluating a
+    settings_property
+    '''
+    stack = self._stack()
+    if stack:
+      with self._lock:
+        origin = self._origins.get((id(node), key))
+        if origin is not None and origin[1]() is node:
+          self.dependencies.setdefault(stack[-1], set()).add(origin[0])
+
+  def independent(self):
+    '''
+    Returns
+    -------
+    list
+        Properties that did not use any other settings_property
+    '''
+    with self._lock:
+      return [name for name, deps in self.dependencies.items() if not deps]
+
+  def dependent(self):
+    '''
+    Returns
+    -------
+    set
+        Properties that used another settings_property
+    '''
+    with self._lock:
+      traced = set(self.dependencies)
+    return traced.difference(self.independent())
+
+  def report(self):
+    '''
+    Returns
+    -------
+    str
+        A human readable summary, slowest properties first
+    '''
+    with self._lock:
+      wall_time = dict(self.wall_time)
+      dependencies = {name: set(deps)
+                      for name, deps in self.dependencies.items()}
+    lines = []
+    for name, seconds in sorted(wall_time.items(),
+                                key=lambda x: x[1], reverse=True):
+      line = f'{name}: {seconds:.6f}s'
+      deps = dependencies.get(name)
+      if deps:
+        line += f' (uses {", ".join(sorted(deps))})'
+      lines.append(line)
+    return '\n'.join(lines)
+
+
+settings_property_trace = SettingsPropertyTrace()
+''':class:`SettingsPropertyTrace`: Trace of all settings_property evaluations
+in this process'''
+
+
 @settings_property
 def status_file(self):
   '''
@@ -237,7 +435,7 @@ def settings_dir(self):
   return os.path.join(self.processing_dir, 'settings')
 
 
-@settings_property
+@settings_property(io_bound=True)
 def processing_dir(self):
   '''
   The default :func:`settings_property` for the processing directory. If not
@@ -255,7 +453,6 @@ def processing_dir(self):
                    f'Using cwd: {processing_dir}')
 
   if not os.access(processing_dir, os.W_OK):
-    import tempfile
     bad_dir = processing_dir
     processing_dir = tempfile.mkdtemp(prefix="terra_")
     logger.error(f'You do not have access to processing dir: "{bad_dir}". '
@@ -326,19 +523,135 @@ def log_file(self):
     return None
 
 
+def _hostname_cache_file():
+  # Per user, so no one else can plant or change the answers
+  cache_home = os.environ.get('XDG_CACHE_HOME') or \
+      os.path.join(os.path.expanduser('~'), '.cache')
+  return os.path.join(cache_home, 'terra', 'hostname_cache.json')
+
+
+def _is_private(path, is_dir):
+  '''
+  Check that ``path`` is a real directory/file (not a symlink), owned by the
+  current user and not writable by anyone else
+  '''
+  path_stat = os.lstat(path)
+  if not (stat.S_ISDIR if is_dir else stat.S_ISREG)(path_stat.st_mode):
+    return False
+  if not hasattr(os, 'getuid'):  # pragma: no cover
+    # Windows, the user's profile is already private
+    return True
+  return path_stat.st_uid == os.getuid() and \
+      not path_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _read_hostname_cache(hostname, ttl):
+  cache_file = _hostname_cache_file()
+  try:
+    if not _is_private(os.path.dirname(cache_file), True) or \
+       not _is_private(cache_file, False):
+      return None
+    with open(cache_file, 'r') as fid:
+      is_loopback, timestamp = json.loads(fid.read())[hostname]
+  except Exception:
+    return None
+  if 0 <= time.time() - timestamp < ttl:
+    return is_loopback
+  return None
+
+
+def _write_hostname_cache(hostname, is_loopback):
+  cache_file = _hostname_cache_file()
+  cache_dir = os.path.dirname(cache_file)
+  try:
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    if not _is_private(cache_dir, True):
+      return
+    try:
+      if not _is_private(cache_file, False):
+        raise ValueError
+      with open(cache_file, 'r') as fid:
+        cache = json.loads(fid.read())
+    except (OSError, ValueError):
+      cache = {}
+    cache[hostname] = [is_loopback, time.time()]
+    # Write and rename, so other processes never see a partial file. mkstemp
+    # creates the file only readable by the user
+    fd, temp_file = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+      with os.fdopen(fd, 'w') as fid:
+        fid.write(json.dumps(cache))
+      os.replace(temp_file, cache_file)
+    except BaseException:
+      os.unlink(temp_file)
+      raise
+  except Exception:
+    pass
+
+
+def _getaddrinfo(hostname, timeout):
+  '''
+  :func:`socket.getaddrinfo`, but raises :class:`TimeoutError` after
+  ``timeout`` seconds. The lookup is left to finish in a daemon thread.
+  '''
+  result = []
+
+  def resolve():
+    try:
+      result.append(socket.getaddrinfo(hostname, None))
+    except Exception as e:
+      result.append(e)
+
+  thread = threading.Thread(target=resolve, daemon=True,
+                            name='terra_getaddrinfo')
+  thread.start()
+  thread.join(timeout)
+  if not result:
+    raise TimeoutError(f'Resolving "{hostname}" took more than {timeout}s')
+  if isinstance(result[0], Exception):
+    raise result[0]
+  return result[0]
+
+
 def check_is_loopback(hostname):
+  '''
+  Check if ``hostname`` resolves to a loopback address. Names that can not be
+  resolved within :envvar:`TERRA_RESOLVE_HOSTNAME_TIMEOUT` seconds are treated
+  the same as loopback addresses.
+
+  The answer is cached on disk, per user and host name, for
+  :envvar:`TERRA_HOSTNAME_CACHE_TTL` seconds, so every zone on the same host
+  shares one lookup. Timeouts and temporary DNS failures are not cached, so
+  the next lookup tries again.
+  '''
+  timeout = float(os.environ.get('TERRA_RESOLVE_HOSTNAME_TIMEOUT', 2))
+  ttl = float(os.environ.get('TERRA_HOSTNAME_CACHE_TTL', 600))
+
+  if ttl > 0:
+    is_loopback = _read_hostname_cache(hostname, ttl)
+    if is_loopback is not None:
+      return is_loopback
+
   # Get the first IP
+  cache = ttl > 0
   try:
-    addr = socket.getaddrinfo(hostname, None)[0][4][0]
+    addr = _getaddrinfo(hostname, timeout)[0][4][0]
     ip = ipaddress.ip_address(addr)
-    return ip.is_loopback
+    is_loopback = ip.is_loopback
   except KeyboardInterrupt:
     raise
-  except Exception:
-    return True
+  except Exception as e:
+    is_loopback = True
+    if isinstance(e, TimeoutError) or (
+        isinstance(e, socket.gaierror) and e.errno == socket.EAI_AGAIN):
+      cache = False
 
+  if cache:
+    _write_hostname_cache(hostname, is_loopback)
+  return is_loopback
 
-@settings_property
+
+@settings_property(io_bound=True)
 def logging_hostname(self):
   '''
   A :func:`settings_property` for getting the hostname for logging.
@@ -434,7 +747,48 @@ def stdin_istty(self):
   return sys.stdin.isatty()
 
 
-global_templates = [
+_templates_version = 0
+# Bumped by every change to global_templates, so the compiled templates (see
+# _template_index) are only compiled again after one
+
+
+def templates_changed():
+  '''
+  Tell terra that :data:`global_templates` changed, so they are compiled
+  again the next time they are used. Changes made by
+  :meth:`LazySettings.add_templates`, or to the list itself, are noticed
+  automatically; call this after changing a template in place, e.g.
+  ``global_templates[0][1]['foo'] = 1``.
+  '''
+  global _templates_version
+  _templates_version += 1
+
+
+def _templates_mutator(method):
+  @wraps(method)
+  def mutate(self, *args, **kwargs):
+    templates_changed()
+    return method(self, *args, **kwargs)
+  return mutate
+
+
+class _TemplateList(list):
+  # The list type of global_templates, which notices its own changes
+  __setitem__ = _templates_mutator(list.__setitem__)
+  __delitem__ = _templates_mutator(list.__delitem__)
+  __iadd__ = _templates_mutator(list.__iadd__)
+  __imul__ = _templates_mutator(list.__imul__)
+  append = _templates_mutator(list.append)
+  extend = _templates_mutator(list.extend)
+  insert = _templates_mutator(list.insert)
+  pop = _templates_mutator(list.pop)
+  remove = _templates_mutator(list.remove)
+  clear = _templates_mutator(list.clear)
+  sort = _templates_mutator(list.sort)
+  reverse = _templates_mutator(list.reverse)
+
+
+global_templates = _TemplateList([
   (
     {"compute": {"arch": "terra.compute.virtualenv"}},  # Pattern
     {"compute": {"virtualenv_dir": need_to_set_virtualenv_dir}}  # Defaults
@@ -463,6 +817,8 @@ global_templates = [
                   "%(levelname)s/%(processName)s - %(filename)s - %(message)s",
         "date_format": None,
         "style": "%",
+        "queue_size": 10000,
+        "queue_full": "block",
         "server": {
           # This is tricky use of a setting, because the master controller will
           # be the first to set it, but the runner and task will inherit the
@@ -472,7 +828,11 @@ global_templates = [
           "port": DEFAULT_TCP_LOGGING_PORT,
           "listen_host": logging_listen_host,
           "listen_address": logging_listen_address,
-          "family": logging_family
+          "family": logging_family,
+          "batch_size": 100,
+          "batch_delay": 0.05,
+          "batch_compress": True,
+          "allow_pickle": False
         },
         "log_file": log_file,
       },
@@ -511,14 +871,18 @@ global_templates = [
       'resume': False
     }
   ),
-]
+])
 ''':class:`list` of (:class:`dict`, :class:`dict`): Templates are how we
 conditionally assign default values. It is a list of pair tuples, where the
 first in the tuple is a "pattern" and the second is the default values. If the
 pattern is in the settings, then the default values are set for any unset
 values.
 
-Values are copies recursively, but only if not already set by your settings.'''
+Values are copies recursively, but only if not already set by your settings.
+
+The templates are compiled the first time they are used, and again after the
+list changes. After changing a template in place, call
+:func:`templates_changed`.'''
 
 
 global_compatibility_settings = []
@@ -561,9 +925,11 @@ class LazyObject:
 
   def __getattr__(self, name, *args, **kwargs):
     '''Supported'''
-    if self._wrapped is None:
+    wrapped = self._wrapped
+    if wrapped is None:
       self._setup()
-    return getattr(self._wrapped, name, *args, **kwargs)
+      wrapped = self._wrapped
+    return getattr(wrapped, name, *args, **kwargs)
 
   def __setattr__(self, name, value):
     '''Supported'''
@@ -592,9 +958,11 @@ class LazyObject:
 
   def __getitem__(self, name):
     '''Supported'''
-    if self._wrapped is None:
+    wrapped = self._wrapped
+    if wrapped is None:
       self._setup()
-    return self._wrapped[name]
+      wrapped = self._wrapped
+    return wrapped[name]
 
   def __setitem__(self, name, value):
     '''Supported'''
@@ -635,6 +1003,20 @@ class LazyObject:
     self._wrapped = state['_wrapped']
 
 
+class _SettingsSlot:
+  # The settings of a LazySettings in an isolated context. This is a mutable
+  # slot, so that configuring the settings in the context is seen by the
+  # contexts copied from it
+  __slots__ = ('owner', 'wrapped')
+
+  def __init__(self, owner, wrapped):
+    self.owner = owner
+    self.wrapped = wrapped
+
+
+_settings_slot = contextvars.ContextVar('terra_settings_slot', default=None)
+
+
 class LazySettings(LazyObject):
   '''
   A :class:`LazyObject` proxy for either global Terra settings or a custom
@@ -643,8 +1025,77 @@ class LazySettings(LazyObject):
   :envvar:`TERRA_SETTINGS_FILE`
 
   Based off of :mod:`django.conf`
+
+  The settings are resolved through a :class:`contextvars.ContextVar`, so
+  :meth:`isolate` can give a thread or :mod:`asyncio` task its own settings,
+  e.g. to run many independent workflows in one process.
   '''
 
+  @property
+  def _wrapped(self):
+    '''
+    The wrapped settings for the current context. Normally the settings of
+    the process, or the isolated settings in a :meth:`isolate` context
+    '''
+    slot = _settings_slot.get()
+    if slot is not None and slot.owner is self:
+      return slot.wrapped
+    return self.__dict__['_wrapped']
+
+  @_wrapped.setter
+  def _wrapped(self, value):
+    slot = _settings_slot.get()
+    if slot is not None and slot.owner is self:
+      slot.wrapped = value
+    else:
+      self.__dict__['_wrapped'] = value
+
+  @property
+  def _isolated(self):
+    '''
+    Whether the settings of the current context are the isolated settings of
+    an :meth:`isolate` context
+    '''
+    slot = _settings_slot.get()
+    return slot is not None and slot.owner is self
+
+  @contextmanager
+  def isolate(self, wrapped=None):
+    '''
+    Context manager that gives the current thread or :mod:`asyncio` task its
+    own settings, until the context exits. Code that runs in a copy of the
+    context, such as :mod:`asyncio` tasks created inside it, uses the same
+    isolated settings. Other threads and tasks are not affected.
+
+    Anything that is derived from the settings on demand, such as the logger
+    zone and hostname of a record or the ``processing_dir``, follows the
+    isolated settings. Process wide resources set up by
+    :data:`terra.core.signals.post_settings_configured` receivers, such as the
+    log file, are still shared: once the logger is configured, configuring
+    isolated settings does not configure it again.
+
+    Arguments
+    ---------
+    wrapped : :class:`Settings`, optional
+        The isolated settings. By default they are not configured, so
+        :meth:`configure` can be called inside the context, even if the
+        settings of the process are configured
+
+    Example
+    -------
+    .. code-block:: python
+
+        async def run(config):
+          with settings.isolate():
+            settings.configure(config)
+            ...
+    '''
+    token = _settings_slot.set(_SettingsSlot(self, wrapped))
+    try:
+      yield self
+    finally:
+      _settings_slot.reset(token)
+
   def _setup(self, name=None):
     """
     Load the config json file pointed to by the environment variable. This is
@@ -672,7 +1123,10 @@ class LazySettings(LazyObject):
           "accessing settings.")
     # Store in global variable :-\
     config_file.filename = settings_file
-    self.configure(json_load(settings_file))
+    if settings_file.endswith(snapshot_extension):
+      self.configure(snapshot_load(settings_file))
+    else:
+      self.configure(json_load(settings_file))
 
     # This should NOT be done on a per instance basis, this is only for
     # the global terra.settings. So maybe this should be done in a context
@@ -723,31 +1177,35 @@ class LazySettings(LazyObject):
           self._wrapped.moveattr(src, dst)
         logger.warning(msg)
 
-    # apply global template attributes
-    for pattern, settings in global_templates:
-      if nested_in_dict(pattern, self._wrapped):
-        # Not the most efficient way to do this, but insignificant "preupdate"
-        d = {}
-        nested_update(d, settings)
-        nested_update(d, self._wrapped)
-        # Nested update and run patch code
-        self._wrapped.update(d)
+    # apply global template attributes, merging all their defaults at once
+    defaults = _template_index().apply(self._wrapped)
+    if defaults:
+      # Nested update and run patch code
+      self._wrapped.update(defaults)
 
-    def read_json(json_file):
-      # In case json_file is an @settings_property function
-      if getattr(json_file, 'settings_property', None):
-        json_file = json_file(settings)
+    # Replace json includes with settings_property that load them on first
+    # access. Each file is read at most once per configure. Serialized
+    # PathList blocks are loaded back into a PathList
+    json_include_cache = {}
 
-      return Settings(json_load(json_file))
+    def is_json_include(key, value):
+      return (isinstance(key, str)
+              and (isinstance(value, str)
+                   or getattr(value, 'settings_property', False))
+              and any(key.endswith(pattern)
+                      for pattern in json_include_suffixes))
 
     nested_patch_inplace(
         self._wrapped,
-        lambda key, value: (isinstance(key, str)
-                            and (isinstance(value, str)
-                                 or getattr(value, 'settings_property', False))
-                            and any(key.endswith(pattern)
-                                    for pattern in json_include_suffixes)),
-        lambda key, value: read_json(value))
+        lambda key, value: (PathList.is_json(value)
+                            or is_json_include(key, value)),
+        lambda key, value: (PathList.from_json(value)
+                            if PathList.is_json(value)
+                            else _json_include(value, json_include_cache)))
+
+    if self is settings and \
+       os.environ.get('TERRA_EAGER_SETTINGS_PROPERTIES', None) == "1":
+      _evaluate_io_bound_properties(self._wrapped)
 
     # Importing these here is intentional, it guarantees the signals are
     # connected so that executor and computes can setup logging if need be
@@ -755,7 +1213,8 @@ class LazySettings(LazyObject):
     import terra.compute  # noqa
 
     from terra.core.signals import post_settings_configured
-    post_settings_configured.send(sender=self)
+    # Don't wait on receivers that are not ordering critical
+    post_settings_configured.send_async(sender=self)
     logger.debug2('Post settings configure')
 
   @property
@@ -770,6 +1229,23 @@ class LazySettings(LazyObject):
     """
     return self._wrapped is not None
 
+  def path(self, name):
+    """
+    Create a precompiled accessor for a dot delimited setting name. Useful
+    when the same setting is read or written repeatedly, such as in a loop.
+
+    Arguments
+    ---------
+    name : :class:`str`
+        Dot delimited setting name, e.g. ``"logging.server.hostname"``
+
+    Returns
+    -------
+    SettingsPath
+        The accessor, with ``get``, ``set`` and ``contains`` methods
+    """
+    return SettingsPath(self, name)
+
   def add_templates(self, templates):
     """
     Helper function to easily expose adding more defaults templates to
@@ -784,6 +1260,8 @@ class LazySettings(LazyObject):
     offset = len(global_templates)
     for template in templates:
       global_templates.insert(-offset, template)
+    # In case global_templates was replaced by a plain list
+    templates_changed()
 
   def add_compatibility_settings(self, attrs):
     """
@@ -814,39 +1292,46 @@ class LazySettings(LazyObject):
 
 
 class LazySettingsThreaded(LazySettings):
+  '''
+  Deprecated, use :meth:`LazySettings.isolate`.
+  :class:`terra.executor.thread.ThreadPoolExecutor` already runs every task
+  in an isolated context, so it no longer needs this. Will be removed in the
+  next release.
+
+  After :meth:`downcast`, every :class:`concurrent.futures.ThreadPoolExecutor`
+  worker thread gets its own copy on write :class:`OverlaySettings` of the
+  settings, the first time it uses them, just like :meth:`LazySettings.isolate`
+  would give it. The thread keeps it for the rest of its life.
+  '''
+
+  def __init__(self, *args, **kwargs):
+    warnings.warn('LazySettingsThreaded is deprecated, use '
+                  'LazySettings.isolate', DeprecationWarning, stacklevel=2)
+    super().__init__(*args, **kwargs)
+
   @classmethod
   def downcast(cls, obj):
+    warnings.warn('LazySettingsThreaded is deprecated, use '
+                  'LazySettings.isolate', DeprecationWarning, stacklevel=2)
     # This downcast function was intended for LazySettings instances only
     assert isinstance(obj, LazySettings)
-    # Put settings in __wrapped where property below expects it.
-    settings = obj._wrapped
-    # Downcast
     obj.__class__ = cls
-    obj.__wrapped = settings
-    obj.__tls = threading.local()
 
-  @property
-  def _wrapped(self):
-    '''
-    Thread safe version of _wrapped getter
-    '''
-    thread = threading.current_thread()
-    if thread._target == concurrent.futures.thread._worker:
-      if not hasattr(self.__tls, 'settings'):
-        self.__tls.settings = copy.deepcopy(self.__wrapped)
-      return self.__tls.settings
-    else:
-      return self.__wrapped
+  def _get_wrapped(self):
+    slot = _settings_slot.get()
+    if slot is not None and slot.owner is self:
+      return slot.wrapped
+    wrapped = self.__dict__['_wrapped']
+    if wrapped is not None and \
+       getattr(threading.current_thread(), '_target', None) \
+       == concurrent.futures.thread._worker:
+      # Isolate the worker thread. Its context is not shared with any other
+      # thread, so there is no need to reset it
+      wrapped = OverlaySettings.overlay(wrapped)
+      _settings_slot.set(_SettingsSlot(self, wrapped))
+    return wrapped
 
-  def __setattr__(self, name, value):
-    '''Supported'''
-    if name in ("_LazySettingsThreaded__wrapped",
-                "_LazySettingsThreaded__tls"):
-      # Call original __setattr__ to avoid infinite __setattr__ loops.
-      object.__setattr__(self, name, value)
-    else:
-      # Normal LazyObject setter
-      super().__setattr__(name, value)
+  _wrapped = property(_get_wrapped, LazySettings._wrapped.fset)
 
 
 class ObjectDict(dict):
@@ -878,17 +1363,38 @@ class ObjectDict(dict):
 
   def __setattr__(self, name, value):
     """ Supported """
-    if '.' in name:
+    keys = _split_name(name)
+    if isinstance(value, _scalar_types):
+      # Fast path: scalars do not need a nested update, as long as the parent
+      # nodes already exist
+      node = self
+      for key in keys[:-1]:
+        node = node.get(key)
+        if not isinstance(node, ObjectDict):
+          break
+      else:
+        node[keys[-1]] = value
+        return
+
+    if len(keys) > 1:
       def _dict(k, v):
         return {k[0]: _dict(k[1:], v)} if k else v
-      self.update(_dict(name.split('.'), value))
+      self.update(_dict(keys, value))
     else:
       self.update([(name, value)])
 
   def __contains__(self, name):
-    if '.' in name:
-      first, rest = name.split('.', 1)
-      return self.__contains__(first) and (rest in self[first])
+    if isinstance(name, str) and '.' in name:
+      node = self
+      keys = _split_name(name)
+      for index, key in enumerate(keys):
+        if not isinstance(node, ObjectDict):
+          # Same as the recursive "rest in node" for non-dict nodes
+          return '.'.join(keys[index:]) in node
+        if not dict.__contains__(node, key):
+          return False
+        node = dict.__getitem__(node, key)
+      return True
     return super().__contains__(name)
 
   def update(self, *args, **kwargs):
@@ -923,7 +1429,7 @@ class ObjectDict(dict):
     """ Find leaf node from dot delimited string """
     if '.' in name:
       node = self
-      keys = name.split('.')
+      keys = _split_name(name)
       for key in keys[:-1]:
         node = node[key]
       return (node, keys[-1])
@@ -949,11 +1455,263 @@ class ObjectDict(dict):
     return result
 
 
+_journal_missing = object()
+# Marks a key that did not exist before being changed in a settings context
+
+_settings_versions = itertools.count(1)
+# Source of the Settings mutation version numbers. Unique across all settings
+# trees, so a version of one tree is never mistaken for one of another
+
+_unchanged = threading.local()
+# Set while accessing settings in ways that do not change what they mean, i.e.
+# caching an evaluated value, or reading values to serialize them. These do
+# not change the Settings mutation version
+
+_read_hooks = 0
+# The number of settings contexts and settings_property evaluations in
+# progress, in all threads. Only while there are any do reads of the settings
+# have to be recorded (by the undo journal or settings_property_trace), so
+# reads check this one flag before doing any of that work
+_read_hooks_lock = threading.Lock()
+
+
+def _read_hooks_add(count):
+  global _read_hooks
+  with _read_hooks_lock:
+    _read_hooks += count
+
+
 class ExpandedString(str):
   pass
 
 
+def _cache_value(node, key, val):
+  unchanged = getattr(_unchanged, 'active', False)
+  _unchanged.active = True
+  try:
+    if isinstance(node, ObjectDict):
+      ObjectDict.__setattr__(node, key, val)
+    else:
+      node[key] = val
+  finally:
+    _unchanged.active = unchanged
+
+
+class _Evaluation:
+  # A settings_property being evaluated by one thread, that other threads can
+  # wait for
+  __slots__ = ('thread', 'done')
+
+  def __init__(self):
+    self.thread = threading.get_ident()
+    self.done = threading.Event()
+
+
+_evaluations = {}
+# The settings_property being evaluated right now, by (id(node), key)
+_evaluations_lock = threading.Lock()
+
+
+def _evaluate_property(node, key, func):
+  '''
+  Evaluate the @settings_property ``func`` stored in ``node[key]``, and cache
+  the result in ``node``.
+
+  Only one thread evaluates a property at a time. Any other thread that needs
+  the same property in the meantime waits for the cached result instead of
+  evaluating it again, and possibly getting a different answer (e.g. another
+  :func:`tempfile.mkdtemp` directory). If the evaluation fails, the next
+  waiting thread tries again, and gets its own exception.
+  '''
+  evaluation_key = (id(node), key)
+  while True:
+    with _evaluations_lock:
+      val = dict.get(node, key, _journal_missing)
+      if val is func:
+        evaluation = _evaluations.get(evaluation_key)
+        if evaluation is None:
+          evaluation = _evaluations[evaluation_key] = _Evaluation()
+          break
+        if evaluation.thread == threading.get_ident():
+          # The property needs itself, let it recurse like it always has
+          evaluation = None
+          break
+      elif val is _journal_missing:
+        # Not stored in node, nothing to wait for
+        evaluation = None
+        break
+      elif isfunction(val) and getattr(val, 'settings_property', None):
+        # Replaced by another settings_property in the meantime
+        func = val
+        continue
+      else:
+        # Evaluated by another thread in the meantime
+        evaluation = None
+        func = None
+        break
+    evaluation.done.wait()
+
+  if func is None:
+    if _read_hooks and settings_property_trace.active:
+      # Still a dependency of the property being evaluated by this thread
+      settings_property_trace.read(node, key)
+    return val
+
+  try:
+    val = settings_property_trace.evaluate(func, node, key)
+
+    # cache result, because the documentation said this should happen
+    _cache_value(node, key, val)
+  finally:
+    if evaluation is not None:
+      with _evaluations_lock:
+        del _evaluations[evaluation_key]
+      evaluation.done.set()
+  return val
+
+
+def _evaluate_value(node, key, val):
+  '''
+  Evaluate @settings_property functions and expand strings for the value
+  ``val`` stored in ``node[key]``, caching the result back in ``node``
+  '''
+  if isfunction(val) and getattr(val, 'settings_property', None):
+    shared = node._shared_node() if isinstance(node, OverlaySettings) \
+        else None
+    if shared is not None:
+      # Evaluate it once for every overlay of the same shared settings
+      val = _evaluate_property(shared, key, val)
+      dict.__setitem__(node, key, val)
+    else:
+      val = _evaluate_property(node, key, val)
+  elif _read_hooks and settings_property_trace.active:
+    settings_property_trace.read(node, key)
+
+  if isinstance(val, str) and not isinstance(val, ExpandedString):
+    val = os.path.expandvars(val)
+    if any(key.endswith(pattern) for pattern in filename_suffixes):
+      val = os.path.expanduser(val)
+    val = ExpandedString(val)
+    _cache_value(node, key, val)
+  return val
+
+
+def _json_include(json_file, cache):
+  '''
+  Create a :func:`settings_property` that loads the json include file
+  ``json_file`` as :class:`Settings`. ``cache`` is shared by all the includes
+  of one configure, keyed by resolved path, so the same file is only read
+  once.
+  '''
+
+  @settings_property
+  def json_include(self):
+    filename = json_file
+    # In case json_file is an @settings_property function
+    if getattr(filename, 'settings_property', None):
+      filename = filename(self)
+
+    path = os.path.realpath(filename)
+    try:
+      data = cache[path]
+    except KeyError:
+      data = cache[path] = pickle.dumps(json_load(filename),
+                                        protocol=pickle.HIGHEST_PROTOCOL)
+    # Every include gets its own copy
+    return Settings(pickle.loads(data))
+
+  return json_include
+
+
+def _evaluate_io_bound_properties(root):
+  '''
+  Evaluate the independent ``io_bound`` :func:`settings_property` in ``root``
+  concurrently, one thread each, so that their I/O is not serialized. A
+  property that :data:`settings_property_trace` has seen use another
+  settings_property (e.g. in an earlier configure) is not independent; it is
+  left to be evaluated on first access, after what it uses. Any property that
+  fails is left to be evaluated (and fail) on first access, as usual.
+  '''
+  pending = []
+  dependent = settings_property_trace.dependent()
+
+  def find(node):
+    for key, value in dict.items(node):
+      if isinstance(value, Settings):
+        find(value)
+      elif isinstance(key, str) and isfunction(value) and \
+          getattr(value, 'io_bound', False) and \
+          value.__qualname__ not in dependent:
+        pending.append((node, key))
+
+  def evaluate(node, key):
+    try:
+      _evaluate_value(node, key, node[key])
+    except Exception:
+      logger.debug2(f'Eager evaluation of setting "{key}" failed',
+                    exc_info=True)
+
+  find(root)
+  threads = [threading.Thread(target=evaluate, args=item, daemon=True,
+                              name=f'terra_eager_{item[1]}')
+             for item in pending]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+
+class _SettingsTree:
+  # State shared by every node of one settings tree
+  #
+  # version changes every time anything in the tree is changed, but not when
+  # mutable values (e.g. lists) are changed in place; a cached result derived
+  # from the settings (e.g. serializableSettings) has to check those itself.
+  # Reads are not tracked at all, so they stay as cheap as a dict lookup
+  __slots__ = ('version',)
+
+  def __init__(self):
+    self.version = next(_settings_versions)
+
+  def mutated(self):
+    self.version = next(_settings_versions)
+
+
 class Settings(ObjectDict):
+  _mutable_types = (list, dict, set)
+
+  def _tree(self):
+    tree = self.__dict__.get('_settings_tree')
+    if tree is None:
+      tree = _SettingsTree()
+      object.__setattr__(self, '_settings_tree', tree)
+    return tree
+
+  def _tree_share(self, tree):
+    nodes = [self]
+    while nodes:
+      node = nodes.pop()
+      # Every node below a node that shares the tree shares it too
+      if node.__dict__.get('_settings_tree') is not tree:
+        object.__setattr__(node, '_settings_tree', tree)
+        nodes.extend(node._children())
+
+  def _trees(self):
+    # The trees this node's values can come from
+    return [self._tree()]
+
+  def _tree_version(self):
+    '''
+    A version of the settings tree this node is part of. It changes every time
+    anything in the tree changes, but not when the settings are only read, or
+    when mutable values are changed in place (e.g. ``settings.x.append(1)``)
+    '''
+    return tuple(tree.version for tree in self._trees())
+
+  def _mutated(self):
+    if not getattr(_unchanged, 'active', False):
+      self._tree().mutated()
+
   def __getattr__(self, name):
     '''
     ``__getitem__`` that will evaluate @settings_property functions, and cache
@@ -966,26 +1724,19 @@ class Settings(ObjectDict):
     # the settings_property evaluation has to be here.
 
     try:
-      val = super().__getattr__(name)
-      if isfunction(val) and getattr(val, 'settings_property', None):
-        # Ok this ONE line is a bit of a hack :( But I argue it's specific to
-        # this singleton implementation, so I approve!
-        val = val(settings)
-
-        # cache result, because the documentation said this should happen
-        super().__setattr__(name, val)
-
-      if isinstance(val, str) and not isinstance(val, ExpandedString):
-        val = os.path.expandvars(val)
-        if any(name.endswith(pattern) for pattern in filename_suffixes):
-          val = os.path.expanduser(val)
-        val = ExpandedString(val)
-        super().__setattr__(name, val)
-      return val
+      if '.' in name:
+        node, key = self._findnode(name)
+      else:
+        node, key = self, name
+      val = node[key]
     except KeyError:
       # Throw a KeyError to prevent a recursive corner case
       raise AttributeError("'{}' object has no attribute '{}'".format(
           self.__class__.__qualname__, name)) from None
+    if _read_hooks or isinstance(val, (FunctionType, str)):
+      return _evaluate_value(node, key, val)
+    # Nothing to evaluate, expand or record
+    return val
 
   # this is copy.deepcopy, but uses __to_dict__ instead of __deepcopy__
   def to_dict(self, memo=None, _nil=[]):
@@ -1023,21 +1774,498 @@ class Settings(ObjectDict):
         rv[k] = copy.deepcopy(value, memo)
     return rv
 
-  def __enter__(self):
-    import copy
+  # Undo journal for settings contexts
+  #
+  # Instead of backing up the whole settings on __enter__, every mutation
+  # inside a ``with`` context records the original value of the key it
+  # changed, the first time the key is changed. __exit__ puts the original
+  # values back in reverse order. ``_journal`` is a stack of journals (one per
+  # nested context) that is shared by every node of the settings tree, no
+  # matter how a node is reached, so mutations of nested settings are recorded
+  # too. It is shared with the whole tree on every __enter__, and with any
+  # settings added to the tree in the context. Mutable values (e.g. lists)
+  # can be changed in place, even through a reference taken before the
+  # context, so they are all recorded on __enter__, and again the first time
+  # they are accessed if they were added in the context. Reads only do any of
+  # this while a context is open somewhere (see _read_hooks).
+
+  def _owned_items(self):
+    # The values that belong to this tree
+    return dict.items(self)
+
+  def _children(self):
+    return [value for _, value in self._owned_items()
+            if isinstance(value, Settings)]
+
+  def _journal_mutable(self, stack):
+    nodes = [self]
+    while nodes:
+      node = nodes.pop()
+      if node.__dict__.get('_journal') is not stack:
+        object.__setattr__(node, '_journal', stack)
+      for key, value in list(node._owned_items()):
+        if isinstance(value, Settings):
+          nodes.append(value)
+        elif isinstance(value, self._mutable_types):
+          node._journal_record(key, value)
+
+  def _journal_share(self, stack):
+    nodes = [self]
+    while nodes:
+      node = nodes.pop()
+      # Every node below a node that shares the stack shares it too
+      if node.__dict__.get('_journal') is not stack:
+        object.__setattr__(node, '_journal', stack)
+        nodes.extend(node._children())
+
+  def _journal_record(self, key, value=_journal_missing):
+    stack = self.__dict__.get('_journal')
+    if stack:
+      entries = stack[-1]
+      entry = (id(self), key)
+      if entry not in entries:
+        if value is _journal_missing:
+          value = dict.get(self, key, _journal_missing)
+        else:
+          value = copy.deepcopy(value)
+        entries[entry] = (self, key, value)
+
+  def _journal_restore(self, key, value):
+    if value is _journal_missing:
+      dict.pop(self, key, None)
+    else:
+      dict.__setitem__(self, key, value)
+    self._mutated()
+
+  def __getitem__(self, key):
+    value = dict.__getitem__(self, key)
+    if not _read_hooks:
+      # No settings context anywhere, nothing to record
+      return value
+    if isinstance(value, self._mutable_types) and \
+       not isinstance(value, Settings):
+      # Could be changed in place from now on
+      stack = self.__dict__.get('_journal')
+      if stack:
+        self._journal_record(key, value)
+    elif isinstance(value, Settings):
+      stack = self.__dict__.get('_journal')
+      if stack is not None and value.__dict__.get('_journal') is not stack:
+        value._journal_share(stack)
+    return value
+
+  def items(self):
+    if self.__dict__.get('_journal'):
+      # Through __getitem__, so mutable values are recorded
+      return [(key, self[key]) for key in self.keys()]
+    return super().items()
+
+  def values(self):
+    if self.__dict__.get('_journal'):
+      return [self[key] for key in self.keys()]
+    return super().values()
+
+  def get(self, key, default=None):
+    if dict.__contains__(self, key):
+      return self[key]
+    return default
+
+  def setdefault(self, key, default=None):
+    if dict.__contains__(self, key):
+      return self[key]
+    self[key] = default
+    return default
+
+  def __ior__(self, other):
+    # Through __setitem__, so the changes are recorded
+    for key, value in dict(other).items():
+      self[key] = value
+    return self
+
+  def __setitem__(self, key, value):
+    self._journal_record(key)
+    super().__setitem__(key, value)
+    if isinstance(value, Settings):
+      value._tree_share(self._tree())
+      stack = self.__dict__.get('_journal')
+      if stack is not None:
+        value._journal_share(stack)
+    self._mutated()
+
+  def __delitem__(self, key):
+    self._journal_record(key)
+    super().__delitem__(key)
+    self._mutated()
+
+  def pop(self, name, *args):
+    if isinstance(name, str) and '.' not in name:
+      self._journal_record(name)
     try:
-      # check if _backup exists
-      backup = object.__getattribute__(self, "_backup")
-      # if it does, append a copy of self
-      backup.append(copy.deepcopy(self))
-    except AttributeError:
-      # if it doesn't exist yet, make a list
-      object.__setattr__(self, "_backup", [copy.deepcopy(self)])
+      return super().pop(name, *args)
+    finally:
+      self._mutated()
+
+  def popitem(self):
+    if self:
+      self._journal_record(next(reversed(self.keys())))
+    try:
+      return super().popitem()
+    finally:
+      self._mutated()
+
+  def clear(self):
+    for key in self.keys():
+      self._journal_record(key)
+    super().clear()
+    self._mutated()
+
+  def __getstate__(self):
+    # The journal, tree and serialization cache are not part of the settings
+    state = self.__dict__.copy()
+    state.pop('_journal', None)
+    state.pop('_settings_tree', None)
+    state.pop('_serialized', None)
+    return state or None
+
+  def freeze(self):
+    '''
+    Evaluate every :func:`settings_property` and expand every string, the
+    same way attribute access would, and return the result as an immutable
+    :class:`FrozenSettings` snapshot. The evaluated values are cached in this
+    object too.
+
+    Returns
+    -------
+    FrozenSettings
+        The snapshot
+    '''
+    return _freeze(self)
+
+  def __enter__(self):
+    stack = self.__dict__.get('_journal')
+    if stack is None:
+      stack = []
+    stack.append({})
+    self._journal_mutable(stack)
+    _read_hooks_add(1)
 
   def __exit__(self, type_, value, traceback):
-    self.clear()
-    backup = self._backup.pop()
-    self.update(backup)
+    try:
+      entries = self._journal.pop()
+      for node, key, original in reversed(entries.values()):
+        node._journal_restore(key, original)
+    finally:
+      _read_hooks_add(-1)
+
+
+class _OverlayState:
+  # Shared by all the OverlaySettings of one overlay
+  __slots__ = ('changed',)
+
+  def __init__(self):
+    self.changed = False
+
+
+class OverlaySettings(Settings):
+  '''
+  A copy on write view of a shared :class:`Settings` object, used by
+  :class:`terra.executor.thread.ThreadPoolExecutor` to give each task its own
+  settings.
+
+  Creating an overlay is only a shallow copy of the top level. Nested
+  :class:`Settings` are replaced by their own overlay the first time they are
+  accessed, and mutable values (lists, dicts and sets) are deep copied the
+  first time they are accessed, so nothing a thread does can change the shared
+  settings. Immutable values stay shared.
+
+  Copying or pickling an :class:`OverlaySettings` results in a normal
+  :class:`Settings` object.
+  '''
+
+  def __init__(self, *args, **kwargs):
+    # Keys that no longer refer to a value in the shared settings
+    object.__setattr__(self, '_owned', set())
+    object.__setattr__(self, '_shared', None)
+    object.__setattr__(self, '_state', _OverlayState())
+    super().__init__(*args, **kwargs)
+
+  @classmethod
+  def overlay(cls, shared, state=None):
+    '''
+    Create an overlay of ``shared`` without copying anything below the top
+    level
+    '''
+    obj = cls()
+    dict.update(obj, shared)
+    object.__setattr__(obj, '_shared', shared)
+    if state is not None:
+      object.__setattr__(obj, '_state', state)
+    return obj
+
+  def _shared_node(self):
+    '''
+    The shared :class:`Settings` this overlay is a view of, as long as nothing
+    in the overlay has been changed; else ``None``. Until then, a
+    :func:`settings_property` evaluates the same in both, so it is evaluated
+    (and cached) in the shared settings, once for all the overlays.
+    '''
+    if self._state.changed:
+      return None
+    return self._shared
+
+  def _changed(self):
+    if not getattr(_unchanged, 'active', False):
+      self._state.changed = True
+
+  def _private_copy(self, value):
+    if isinstance(value, Settings):
+      return OverlaySettings.overlay(value, self._state)
+    if isinstance(value, self._mutable_types):
+      # Could be changed in place from now on
+      self._changed()
+      return copy.deepcopy(value)
+    return value
+
+  def _privatize(self, key, value):
+    if key not in self._owned:
+      private = self._private_copy(value)
+      if private is not value:
+        dict.__setitem__(self, key, private)
+        if isinstance(private, Settings):
+          private._tree_share(self._tree())
+      self._owned.add(key)
+      return private
+    return value
+
+  def _journal_record(self, key, value=_journal_missing):
+    # Make sure the journal never records a shared value
+    if self.__dict__.get('_journal') and value is _journal_missing and \
+       dict.__contains__(self, key):
+      self._privatize(key, dict.__getitem__(self, key))
+    super()._journal_record(key, value)
+
+  def _owned_items(self):
+    # Values that are not owned are shared with other settings. They join the
+    # tree (and get the journal) when they are privatized, i.e. by the first
+    # __getitem__
+    return [(key, value) for key, value in dict.items(self)
+            if key in self._owned]
+
+  def _trees(self):
+    # Values that are not owned yet come from the shared settings
+    trees = super()._trees()
+    if self._shared is not None:
+      trees.extend(self._shared._trees())
+    return trees
+
+  def _journal_restore(self, key, value):
+    super()._journal_restore(key, value)
+    if value is _journal_missing:
+      self._owned.discard(key)
+    else:
+      self._owned.add(key)
+
+  def __getitem__(self, key):
+    self._privatize(key, dict.__getitem__(self, key))
+    return super().__getitem__(key)
+
+  def items(self):
+    return [(key, self[key]) for key in self.keys()]
+
+  def values(self):
+    return [self[key] for key in self.keys()]
+
+  def __setitem__(self, key, value):
+    super().__setitem__(key, value)
+    self._owned.add(key)
+    self._changed()
+
+  def __delitem__(self, key):
+    super().__delitem__(key)
+    self._owned.discard(key)
+    self._changed()
+
+  def pop(self, name, *args):
+    if isinstance(name, str) and '.' not in name and \
+       dict.__contains__(self, name):
+      self[name]
+      value = super().pop(name, *args)
+      self._owned.discard(name)
+      self._changed()
+      return value
+    return super().pop(name, *args)
+
+  def popitem(self):
+    key, value = super().popitem()
+    if key not in self._owned:
+      value = self._private_copy(value)
+    self._owned.discard(key)
+    self._changed()
+    return key, value
+
+  def clear(self):
+    super().clear()
+    self._owned.clear()
+    self._changed()
+
+  def __reduce_ex__(self, protocol):
+    return (Settings, (), None, None, iter(dict.items(self)))
+
+
+class FrozenSettings(ObjectDict):
+  '''
+  An immutable, fully resolved snapshot of :class:`Settings`, created by
+  :func:`Settings.freeze`. All :func:`settings_property` have already been
+  evaluated and all strings expanded, so reading a value is a plain dictionary
+  lookup. Lists are stored as :class:`tuple` and sets as :class:`frozenset`.
+
+  Any attempt to change a :class:`FrozenSettings` raises a :class:`TypeError`.
+  '''
+
+  def __init__(self, *args, **kwargs):
+    # No nested update, the values are already frozen
+    dict.__init__(self, *args, **kwargs)
+
+  def __getattr__(self, name, *args):
+    try:
+      if '.' in name:
+        node = self
+        for key in _split_name(name):
+          node = node[key]
+        return node
+      return self[name]
+    except (KeyError, TypeError):
+      if args:
+        return args[0]
+      raise AttributeError("'{}' object has no attribute '{}'".format(
+          self.__class__.__qualname__, name)) from None
+
+  def _immutable(self, *args, **kwargs):
+    raise TypeError(
+        f"'{self.__class__.__qualname__}' object does not support changes")
+
+  __setattr__ = __delattr__ = __setitem__ = __delitem__ = __ior__ = _immutable
+  update = pop = popitem = clear = setdefault = _immutable
+
+  def __copy__(self):
+    return self
+
+  def __deepcopy__(self, memo):
+    return self
+
+  def __reduce__(self):
+    return (self.__class__, (dict(self),))
+
+
+def _freeze(value):
+  '''
+  Recursively convert ``value`` into its :class:`FrozenSettings` equivalent
+  '''
+  if isinstance(value, FrozenSettings):
+    return value
+  if isinstance(value, Settings):
+    frozen = {}
+    for key in list(value.keys()):
+      if isinstance(key, str):
+        val = _evaluate_value(value, key, value[key])
+      else:
+        val = value[key]
+      frozen[key] = _freeze(val)
+    return FrozenSettings(frozen)
+  if isinstance(value, dict):
+    return FrozenSettings({k: _freeze(v) for k, v in value.items()})
+  if isinstance(value, (list, tuple)):
+    return tuple(_freeze(v) for v in value)
+  if isinstance(value, (set, frozenset)):
+    return frozenset(_freeze(v) for v in value)
+  return value
+
+
+class SettingsPath:
+  '''
+  A precompiled accessor for a dot delimited setting name, e.g.
+  ``"logging.server.hostname"``. The name is only split once, and
+  :func:`get`, :func:`set` and :func:`contains` walk straight down the
+  settings tree, skipping the :class:`LazySettings` proxy and the nested dict
+  :func:`ObjectDict.update` for scalar assignments.
+
+  Use :func:`LazySettings.path` to create one for :data:`terra.settings`. The
+  accessor always resolves the current settings object, so it still works in
+  a ``with settings:`` context
+
+  Arguments
+  ---------
+  root : :class:`LazySettings` or :class:`ObjectDict`
+      The settings object the path is relative to
+  name : :class:`str`
+      Dot delimited setting name
+  '''
+
+  __slots__ = ('root', 'name', 'keys', '_lazy')
+
+  def __init__(self, root, name):
+    self.root = root
+    self.name = name
+    self.keys = _split_name(name)
+    self._lazy = isinstance(root, LazyObject)
+
+  def __repr__(self):
+    return f'<SettingsPath {self.name}>'
+
+  def _node(self):
+    if self._lazy:
+      node = self.root._wrapped
+      if node is None:
+        self.root._setup()
+        node = self.root._wrapped
+      return node
+    return self.root
+
+  def get(self, *default):
+    '''
+    Get the value of the setting, evaluating :func:`settings_property` and
+    expanding strings just like attribute access would
+
+    Arguments
+    ---------
+    default : optional
+        Returned if the setting does not exist. Otherwise an
+        :class:`AttributeError` is raised
+    '''
+    node = self._node()
+    try:
+      for key in self.keys[:-1]:
+        node = node[key]
+      val = node[self.keys[-1]]
+    except (KeyError, TypeError):
+      if default:
+        return default[0]
+      raise AttributeError(f"Setting '{self.name}' not found") from None
+    if isinstance(node, Settings):
+      return _evaluate_value(node, self.keys[-1], val)
+    return val
+
+  def set(self, value):
+    '''
+    Set the value of the setting, same as ``setattr(settings, name, value)``
+    '''
+    node = self._node()
+    if isinstance(value, _scalar_types):
+      parent = node
+      for key in self.keys[:-1]:
+        parent = parent.get(key)
+        if not isinstance(parent, ObjectDict):
+          break
+      else:
+        parent[self.keys[-1]] = value
+        return
+    setattr(node, self.name, value)
+
+  def contains(self):
+    '''
+    Check if the setting exists, same as ``name in settings``
+    '''
+    return self.name in self._node()
 
 
 override_config = {}
@@ -1052,23 +2280,16 @@ def default_settings():
   in their default state.
   '''
 
-  # temporary TERRA_UNITTEST to skip signal error
-  TERRA_UNITTEST = os.getenv("TERRA_UNITTEST")
-  os.environ["TERRA_UNITTEST"] = "1"
+  from terra.core.signals import disabled
 
   # temporary override_config to ignore ``--set`` inputs
   _override_config = copy.deepcopy(override_config)
   override_config.clear()
 
-  # default settings
+  # default settings, without sending signals to skip signal error
   _settings = LazySettings()
-  _settings.configure({})
-
-  # return TERRA_UNITTEST
-  if TERRA_UNITTEST is None:
-    os.environ.pop("TERRA_UNITTEST")
-  else:
-    os.environ["TERRA_UNITTEST"] = TERRA_UNITTEST
+  with disabled():
+    _settings.configure({})
 
   # return override_config
   override_config.update(_override_config)
@@ -1076,59 +2297,352 @@ def default_settings():
   return _settings
 
 
-def validate_keys():
+_template_missing = object()
+# A setting that is not set, or a pattern leaf that has to be a dictionary
+
+
+def _template_item(node, key):
+  # Raw item lookup, that does not evaluate a settings_property
+  if isinstance(node, dict):
+    return dict.get(node, key, _template_missing)
+  if isinstance(node, Mapping):
+    return node.get(key, _template_missing)
+  return _template_missing
+
+
+def _template_value(path, values, filled):
   '''
-  Validate that every key in the settings object is also present in the
-  default settings object. An exception will report:
+  The value at ``path`` in ``values``, or else in the template defaults
+  ``filled`` so far
+  '''
+  for key in path:
+    values = _template_item(values, key)
+    filled = _template_item(filled, key)
+  return filled if values is _template_missing else values
 
-  - Unrecognized settings not in the default settings object, offering
-    an alternative similar setting if found
-  - any settings that were expected to contain a nested dictionary
+
+def _template_copy(value):
+  # Copy the mutable defaults, so that settings never share them with
+  # global_templates
+  if isinstance(value, Mapping):
+    return {key: _template_copy(val) for key, val in value.items()}
+  if isinstance(value, (list, set)):
+    return copy.deepcopy(value)
+  return value
+
+
+def _template_fill(values, filled, defaults):
+  '''
+  Add the ``defaults`` that are neither in ``values`` nor ``filled`` to
+  ``filled``. Same as the defaults being nested updated by the settings.
+  '''
+  for key, default in defaults.items():
+    value = _template_item(values, key)
+    if value is _template_missing:
+      current = filled.get(key, _template_missing)
+      if current is _template_missing:
+        filled[key] = _template_copy(default)
+      elif isinstance(current, dict) and isinstance(default, Mapping):
+        _template_fill(_template_missing, current, default)
+    elif isinstance(value, Mapping) and isinstance(default, Mapping):
+      _template_fill(value, filled.setdefault(key, {}), default)
+
+
+def _pattern_leaves(pattern, parent=()):
+  for key, value in pattern.items():
+    path = parent + (key,)
+    if isinstance(value, Mapping):
+      yield (path, _template_missing)
+      yield from _pattern_leaves(value, path)
+    else:
+      yield (path, value)
+
+
+class _TemplateIndex:
+  '''
+  :data:`global_templates` compiled for applying them to settings. Each
+  pattern is flattened into ``(path, value)`` leaves, and the templates are
+  indexed by the value of their first leaf, so that only the templates whose
+  indexed value is set are tested against the settings.
   '''
 
-  def _validate(test, expected, parent=None):
-    '''Recursively validate that keys in ``test`` are  in ``expected``'''
+  def __init__(self, templates):
+    self.templates = templates
+    self.leaves = []
+    self.unindexed = []
+    # path: {value: [template numbers]}
+    self.index = {}
+
+    for number, (pattern, _) in enumerate(templates):
+      leaves = list(_pattern_leaves(pattern))
+      self.leaves.append(leaves)
+      for path, value in leaves:
+        if value is _template_missing:
+          continue
+        try:
+          self.index.setdefault(path, {}).setdefault(value, []).append(number)
+        except TypeError:  # Unhashable
+          continue
+        break
+      else:
+        self.unindexed.append(number)
 
-    messages = list()
+  def _candidates(self, path, value):
+    try:
+      return self.index[path].get(value, ())
+    except TypeError:  # Unhashable
+      return ()
+
+  def _matches(self, number, values, filled):
+    # Same as nested_in_dict(pattern, values updated by filled)
+    for path, expected in self.leaves[number]:
+      value = _template_value(path, values, filled)
+      if expected is _template_missing:
+        if not isinstance(value, Mapping):
+          return False
+      elif value is _template_missing or value != expected:
+        return False
+    return True
 
-    for key in test.keys():
-      dot_key = f"{parent}.{key}" if parent else key
+  def apply(self, values):
+    '''
+    Apply the templates to ``values``, in order. Each template whose pattern
+    is in ``values``, updated by the templates applied so far, adds its
+    defaults, unless they are already set.
 
-      # if test dict has an unexpected key, that key is bad
-      if key not in expected:
-        msg = f'"{dot_key}" not recognized'
-        best_match = difflib.get_close_matches(key, expected.keys(), n=1)
-        if best_match:
-          _key = best_match[0]
-          _dot_key = f"{parent}.{_key}" if parent else _key
-          msg += f', did you mean "{_dot_key}"?'
+    Arguments
+    ---------
+    values : :class:`dict`
+        The settings. These are not changed.
 
-        messages.append(msg)
+    Returns
+    -------
+    dict
+        The defaults that are missing from ``values``, to be nested updated
+        into ``values``
+    '''
+    filled = {}
+    pending = list(self.unindexed)
+    unset = []
+    for path in self.index:
+      value = _template_value(path, values, filled)
+      if value is _template_missing:
+        unset.append(path)
+      else:
+        pending.extend(self._candidates(path, value))
+    heapq.heapify(pending)
+
+    while pending:
+      number = heapq.heappop(pending)
+      if not self._matches(number, values, filled):
         continue
+      _template_fill(values, filled, self.templates[number][1])
 
-      # nested value - use __getitem__ to avoid evaluation of lazy settings
-      _test = test.__getitem__(key)
-      _expected = expected.__getitem__(key)
+      # Applying a template can set an indexed value of a later template
+      for path in list(unset):
+        value = _template_value(path, values, filled)
+        if value is not _template_missing:
+          unset.remove(path)
+          for candidate in self._candidates(path, value):
+            if candidate > number:
+              heapq.heappush(pending, candidate)
 
-      # recursion when _expected is a dictionary
-      if hasattr(_expected, 'keys'):
-        if hasattr(_test, 'keys'):
-          messages.extend(_validate(_test, _expected, parent=dot_key))
-        else:
-          messages.append(f'"{dot_key}" should be a dictionary')
+    return filled
+
+
+_template_index_cache = None
+_settings_schema = None
+# The compiled _TemplateIndex (with the global_templates and the
+# _templates_version it was compiled from) and settings_schema, only compiled
+# again when global_templates changes
+
+
+def _template_index():
+  global _template_index_cache
+
+  # The list is compared too, in case global_templates was replaced
+  templates = global_templates
+  version = _templates_version
+  cached = _template_index_cache
+  if cached is not None and cached[0] is templates and cached[1] == version:
+    return cached[2]
+  index = _TemplateIndex(tuple(templates))
+  _template_index_cache = (templates, version, index)
+  return index
+
+
+def _compile_schema(node):
+  return {key: _compile_schema(value) if hasattr(value, 'keys') else None
+          for key, value in node.items()}
 
-      # otherwise we're done!
 
-    return messages
+def settings_schema():
+  '''
+  The keys of the :func:`default_settings`, compiled into nested :class:`dict`
+  where each key maps to the schema of its nested settings, or ``None`` for a
+  leaf setting. The schema is only compiled again when
+  :data:`global_templates` changes.
+
+  Unlike :func:`default_settings`, this does not configure a new
+  :class:`LazySettings`, and no :func:`settings_property` is evaluated.
+
+  Returns
+  -------
+  dict
+      The settings schema
+  '''
+  global _settings_schema
+
+  index = _template_index()
+  if _settings_schema is not None and _settings_schema[0] is index:
+    return _settings_schema[1]
+
+  # Apply the templates to empty settings, the same way configure({}) does
+  schema = _compile_schema(index.apply({}))
+  _settings_schema = (index, schema)
+  return schema
+
+
+def _validate_keys(test, schema, parent=None, messages=None):
+  '''Validate that keys in ``test`` are in ``schema``, in a single pass'''
+
+  if messages is None:
+    messages = []
+
+  for key in test.keys():
+    dot_key = f"{parent}.{key}" if parent else key
+
+    # if test dict has an unexpected key, that key is bad
+    if key not in schema:
+      msg = f'"{dot_key}" not recognized'
+      best_match = difflib.get_close_matches(key, schema.keys(), n=1)
+      if best_match:
+        _key = best_match[0]
+        _dot_key = f"{parent}.{_key}" if parent else _key
+        msg += f', did you mean "{_dot_key}"?'
+
+      messages.append(msg)
+      continue
+
+    # recursion when a dictionary is expected
+    expected = schema[key]
+    if expected is not None:
+      # dict.__getitem__ to avoid evaluation of lazy settings
+      value = dict.__getitem__(test, key) if isinstance(test, dict) \
+          else test[key]
+      if hasattr(value, 'keys'):
+        _validate_keys(value, expected, dot_key, messages)
+      else:
+        messages.append(f'"{dot_key}" should be a dictionary')
+
+    # otherwise we're done!
+
+  return messages
+
+
+def validate_keys():
+  '''
+  Validate that every key in the settings object is also present in the
+  default settings object. An exception will report:
 
-  def_settings = default_settings()
-  messages = _validate(settings, def_settings)
+  - Unrecognized settings not in the default settings object, offering
+    an alternative similar setting if found
+  - any settings that were expected to contain a nested dictionary
+
+  The default settings keys are looked up in the precompiled
+  :func:`settings_schema`.
+  '''
+
+  schema = settings_schema()
+  if settings._wrapped is None:
+    settings._setup()
+  messages = _validate_keys(settings._wrapped, schema)
   if messages:
     report = '\n'.join(f"- {m}" for m in messages)
     raise ValueError(
       f"Settings validation failed with the following issues:\n{report}")
 
 
+def _serialize_settings(root):
+  # Evaluate the settings_property's and expand ~ in filenames in a single
+  # copy of the settings
+
+  # I do not os.path.expandvars(val) here, because the Just-docker-compose
+  # takes care of that for me, so I can still use the envvar names in the
+  # containers
+  unchanged = getattr(_unchanged, 'active', False)
+  _unchanged.active = True
+  try:
+    return _serialize_value(root, None, root, tuple(filename_suffixes))
+  finally:
+    _unchanged.active = unchanged
+
+
+def _serialize_value(root, key, value, suffixes):
+  if isfunction(value) and hasattr(value, 'settings_property'):
+    value = value(root)
+
+  if isinstance(value, PathList):
+    # Only the prefix table needs expanding
+    if isinstance(key, str) and key.endswith(suffixes):
+      return value.map_prefixes(os.path.expanduser)
+    return value
+
+  if isinstance(value, Mapping):
+    if isinstance(value, Settings):
+      # Including OverlaySettings
+      result = Settings()
+      items = dict.items(value)
+    elif isinstance(value, dict):
+      result = type(value)()
+      items = dict.items(value)
+    else:
+      result = {}
+      items = value.items()
+    for k, v in items:
+      dict.__setitem__(result, k, _serialize_value(root, k, v, suffixes))
+    return result
+
+  if isinstance(value, list):
+    return [_serialize_value(root, key, v, suffixes) for v in value]
+
+  if isinstance(value, str) and isinstance(key, str) and \
+     key.endswith(suffixes):
+    return os.path.expanduser(value)
+
+  return value
+
+
+def _mutable_values(root):
+  # The mutable values (e.g. lists) in the settings ``root``, each with a copy
+  # of its contents. They can be changed in place without changing the
+  # settings version, so a cached serialization compares them instead
+  values = []
+  nodes = [root]
+  while nodes:
+    node = nodes.pop()
+    for value in dict.values(node):
+      if isinstance(value, Settings):
+        nodes.append(value)
+      elif isinstance(value, Settings._mutable_types):
+        values.append((value, copy.deepcopy(value)))
+  return values
+
+
+def _copy_serialized(value):
+  # Copy a serializableSettings result, sharing only the immutable values
+  if isinstance(value, dict):
+    result = type(value)()
+    for k, v in dict.items(value):
+      dict.__setitem__(result, k, _copy_serialized(v))
+    return result
+  if isinstance(value, list):
+    return [_copy_serialized(v) for v in value]
+  if isinstance(value, (_scalar_types, PathList)):
+    return value
+  return copy.deepcopy(value)
+
+
 class TerraJSONEncoder(JSONEncoder):
   '''
   Json serializer for :class:`LazySettings`.
@@ -1144,6 +2658,8 @@ class TerraJSONEncoder(JSONEncoder):
       if obj._wrapped is None:
         raise ImproperlyConfigured('Settings not initialized')
       return TerraJSONEncoder.serializableSettings(obj._wrapped)
+    if isinstance(obj, PathList):
+      return obj.to_json()
     # elif isinstance(obj, datetime):
     #   return str(obj)
     return JSONEncoder.default(self, obj)  # pragma: no cover
@@ -1157,6 +2673,11 @@ class TerraJSONEncoder(JSONEncoder):
     prevents json serialization. This function will evaluate all
     :func:`settings_property`'s for you.
 
+    The result for a :class:`Settings` object is cached until any settings
+    change, so serializing unchanged settings repeatedly (e.g. for every task
+    submitted) only evaluates the settings once. Every call returns its own
+    copy of the cached result, so it can be changed freely.
+
     Arguments
     ---------
     obj: :class:`Settings` or :class:`LazySettings`
@@ -1166,23 +2687,25 @@ class TerraJSONEncoder(JSONEncoder):
     if isinstance(obj, LazySettings):
       obj = obj._wrapped
 
-    # I do not os.path.expandvars(val) here, because the Just-docker-compose
-    # takes care of that for me, so I can still use the envvar names in the
-    # containers
+    if isinstance(obj, FrozenSettings):
+      # Already evaluated, and can't be patched
+      return obj
 
-    obj = nested_patch(
-        obj,
-        lambda k, v: isfunction(v) and hasattr(v, 'settings_property'),
-        lambda k, v: v(obj))
+    if not isinstance(obj, Settings):
+      return _serialize_settings(obj)
 
-    obj = nested_patch(
-        obj,
-        lambda k, v: any(v is not None and isinstance(k, str)
-                         and k.endswith(pattern)
-                         for pattern in filename_suffixes),
-        lambda k, v: os.path.expanduser(v))
+    # Read the version and the mutable values before serializing, so that
+    # changes made while serializing result in a stale cache
+    version = obj._tree_version()
+    cached = obj.__dict__.get('_serialized')
+    if cached is not None and cached[0] == version and \
+       all(value == original for value, original in cached[1]):
+      return _copy_serialized(cached[2])
 
-    return obj
+    mutable = _mutable_values(obj)
+    result = _serialize_settings(obj)
+    object.__setattr__(obj, '_serialized', (version, mutable, result))
+    return _copy_serialized(result)
 
   @staticmethod
   def dumps(obj, **kwargs):
@@ -1197,14 +2720,117 @@ class TerraJSONEncoder(JSONEncoder):
     return json.dumps(obj, cls=TerraJSONEncoder, **kwargs)
 
 
+_json_comments_re = re.compile(
+    r'("[^"\\]*(?:\\.[^"\\]*)*")'  # Strings are kept as is
+    r'|//[^\n]*'  # Single line comment
+    r'|/\*.*?\*/'  # Multi-line comment
+    r'|,(?=(?:\s|//[^\n]*|/\*.*?\*/)*[\]}])',  # Trailing comma
+    re.DOTALL)
+# Quick check if there might be anything to strip at all. May give false
+# positives from inside strings, e.g. "http://"
+_json_maybe_comments_re = re.compile(r'//|/\*|,\s*[\]}]')
+
+
+def strip_json_comments(json_string):
+  '''
+  Remove JS-style comments (``//`` and ``/* */``) and trailing commas from a
+  JSON string, in a single pass. Same as :func:`jstyleson.dispose`, but runs
+  as a regular expression instead of in python.
+  '''
+  if not _json_maybe_comments_re.search(json_string):
+    return json_string
+  return _json_comments_re.sub(lambda match: match.group(1) or '',
+                               json_string)
+
+
+_json_big_int_re = re.compile(r'\d{20}')
+# orjson turns integers that don't fit in 64 bits into floats, losing
+# precision. Any run of 20 digits could be one (or just part of a string, or
+# of a float), so the standard library parses those documents instead
+
+
+def _parse_json(json_string):
+  if orjson is not None and not _json_big_int_re.search(json_string):
+    try:
+      return orjson.loads(json_string)
+    except orjson.JSONDecodeError:
+      # Let the standard library handle the corner cases orjson is strict
+      # about (e.g. NaN), or report the error
+      pass
+  return _stdlib_json_loads(json_string)
+
+
+json_parser = _parse_json
+'''callable: The function :func:`json_load` uses to parse a JSON string, after
+comments have been stripped. Uses :mod:`orjson` if installed, else the
+standard library :mod:`json`. May be replaced with any function that takes a
+:class:`str` and returns the parsed object.'''
+
+_json_cache = {}
+# Pickled parsed results of json_load, keyed by (path, mtime, size)
+
+
+def _json_cache_get(key, cache_dir):
+  data = _json_cache.get(key)
+  if data is None and cache_dir:
+    try:
+      with open(_json_cache_file(key, cache_dir), 'rb') as fid:
+        data = fid.read()
+    except OSError:
+      return None
+    _json_cache[key] = data
+  return data
+
+
+def _json_cache_set(key, cache_dir, obj):
+  data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+  _json_cache[key] = data
+  try:
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = _json_cache_file(key, cache_dir)
+    # Write and rename, so other processes never see a partial file
+    with open(f'{cache_file}.{os.getpid()}', 'wb') as fid:
+      fid.write(data)
+    os.replace(f'{cache_file}.{os.getpid()}', cache_file)
+  except OSError:
+    pass
+
+
+def _json_cache_file(key, cache_dir):
+  name = hashlib.sha1(repr(key).encode()).hexdigest()
+  return os.path.join(cache_dir, f'{name}.pickle')
+
+
 def json_load(filename):
-  # Helper function to load from json
+  '''
+  Load a JSON file, which may contain JS-style comments and trailing commas.
+
+  When the environment variable :envvar:`TERRA_JSON_CACHE_DIR` is set, the
+  parsed result is cached (in memory and in that directory) using the file's
+  path, modification time and size, so loading an unchanged file again skips
+  parsing altogether, even in another process.
+  '''
   try:
+    cache_dir = os.environ.get('TERRA_JSON_CACHE_DIR')
+    key = None
+    if cache_dir:
+      file_stat = os.stat(filename)
+      if stat.S_ISREG(file_stat.st_mode):
+        key = (os.path.realpath(filename), file_stat.st_mtime_ns,
+               file_stat.st_size)
+        data = _json_cache_get(key, cache_dir)
+        if data is not None:
+          return pickle.loads(data)
+
     with open(filename, 'r') as fid:
       json_string = fid.read()
     if not json_string:  # handle /dev/null
       json_string = '{}'
-    return json.loads(json_string)
+    obj = json_parser(strip_json_comments(json_string))
+
+    if key is not None:
+      _json_cache_set(key, cache_dir, obj)
+    return obj
   except JSONDecodeError as e:
     logger.critical(
         f'Error parsing the JSON config file {filename}: ' + str(e))
@@ -1214,5 +2840,60 @@ def json_load(filename):
     raise SystemExit(ranButFailedExitCode)
 
 
+_snapshot_magic = b'TERRA_SETTINGS_SNAPSHOT'
+_snapshot_version = 1
+
+
+def snapshot_dump(obj, filename):
+  '''
+  Write a binary settings snapshot. The snapshot is a header (including the
+  format version) followed by a pickle (protocol 5) of ``obj``, so it is
+  loaded with one read and no parsing, unlike a json file.
+  :meth:`LazySettings._setup` loads a snapshot instead of a json file when
+  :envvar:`TERRA_SETTINGS_FILE` ends with :data:`snapshot_extension`.
+
+  Snapshots are meant for handing settings to service runners (see
+  :envvar:`TERRA_SETTINGS_SNAPSHOT`), and like any pickle, should only be
+  loaded from a trusted source.
+
+  Arguments
+  ---------
+  obj : :class:`dict`
+      Serialized settings, e.g. from
+      :meth:`TerraJSONEncoder.serializableSettings`
+  filename : :class:`str`
+      The snapshot file name
+  '''
+  with open(filename, 'wb') as fid:
+    fid.write(_snapshot_magic + bytes([_snapshot_version]))
+    pickle.dump(obj, fid, protocol=5)
+
+
+def snapshot_load(filename):
+  '''
+  Load a binary settings snapshot written by :func:`snapshot_dump`
+
+  Raises
+  ------
+  ImproperlyConfigured
+      If the file is not a snapshot, or is a different version
+  '''
+  try:
+    with open(filename, 'rb') as fid:
+      data = memoryview(fid.read())
+  except FileNotFoundError as e:
+    logger.critical('Cannot find settings snapshot file: ' + str(e))
+    raise SystemExit(ranButFailedExitCode)
+
+  header = len(_snapshot_magic)
+  if len(data) <= header or data[:header] != _snapshot_magic:
+    raise ImproperlyConfigured(f'{filename} is not a settings snapshot')
+  if data[header:header + 1] != bytes([_snapshot_version]):
+    raise ImproperlyConfigured(
+        f'Settings snapshot {filename} is version {data[header]}, expected '
+        f'version {_snapshot_version}')
+  return pickle.loads(data[header + 1:])
+
+
 import terra.logger  # noqa
 logger = terra.logger.getLogger(__name__)
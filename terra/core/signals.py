@@ -38,8 +38,15 @@ See https://docs.djangoproject.com/en/2.2/topics/signals/ for more info
 # POSSIBILITY OF SUCH DAMAGE.
 
 import os
+import time
+import asyncio
+import inspect
+import functools
 import threading
+import contextvars
 import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 
 # Avoid importing anything else in terra here, it can cause some nasty
 # interdependencies with logger. Import after post_settings_configured at the
@@ -53,8 +60,161 @@ def _make_id(target):
 
 
 NONE_ID = _make_id(None)
-# A marker for caching
-NO_RECEIVERS = object()
+
+_disabled = os.environ.get('TERRA_UNITTEST', None) == "1"
+# Signals are not sent during unit testing. TERRA_UNITTEST is only read once,
+# on import, so that sending a signal costs as little as possible
+
+
+_timing = os.environ.get('TERRA_SIGNAL_TIMING', None) == "1"
+# Time every receiver call. Also only read once, on import
+
+_timings = {}
+# (signal name, receiver name): [count, total, max], see receiver_timings
+_timings_lock = threading.Lock()
+
+
+def _receiver_name(receiver):
+  if isinstance(receiver, functools.partial):
+    receiver = receiver.func
+  name = getattr(receiver, '__qualname__', None) or \
+      type(receiver).__qualname__
+  module = getattr(receiver, '__module__', None)
+  return f'{module}.{name}' if module else name
+
+
+def _record_timing(signal, receiver, elapsed):
+  key = (signal.name, _receiver_name(receiver))
+  with _timings_lock:
+    timing = _timings.get(key)
+    if timing is None:
+      _timings[key] = [1, elapsed, elapsed]
+    else:
+      timing[0] += 1
+      timing[1] += elapsed
+      timing[2] = max(timing[2], elapsed)
+
+
+def receiver_timings():
+  '''
+  The time spent in each signal receiver, when :envvar:`TERRA_SIGNAL_TIMING`
+  is ``1``.
+
+  Returns
+  -------
+  dict
+      Maps (signal name, receiver name) to a (count, total, max) tuple, the
+      number of calls and the total and longest call in seconds.
+  '''
+  with _timings_lock:
+    return {key: tuple(timing) for key, timing in _timings.items()}
+
+
+_background = {}
+# The thread pool and event loop that run background receivers, created on
+# first use
+_background_lock = threading.Lock()
+_background_workers = 4
+
+
+def _background_pool():
+  with _background_lock:
+    if 'pool' not in _background:
+      _background['pool'] = ThreadPoolExecutor(
+          _background_workers, thread_name_prefix='terra_signal')
+    return _background['pool']
+
+
+def _background_loop():
+  with _background_lock:
+    if 'loop' not in _background:
+      loop = asyncio.new_event_loop()
+      threading.Thread(target=loop.run_forever, daemon=True,
+                       name='terra_signal_loop').start()
+      _background['loop'] = loop
+    return _background['loop']
+
+
+def _forget_background():
+  # The threads do not survive a fork
+  _background.clear()
+
+
+os.register_at_fork(after_in_child=_forget_background)
+
+
+def _submit(awaitable):
+  '''
+  Await ``awaitable`` on the background event loop, in a copy of the current
+  context, i.e. with the same terra.settings
+
+  Returns
+  -------
+  concurrent.futures.Future
+      The result of ``awaitable``
+  '''
+  future = Future()
+
+  def start():
+    # Runs in the copied context, which the task copies again
+    task = asyncio.get_running_loop().create_task(_awaited(awaitable))
+    task.add_done_callback(functools.partial(_copy_result, future))
+
+  _background_loop().call_soon_threadsafe(
+      start, context=contextvars.copy_context())
+  return future
+
+
+def _copy_result(future, task):
+  if task.cancelled():
+    future.cancel()
+  elif task.exception() is not None:
+    future.set_exception(task.exception())
+  else:
+    future.set_result(task.result())
+
+
+def _wait(awaitable):
+  '''
+  Await ``awaitable`` on the background event loop, blocking until it is done
+
+  Raises
+  ------
+  RuntimeError
+      If called on the background event loop itself (e.g. a signal sent by an
+      ``async def`` receiver), where blocking would wait forever
+  '''
+  try:
+    running = asyncio.get_running_loop()
+  except RuntimeError:
+    running = None
+  if running is not None and running is _background.get('loop'):
+    if inspect.iscoroutine(awaitable):
+      # It will never be awaited
+      awaitable.close()
+    raise RuntimeError('Waiting for an async receiver on the background '
+                       'event loop of the signals would deadlock. From an '
+                       'async def receiver, use send_async, and connect '
+                       'async receivers with ordering_critical=False')
+  return _submit(awaitable).result()
+
+
+async def _awaited(awaitable):
+  return await awaitable
+
+
+@contextmanager
+def disabled():
+  '''
+  Context manager that stops all signals from being sent while in it
+  '''
+  global _disabled
+  old_disabled = _disabled
+  _disabled = True
+  try:
+    yield
+  finally:
+    _disabled = old_disabled
 
 
 class Signal:
@@ -67,13 +227,19 @@ class Signal:
       A list of the arguments this signal can pass along in a :func:`send`
       call.
   use_caching : bool
-      If use_caching is ``True``, then for each distinct sender we cache the
-      receivers that sender has in :data:`sender_receivers_cache`. The cache is
-      cleaned when :func:`connect` or :func:`disconnect` is called and
-      populated on :func:`send`.
+      Kept for compatibility, it no longer does anything. Every signal keeps
+      an immutable tuple of receivers for each sender that has receivers
+      connected to it, and one for all other senders. These are only rebuilt
+      after :func:`connect`, :func:`disconnect` or a weak receiver being
+      garbage collected, so :func:`send` does not have to look through the
+      receivers or take a lock.
+  name : str
+      Optional name of the signal, used by :func:`receiver_timings`
   """
 
-  def __init__(self, providing_args=None, use_caching=False):
+  def __init__(self, providing_args=None, use_caching=False, name=None):
+    self.name = name
+    '''str: Name of the signal, used in :func:`receiver_timings`'''
     self.receivers = []
     '''dict: The internal map of all signals that are connected to receivers'''
     if providing_args is None:
@@ -82,18 +248,15 @@ class Signal:
     self.lock = threading.Lock()
     self.use_caching = use_caching
     '''bool: Set if caching was turned on'''
-    # For convenience we create empty caches even if they are not used.
-    # A note about caching: if use_caching is defined, then for each
-    # distinct sender we cache the receivers that sender has in
-    # 'sender_receivers_cache'. The cache is cleaned when .connect() or
-    # .disconnect() is called and populated on send().
-    self.sender_receivers_cache = weakref.WeakKeyDictionary() if use_caching \
-        else {}
-    '''weakref.WeakKeyDictionary: Stores receivers for a sender if
-    :data:`use_caching` is on'''
+    # The dispatch table, (receivers for any sender, {sender id: receivers}),
+    # or None when it needs to be rebuilt
+    self._dispatch = None
     self._dead_receivers = False
+    # Lookup keys of the receivers that are not ordering critical
+    self._background_keys = set()
 
-  def connect(self, receiver, sender=None, weak=True, dispatch_uid=None):
+  def connect(self, receiver, sender=None, weak=True, dispatch_uid=None,
+              ordering_critical=True):
     """
     Connect receiver to sender for signal.
 
@@ -119,6 +282,12 @@ class Signal:
         An identifier used to uniquely identify a particular instance of
         a receiver. This will usually be a string, though it may be
         anything hashable.
+    ordering_critical : bool
+        Whether the receiver has to be done before :func:`send_async` returns,
+        in the order it was connected. Receivers that do slow work nothing
+        else depends on, such as logging the version, should use ``False``,
+        so they are run in the background by :func:`send_async`. Has no
+        effect on :func:`send` and :func:`send_robust`.
     """
 
     if dispatch_uid:
@@ -140,7 +309,11 @@ class Signal:
       self._clear_dead_receivers()
       if not any(r_key == lookup_key for r_key, _ in self.receivers):
         self.receivers.append((lookup_key, receiver))
-      self.sender_receivers_cache.clear()
+        if ordering_critical:
+          self._background_keys.discard(lookup_key)
+        else:
+          self._background_keys.add(lookup_key)
+      self._dispatch = None
 
   def disconnect(self, receiver=None, sender=None, dispatch_uid=None):
     """
@@ -172,8 +345,9 @@ class Signal:
         if r_key == lookup_key:
           disconnected = True
           del self.receivers[index]
+          self._background_keys.discard(lookup_key)
           break
-      self.sender_receivers_cache.clear()
+      self._dispatch = None
     return disconnected
 
   def has_listeners(self, sender=None):
@@ -203,15 +377,14 @@ class Signal:
     ---------------------
     TERRA_UNITTEST
         Setting this to ``1`` will disable send. This is used during
-        unittesting to prevent unexpected behavior
+        unittesting to prevent unexpected behavior. It is only read when
+        :mod:`terra.core.signals` is imported
     """
-    if not self.receivers or \
-       self.sender_receivers_cache.get(sender) is NO_RECEIVERS or \
-       os.environ.get('TERRA_UNITTEST') == "1":
+    if _disabled or not self.receivers:
       return []
 
     return [
-        (receiver, receiver(signal=self, sender=sender, **named))
+        (receiver, self._call(receiver, sender, named))
         for receiver in self._live_receivers(sender)
     ]
 
@@ -241,11 +414,10 @@ class Signal:
     ---------------------
     TERRA_UNITTEST
         Setting this to ``1`` will disable send. This is used during
-        unittesting to prevent unexpected behavior
+        unittesting to prevent unexpected behavior. It is only read when
+        :mod:`terra.core.signals` is imported
     """
-    if not self.receivers or \
-       self.sender_receivers_cache.get(sender) is NO_RECEIVERS or \
-       os.environ.get('TERRA_UNITTEST') == "1":
+    if _disabled or not self.receivers:
       return []
 
     # Call each receiver with whatever arguments it can accept.
@@ -253,13 +425,103 @@ class Signal:
     responses = []
     for receiver in self._live_receivers(sender):
       try:
-        response = receiver(signal=self, sender=sender, **named)
+        response = self._call(receiver, sender, named)
       except Exception as err:
         responses.append((receiver, err))
       else:
         responses.append((receiver, response))
     return responses
 
+  def send_async(self, sender, **named):
+    """
+    Send signal from sender to all connected receivers, without waiting for
+    the receivers that are not ordering critical.
+
+    Ordering critical receivers (see :func:`connect`) are called first, in
+    order, on the sending thread, and any error they raise propagates back
+    through send_async, just like :func:`send`. The rest are run on a small
+    thread pool, in the background. ``async def`` receivers are awaited on a
+    background event loop. Either way, they run in a copy of the sender's
+    context, and an error they raise is logged.
+
+    Parameters
+    ----------
+    sender : object
+        The sender of the signal. Either a specific object or None.
+    **named :
+        Named arguments which will be passed to receivers.
+
+    Returns
+    -------
+    list
+        Return a list of tuple pairs [(receiver, future), ... ], where each
+        :class:`concurrent.futures.Future` holds the receiver's response, or
+        the error it raised.
+
+    Environment Variables
+    ---------------------
+    TERRA_UNITTEST
+        Setting this to ``1`` will disable send. This is used during
+        unittesting to prevent unexpected behavior. It is only read when
+        :mod:`terra.core.signals` is imported
+    """
+    if _disabled or not self.receivers:
+      return []
+
+    entries = self._live_entries(sender)
+    responses = [None] * len(entries)
+    # Start the background receivers first, so they are not held up by the
+    # ordering critical ones. Each runs in a copy of the sender's context,
+    # i.e. with the same terra.settings
+    for index, (receiver, ordering_critical) in enumerate(entries):
+      if not ordering_critical:
+        if inspect.iscoroutinefunction(receiver):
+          future = _submit(self._call_async(receiver, sender, named))
+        else:
+          future = _background_pool().submit(
+              contextvars.copy_context().run, self._call, receiver, sender,
+              named)
+        # Nobody may be waiting on the future, so errors are logged too
+        future.add_done_callback(
+            functools.partial(self._log_background_error, receiver))
+        responses[index] = (receiver, future)
+
+    for index, (receiver, ordering_critical) in enumerate(entries):
+      if ordering_critical:
+        future = Future()
+        future.set_result(self._call(receiver, sender, named))
+        responses[index] = (receiver, future)
+
+    return responses
+
+  @contextmanager
+  def _timed(self, receiver):
+    if _timing:
+      start = time.perf_counter()
+    try:
+      yield
+    finally:
+      if _timing:
+        _record_timing(self, receiver, time.perf_counter() - start)
+
+  def _call(self, receiver, sender, named):
+    with self._timed(receiver):
+      response = receiver(signal=self, sender=sender, **named)
+      if inspect.isawaitable(response):
+        response = _wait(response)
+      return response
+
+  async def _call_async(self, receiver, sender, named):
+    # _call, for an async def receiver on the background event loop
+    with self._timed(receiver):
+      return await receiver(signal=self, sender=sender, **named)
+
+  def _log_background_error(self, receiver, future):
+    if not future.cancelled() and future.exception() is not None:
+      logger.error(f'Background receiver {_receiver_name(receiver)} of '
+                   f'signal {self.name} failed',
+                   exc_info=future.exception())
+
   def _clear_dead_receivers(self):
     # Note: caller is assumed to hold self.lock.
     if self._dead_receivers:
@@ -269,46 +531,56 @@ class Signal:
           if not (isinstance(r[1], weakref.ReferenceType) and r[1]() is None)
       ]
 
-  def _live_receivers(self, sender):
+  def _build_dispatch(self):
+    with self.lock:
+      self._clear_dead_receivers()
+      entries = [(lookup_key[1],
+                  (receiver, lookup_key not in self._background_keys))
+                 for lookup_key, receiver in self.receivers]
+      any_sender = tuple(entry for senderkey, entry in entries
+                         if senderkey == NONE_ID)
+      by_sender = {}
+      for r_senderkey, _ in entries:
+        if r_senderkey != NONE_ID and r_senderkey not in by_sender:
+          by_sender[r_senderkey] = tuple(
+              entry for senderkey, entry in entries
+              if senderkey == NONE_ID or senderkey == r_senderkey)
+      self._dispatch = (any_sender, by_sender)
+      return self._dispatch
+
+  def _live_entries(self, sender):
     """
-    Filter sequence of receivers to get resolved, live receivers.
+    Filter sequence of receivers to get resolved, live receivers, as
+    (receiver, ordering_critical) pairs.
 
     This checks for weak references and resolves them, then returning only
     live receivers.
     """
-    receivers = None
-    if self.use_caching and not self._dead_receivers:
-      receivers = self.sender_receivers_cache.get(sender)
-      # We could end up here with NO_RECEIVERS even if we do check this case in
-      # .send() prior to calling _live_receivers() due to concurrent .send()
-      # call.
-      if receivers is NO_RECEIVERS:
-        return []
-    if receivers is None:
-      with self.lock:
-        self._clear_dead_receivers()
-        senderkey = _make_id(sender)
-        receivers = []
-        for (receiverkey, r_senderkey), receiver in self.receivers:
-          if r_senderkey == NONE_ID or r_senderkey == senderkey:
-            receivers.append(receiver)
-        if self.use_caching:
-          if not receivers:
-            self.sender_receivers_cache[sender] = \
-                NO_RECEIVERS
-          else:
-            # Note, we must cache the weakref versions.
-            self.sender_receivers_cache[sender] = receivers
-    non_weak_receivers = []
-    for receiver in receivers:
+    dispatch = self._dispatch
+    if dispatch is None:
+      dispatch = self._build_dispatch()
+    entries, by_sender = dispatch
+    if by_sender:
+      entries = by_sender.get(_make_id(sender), entries)
+
+    live_entries = []
+    for receiver, ordering_critical in entries:
       if isinstance(receiver, weakref.ReferenceType):
         # Dereference the weak reference.
         receiver = receiver()
-        if receiver is not None:
-          non_weak_receivers.append(receiver)
-      else:
-        non_weak_receivers.append(receiver)
-    return non_weak_receivers
+        if receiver is None:
+          continue
+      live_entries.append((receiver, ordering_critical))
+    return live_entries
+
+  def _live_receivers(self, sender):
+    """
+    Filter sequence of receivers to get resolved, live receivers.
+
+    This checks for weak references and resolves them, then returning only
+    live receivers.
+    """
+    return [receiver for receiver, _ in self._live_entries(sender)]
 
   def _remove_receiver(self, receiver=None):
     # Mark that the self.receivers list has dead weakrefs. If so, we will
@@ -318,6 +590,7 @@ class Signal:
     # collection, and so the call can happen while we are already holding
     # self.lock.
     self._dead_receivers = True
+    self._dispatch = None
 
 
 def receiver(signal, **kwargs):
@@ -357,11 +630,12 @@ def receiver(signal, **kwargs):
   return _decorator
 
 
-__all__ = ['Signal', 'receiver', 'post_settings_configured',
-           'post_settings_context', 'logger_configure', 'logger_reconfigure']
+__all__ = ['Signal', 'receiver', 'receiver_timings',
+           'post_settings_configured', 'post_settings_context',
+           'logger_configure', 'logger_reconfigure']
 
 # a signal for settings done being loaded
-post_settings_configured = Signal()
+post_settings_configured = Signal(name='post_settings_configured')
 '''Signal:
 Sent after settings has been configured. This will either happen after
 :func:`terra.core.settings.LazySettings._setup` is trigger by accessing any
@@ -369,18 +643,18 @@ element in the settings (which is done automatically), or in rare cases after a
 manual call to :func:`terra.core.settings.LazySettings.configure`.
 '''
 
-post_settings_context = Signal()
+post_settings_context = Signal(name='post_settings_context')
 '''Signal:
 Sent after scope __exit__ from a settings context (i.e., with statement).
 '''
 
-logger_configure = Signal()
+logger_configure = Signal(name='logger_configure')
 '''Signal:
 Sent to the executor after the logger has been configured. This will happen
 after the post_settings_configured signal.
 '''
 
-logger_reconfigure = Signal()
+logger_reconfigure = Signal(name='logger_reconfigure')
 '''Signal:
 Sent to the executor after the logger has been reconfigured. This will happen
 after the logger_configure signal.
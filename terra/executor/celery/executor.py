@@ -24,11 +24,12 @@ from concurrent.futures._base import (RUNNING, FINISHED, CANCELLED,
 from threading import Lock, Thread
 import time
 from logging import NullHandler, StreamHandler
-from logging.handlers import SocketHandler
 
 from terra.executor.base import BaseFuture, BaseExecutor
 from terra import settings
-from terra.logger import getLogger
+from terra.logger import (
+  getLogger, BatchingSocketHandler, BackgroundQueueHandler
+)
 logger = getLogger(__name__)
 
 
@@ -271,20 +272,31 @@ class CeleryExecutor(BaseExecutor):
     if settings.terra.zone == 'task':
       if pre_run_task:
         if sender.main_log_handler:
-          sender.main_log_handler.close()
           try:
             sender.root_logger.removeHandler(sender.main_log_handler)
           except ValueError:
             pass
-        sender.main_log_handler = SocketHandler(
-            settings.logging.server.hostname,
-            settings.logging.server.listen_address[1])
+        # The handler (and its threads) is kept for the whole worker process,
+        # unless a task logs to a different controller
+        handler = getattr(sender, '_task_log_handler', None)
+        address = (settings.logging.server.hostname,
+                   settings.logging.server.listen_address[1])
+        if handler is not None and \
+           (handler.target.host, handler.target.port) != address:
+          handler.close()
+          handler = None
+        if handler is None:
+          handler = BackgroundQueueHandler.from_settings(
+              BatchingSocketHandler.from_settings(*address))
+          sender._task_log_handler = handler
+        sender.main_log_handler = handler
         sender.root_logger.addHandler(sender.main_log_handler)
       if post_settings_context:
         # when the celery task is done, its logger is automatically
-        # reconfigured; use that opportunity to close the stream
+        # reconfigured; use that opportunity to send what the task logged,
+        # and stop logging to its controller until the next task
         if sender.main_log_handler:
-          sender.main_log_handler.close()
+          sender.main_log_handler.flush()
           try:
             sender.root_logger.removeHandler(sender.main_log_handler)
           except ValueError:
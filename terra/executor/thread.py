@@ -15,6 +15,15 @@ def auto_clear_exception_frames(future):
     traceback.clear_frames(exc.__traceback__)
 
 
+def _run_isolated(wrapped, fn, *args, **kwargs):
+  if wrapped is None:
+    # Settings are not configured yet, there is nothing to isolate
+    return fn(*args, **kwargs)
+  with terra.settings.isolate(
+      terra.core.settings.OverlaySettings.overlay(wrapped)):
+    return fn(*args, **kwargs)
+
+
 class ThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor,
                          terra.executor.base.BaseExecutor):
   '''
@@ -25,30 +34,24 @@ class ThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor,
   influence each other, which is not typical behavior, given that all other
   executors have process isolation and do not allow this.
 
-  :class:`ThreadPoolExecutor` will downcast :obj:`terra.core.settings` to a
-  thread-safe :class:`terra.core.settings.LazySettingsThreaded` where each
-  Executor thread has it's own thread local storage version of the settings
-  structure.
+  :class:`ThreadPoolExecutor` runs each task in an
+  :meth:`isolated<terra.core.settings.LazySettings.isolate>` settings context,
+  where :obj:`terra.settings` is the task's own copy of the settings of the
+  code that submitted it. This version is a copy on write
+  :class:`terra.core.settings.OverlaySettings`, so only the parts of the
+  settings that a task uses are copied, no matter how large the settings are.
 
-  This behavior is limited to threads started by :class:`ThreadPoolExecutor`
-  only. All other threads will have normal thread behavior with the runner
-  threads, and use a single version of the settings. The only side effect is if
-  a task starts its own thread, it will be treated as one of the runner
-  threads, not a task thread. The currently known downside to this is log
+  This behavior is limited to tasks run by :class:`ThreadPoolExecutor` only.
+  If a task starts its own thread, that thread will use the settings of the
+  process, not the task's. The currently known downside to this is log
   messages will be reported as coming from the runner rather than task zone.
   However, any attempts to edit settings from this rogue thread could
   potentially have other unintended consequences.
   '''
 
-  def __init__(self, *args, **kwargs):
-    # Make terra.setting "thread safe"
-    if not isinstance(terra.settings,
-                      terra.core.settings.LazySettingsThreaded):
-      terra.core.settings.LazySettingsThreaded.downcast(terra.settings)
-    super().__init__(*args, **kwargs)
-
   def submit(self, fn, *args, **kwargs):
-    future = super().submit(fn, *args, **kwargs)
+    future = super().submit(_run_isolated, terra.settings._wrapped, fn,
+                            *args, **kwargs)
     future.add_done_callback(auto_clear_exception_frames)
     return future
   submit.__doc__ = ""
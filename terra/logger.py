@@ -63,15 +63,23 @@ import sys
 import tempfile
 import platform
 import os
+import re
 import traceback
 import io
 import warnings
 from datetime import datetime, timezone
 import socket
 import socketserver
+import json
+import queue
+import copy
 import struct
-import select
+import selectors
 import pickle
+import zlib
+import time
+import threading
+import weakref
 import atexit
 from collections import deque
 
@@ -146,42 +154,437 @@ class HandlerLoggingContext(object):
     with logging_lock:
       self.old_handlers = self.logger.handlers
       self.logger.handlers = self.handlers
+    reset_caller_lookup()
 
   def __exit__(self, et, ev, tb):
     with logging_lock:
       self.logger.handlers = self.old_handlers
+    reset_caller_lookup()
     # implicit return of None => don't swallow exceptions
 
 
+_batch_frame = 0x80000000
+# Set in the 4-byte length of a frame that holds a batch of records, see
+# BatchingSocketHandler
+_json_frame = 0x40000000
+# Set in the 4-byte length of a frame that holds a JSON record, instead of a
+# pickled one, see JsonSocketHandler
+_frame_size = 0x3FFFFFFF
+# The bits of the 4-byte length that are the frame size
+_batch_compressed = 0x01
+# Set in the flags byte of a batch that is zlib compressed
+
+_record_schema = {
+    'name': str, 'msg': str, 'levelname': str, 'levelno': int,
+    'pathname': str, 'filename': str, 'module': str, 'lineno': int,
+    'funcName': str, 'created': (int, float), 'msecs': (int, float),
+    'relativeCreated': (int, float), 'thread': int, 'threadName': str,
+    'process': int, 'processName': str, 'exc_text': str, 'stack_info': str}
+# The types of the standard LogRecord attributes in a JSON record. Any of
+# them may also be null
+_record_methods = frozenset(
+    name for name in dir(logging.LogRecord)
+    if callable(getattr(logging.LogRecord, name)))
+# A JSON record can't replace these
+
+
+class JsonSocketHandler(logging.handlers.SocketHandler):
+  '''
+  A :class:`logging.handlers.SocketHandler` that sends each record as
+  compact JSON of its attributes, instead of a pickle, so that the receiving
+  end (see :class:`LogRecordStreamHandler`) never has to unpickle anything
+  from the socket.
+
+  Like :meth:`logging.handlers.SocketHandler.makePickle`, the message is
+  formatted with its arguments and any exception is formatted into
+  ``exc_text`` before sending. Attributes that are not JSON types are sent as
+  their :class:`str`.
+  '''
+
+  def makePickle(self, record):
+    if record.exc_info:
+      # Sets record.exc_text
+      self.format(record)
+    obj = dict(record.__dict__)
+    obj['msg'] = record.getMessage()
+    obj['args'] = None
+    obj['exc_info'] = None
+    obj.pop('message', None)
+    data = json.dumps(obj, default=str, separators=(',', ':')).encode()
+    return struct.pack('>L', _json_frame | len(data)) + data
+
+
+class BatchingSocketHandler(JsonSocketHandler):
+  '''
+  A :class:`JsonSocketHandler` that sends records in batches, instead of one
+  frame (and one ``send``) per record.
+
+  Records are encoded when they are emitted, and collected for up to
+  ``batch_delay`` seconds, or until there are ``batch_size`` of them, then
+  sent together as one frame, zlib compressed if ``compress`` is ``True``.
+  Anything left is sent on :meth:`flush` and :meth:`close`, which
+  :func:`logging.shutdown` calls at exit.
+
+  A batch frame is a 4-byte length with the high bit set, followed by a flags
+  byte and the (possibly compressed) records, each framed just like a
+  :class:`JsonSocketHandler` frame.
+  :class:`LogRecordStreamHandler` understands both.
+  '''
+
+  def __init__(self, host, port, batch_size=100, batch_delay=0.05,
+               compress=True):
+    super().__init__(host, port)
+    self.batch_size = batch_size
+    self.batch_delay = batch_delay
+    self.compress = compress
+    self.pending = []
+    self._pending_ready = threading.Condition(threading.Lock())
+    # Held while sending a batch, so batches are never sent out of order
+    self._send_lock = threading.Lock()
+    self._flusher = None
+    self._flusher_pid = None
+    self._closing = False
+    _fork_handlers.add(self)
+
+  def _after_fork_in_child(self):
+    # The locks may have been held by another thread of the parent, whose
+    # pending records and socket are the parent's to send
+    self._pending_ready = threading.Condition(threading.Lock())
+    self._send_lock = threading.Lock()
+    self.pending = []
+    self.sock = None
+
+  @classmethod
+  def from_settings(cls, host, port):
+    '''
+    Create a handler using the :option:`logging.server.batch_size`,
+    :option:`logging.server.batch_delay` and
+    :option:`logging.server.batch_compress` settings
+    '''
+    from terra import settings
+    return cls(host, port,
+               batch_size=settings.logging.server.batch_size,
+               batch_delay=settings.logging.server.batch_delay,
+               compress=settings.logging.server.batch_compress)
+
+  def emit(self, record):
+    try:
+      data = self.makePickle(record)
+    except Exception:
+      self.handleError(record)
+      return
+
+    with self._pending_ready:
+      self.pending.append(data)
+      if self._flusher_pid != os.getpid():
+        # Not started yet, or did not survive a fork
+        self._flusher_pid = os.getpid()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True,
+                                         name='terra_log_batch')
+        self._flusher.start()
+      self._pending_ready.notify()
+
+  def _take_pending(self):
+    # Caller is assumed to hold self._pending_ready. The caller then has to
+    # call _send_pending, which releases self._send_lock
+    pending = self.pending
+    self.pending = []
+    self._send_lock.acquire()
+    return pending
+
+  def _send_pending(self, pending):
+    try:
+      if pending:
+        self.send(self.makeBatch(pending))
+    finally:
+      self._send_lock.release()
+
+  def _flush_loop(self):
+    while True:
+      with self._pending_ready:
+        self._pending_ready.wait_for(
+            lambda: self.pending or self._closing)
+        if self._closing:
+          return
+        # Give more records a chance to join the batch
+        deadline = time.monotonic() + self.batch_delay
+        while len(self.pending) < self.batch_size and not self._closing:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            break
+          self._pending_ready.wait(remaining)
+        pending = self._take_pending()
+      self._send_pending(pending)
+
+  def makeBatch(self, pending):
+    '''
+    Make a batch frame out of a list of pickled records
+    '''
+    flags = 0
+    data = b''.join(pending)
+    if self.compress:
+      flags |= _batch_compressed
+      data = zlib.compress(data, 1)
+    return struct.pack('>LB', _batch_frame | (len(data) + 1), flags) + data
+
+  def flush(self):
+    with self._pending_ready:
+      pending = self._take_pending()
+    self._send_pending(pending)
+
+  def close(self):
+    with self._pending_ready:
+      self._closing = True
+      self._pending_ready.notify()
+    self.flush()
+    super().close()
+
+
+class _BlockingQueueListener(logging.handlers.QueueListener):
+  def enqueue_sentinel(self):
+    # Wait for room, instead of failing on a full queue
+    self.queue.put(self._sentinel)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+  '''
+  A :class:`logging.handlers.QueueHandler` that hands records to ``target``
+  (e.g. a :class:`BatchingSocketHandler`) on a background
+  :class:`logging.handlers.QueueListener` thread, so that a logging call only
+  costs putting the record on a queue, and a slow or reconnecting socket never
+  stalls the thread that logged.
+
+  The queue holds at most ``maxsize`` records. When it is full, logging
+  blocks until there is room if ``block`` is ``True``, else the record is
+  dropped, and the number of dropped records is reported on :meth:`close`.
+  :meth:`flush` waits for the queue to be handled. :meth:`close`, which
+  :func:`logging.shutdown` calls at exit, also closes ``target``.
+
+  The listener thread does not survive a fork, so a forked child starts its
+  own, with an empty queue, the first time it logs.
+  '''
+
+  def __init__(self, target, maxsize=10000, block=True):
+    super().__init__(queue.Queue(maxsize))
+    self.target = target
+    self.block = block
+    self.dropped = 0
+    self.listener = None
+    self._closed = False
+    self._start_listener()
+    _fork_handlers.add(self)
+
+  def _start_listener(self):
+    self.listener = _BlockingQueueListener(
+        self.queue, self.target, respect_handler_level=True)
+    self.listener.start()
+
+  def _after_fork_in_child(self):
+    # Records on the queue are the parent's to send
+    self.queue = queue.Queue(self.queue.maxsize)
+    self.listener = None
+
+  @classmethod
+  def from_settings(cls, target):
+    '''
+    Create a handler using the :option:`logging.queue_size` and
+    :option:`logging.queue_full` settings
+    '''
+    from terra import settings
+    if settings.logging.queue_full not in ('block', 'drop'):
+      raise ImproperlyConfigured(
+          'logging.queue_full must be "block" or "drop", not '
+          f'{settings.logging.queue_full!r}')
+    return cls(target, maxsize=settings.logging.queue_size,
+               block=settings.logging.queue_full == 'block')
+
+  def prepare(self, record):
+    # Resolve what can change, or can't be used, once the record is on another
+    # thread, like SocketHandler.makePickle does. Unlike QueueHandler.prepare,
+    # the message is not formatted, and exc_text is kept separate, so the
+    # controller formats the record like any other
+    record = copy.copy(record)
+    record.msg = record.getMessage()
+    record.args = None
+    if record.exc_info:
+      if not record.exc_text:
+        record.exc_text = (self.formatter or _exception_formatter) \
+            .formatException(record.exc_info)
+      record.exc_info = None
+    return record
+
+  def enqueue(self, record):
+    # Called with self.lock held
+    if self.listener is None and not self._closed:
+      self._start_listener()
+    if self.block:
+      self.queue.put(record)
+    else:
+      try:
+        self.queue.put_nowait(record)
+      except queue.Full:
+        self.dropped += 1
+
+  def flush(self):
+    if self.listener is not None:
+      self.queue.join()
+    self.target.flush()
+
+  def close(self):
+    with self.lock:
+      closed = self._closed
+      self._closed = True
+      listener = self.listener
+      self.listener = None
+    if listener is not None:
+      listener.stop()
+    if not closed:
+      self.target.close()
+      if self.dropped and logging.lastResort is not None:
+        # Logging it normally could end up back on the closed queue
+        logging.lastResort.handle(logging.makeLogRecord({
+            'name': __name__, 'levelno': logging.WARNING,
+            'levelname': 'WARNING',
+            'msg': f'{self.dropped} log record(s) were dropped, because the '
+                   'logging queue was full (see logging.queue_full)'}))
+    super().close()
+
+
+_fork_handlers = weakref.WeakSet()
+# Handlers whose threads and locks have to be reset in a forked child
+
+
+def _after_fork_in_child():
+  for handler in list(_fork_handlers):
+    handler._after_fork_in_child()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+_exception_formatter = logging.Formatter()
+
+
 # from https://docs.python.org/3/howto/logging-cookbook.html
 class LogRecordStreamHandler(socketserver.StreamRequestHandler):
   """Handler for a streaming logging request.
 
   This basically logs the record using whatever logging policy is
   configured locally.
+
+  Records from a :class:`JsonSocketHandler` (or :class:`BatchingSocketHandler`)
+  are decoded with :func:`json.loads`, checked against the types of the
+  standard :class:`logging.LogRecord` attributes, and can't replace any
+  :class:`logging.LogRecord` methods. Pickled records, from a plain
+  :class:`logging.handlers.SocketHandler`, are only accepted if the server's
+  ``allow_pickle`` is true, since unpickling can run arbitrary code.
   """
 
+  @classmethod
+  def for_connection(cls, server, client_address):
+    '''
+    Create a handler for a connection that :class:`LogRecordSocketReceiver`
+    reads from, and hands the frames to :meth:`handleFrame`, instead of the
+    handler reading the connection itself in :meth:`handle`
+    '''
+    handler = cls.__new__(cls)
+    handler.request = None
+    handler.client_address = client_address
+    handler.server = server
+    return handler
+
   def handle(self):
     """
     Handle multiple requests - each expected to be a 4-byte length,
-    followed by the LogRecord in pickle format. Logs the record
-    according to whatever policy is configured locally.
+    followed by the LogRecord in JSON or pickle format, or by a batch of them
+    from a :class:`BatchingSocketHandler`. Logs the record according to
+    whatever policy is configured locally.
     """
     while True:
-      chunk = self.connection.recv(4)
+      chunk = self.receive(4)
       if len(chunk) < 4:
         break
       slen = struct.unpack('>L', chunk)[0]
-      chunk = self.connection.recv(slen)
-      while len(chunk) < slen:
-        chunk = chunk + self.connection.recv(slen - len(chunk))
-      obj = self.unPickle(chunk)
-      record = logging.makeLogRecord(obj)
-      self.handleLogRecord(record)
+      size = slen & _frame_size
+      chunk = self.receive(size)
+      if len(chunk) < size:
+        break
+      self.handleFrame(slen, chunk)
+
+  def receive(self, size):
+    '''
+    Receive ``size`` bytes, or less if the connection is closed
+    '''
+    chunk = bytearray(size)
+    received = 0
+    with memoryview(chunk) as view:
+      while received < size:
+        count = self.connection.recv_into(view[received:])
+        if not count:
+          break
+        received += count
+    del chunk[received:]
+    return chunk
+
+  def handleFrame(self, slen, data):
+    '''
+    Log the record, or batch of records, in the frame ``data`` (any bytes-like
+    object). ``slen`` is the 4-byte length the frame was sent with.
+    '''
+    if slen & _batch_frame:
+      objs = self.unBatch(data)
+    else:
+      objs = (self.decode(slen, data),)
+    for obj in objs:
+      self.handleLogRecord(logging.makeLogRecord(obj))
+
+  def decode(self, slen, data):
+    '''
+    Decode one record, JSON or pickle depending on ``slen``
+    '''
+    if slen & _json_frame:
+      return self.unJson(data)
+    if not getattr(self.server, 'allow_pickle', False):
+      raise ValueError('Refusing a pickled log record, only JSON log records '
+                       'are accepted (see logging.server.allow_pickle)')
+    return self.unPickle(data)
+
+  def unJson(self, data):
+    obj = json.loads(str(data, 'utf-8'))
+    if not isinstance(obj, dict):
+      raise ValueError('A JSON log record must be an object')
+    for key, value in obj.items():
+      if key in _record_methods or key.startswith('__'):
+        raise ValueError(f'A JSON log record can not set {key!r}')
+      types = _record_schema.get(key)
+      if types is not None and value is not None and \
+         not isinstance(value, types):
+        raise ValueError(f'Invalid JSON log record {key!r}: {value!r}')
+    obj['args'] = None
+    obj['exc_info'] = None
+    return obj
 
   def unPickle(self, data):
     return pickle.loads(data)
 
+  def unBatch(self, data):
+    '''
+    Decode each record in a batch frame from a :class:`BatchingSocketHandler`
+    '''
+    flags = data[0]
+    data = data[1:]
+    if flags & _batch_compressed:
+      data = zlib.decompress(data)
+    with memoryview(data) as data:
+      offset = 0
+      while offset < len(data):
+        slen = struct.unpack_from('>L', data, offset)[0]
+        offset += 4
+        size = slen & _frame_size
+        with data[offset:offset + size] as record:
+          yield self.decode(slen, record)
+        offset += size
+
   def handleLogRecord(self, record):
     # if a name is specified, we use the named logger rather than the one
     # implied by the record.
@@ -197,18 +600,98 @@ class LogRecordStreamHandler(socketserver.StreamRequestHandler):
     logger.handle(record)
 
 
-class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
+class _LogConnection:
+  # A connection to LogRecordSocketReceiver. Data is received straight into a
+  # preallocated buffer, and the frames are handed on as memoryviews of it,
+  # so the only copy made is moving a partial frame back to the start. The
+  # buffer is small, so idle connections cost little; it only grows to fit a
+  # larger frame while that frame is being read
+  __slots__ = ('sock', 'handler', 'size', 'buffer', 'end')
+
+  def __init__(self, sock, handler, size):
+    self.sock = sock
+    self.handler = handler
+    self.size = size
+    self.buffer = bytearray(size)
+    self.end = 0
+
+  def receive(self):
+    '''
+    Receive into the free end of the buffer. Returns the number of bytes
+    received, ``0`` once the connection is closed
+    '''
+    with memoryview(self.buffer)[self.end:] as free:
+      count = self.sock.recv_into(free)
+    self.end += count
+    return count
+
+  def process(self, max_frame_size):
+    '''
+    Hand every complete frame in the buffer to the handler
+    '''
+    offset = 0
+    try:
+      with memoryview(self.buffer) as view:
+        while self.end - offset >= 4:
+          slen = struct.unpack_from('>L', view, offset)[0]
+          size = slen & _frame_size
+          if size > max_frame_size:
+            raise ValueError(f'Log record frame of {size} bytes is larger '
+                             f'than the {max_frame_size} byte limit')
+          start = offset + 4
+          if self.end - start < size:
+            break
+          offset = start + size
+          with view[start:offset] as frame:
+            self.handler.handleFrame(slen, frame)
+    finally:
+      remaining = self.end - offset
+      if offset and remaining:
+        self.buffer[:remaining] = self.buffer[offset:self.end]
+      self.end = remaining
+
+    # Make room for the next frame, or give back the room of a large one
+    needed = self.size
+    if remaining >= 4:
+      needed = max(needed, 4 + (struct.unpack_from('>L', self.buffer)[0]
+                                & _frame_size))
+    if needed > len(self.buffer):
+      self.buffer.extend(bytes(needed - len(self.buffer)))
+    elif len(self.buffer) > self.size and remaining <= self.size:
+      del self.buffer[self.size:]
+
+
+class LogRecordSocketReceiver:
   """
-  Simple TCP socket-based logging receiver suitable for testing.
+  Socket-based logging receiver, that the runners and tasks send their log
+  records to.
+
+  All the connections are served by the one thread running
+  :meth:`serve_until_stopped`, multiplexed with :mod:`selectors`, instead of
+  a thread per connection. Each connection only buffers the part of a frame
+  received so far, and a frame larger than :attr:`max_frame_size` closes the
+  connection, so memory stays bounded no matter how many connections there
+  are.
+
+  Only JSON log records are accepted (see :class:`JsonSocketHandler`), unless
+  ``allow_pickle`` is ``True``.
   """
 
   allow_reuse_address = True
+  request_queue_size = 1024
+  '''int: Listen backlog, for when many tasks connect at once'''
+  max_frame_size = 64 * 1024 * 1024
+  '''int: Largest frame (in bytes) a connection may send'''
+  read_size = 16 * 1024
+  '''int: Size of each connection's receive buffer, when it is not reading a
+  larger frame'''
 
   def __init__(self,
                address=('localhost',
                         logging.handlers.DEFAULT_TCP_LOGGING_PORT),
                family='AF_INET',
-               handler=LogRecordStreamHandler):
+               handler=LogRecordStreamHandler,
+               allow_pickle=False):
 
     if family == 'AF_INET':
       self.address_family = socket.AF_INET
@@ -219,7 +702,22 @@ class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
     else:
       raise ValueError(f'Invalid value of socket family: {family}. Currently '
                        'only AF_INET, AF_INET6 and AF_UNIX are supported')
-    socketserver.ThreadingTCPServer.__init__(self, address, handler)
+    self.RequestHandlerClass = handler
+
+    self.socket = socket.socket(self.address_family, socket.SOCK_STREAM)
+    try:
+      if self.allow_reuse_address:
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+      self.socket.bind(address)
+      self.server_address = self.socket.getsockname()
+      self.socket.listen(self.request_queue_size)
+    except BaseException:
+      self.socket.close()
+      raise
+    self.socket.setblocking(False)
+
+    self.selector = selectors.DefaultSelector()
+    self.selector.register(self.socket, selectors.EVENT_READ)
 
     # Auto delete file socket, or else it'll cause a bind error next time, plus
     # it looks ugly to leave these around
@@ -230,18 +728,76 @@ class LogRecordSocketReceiver(socketserver.ThreadingTCPServer):
     self.ready = False
     self.timeout = 0.1
     self.logname = None
+    self.allow_pickle = allow_pickle
 
   def serve_until_stopped(self):
-    abort = False
     self.ready = True
-    while not abort:
-      rd, wr, ex = select.select([self.socket.fileno()],
-                                 [], [],
-                                 self.timeout)
-      if rd:
-        self.handle_request()
-      abort = self.abort
-    self.ready = False
+    try:
+      while not self.abort:
+        self._serve_once(self.timeout)
+      # Log whatever has already arrived
+      self._serve_once(0)
+    finally:
+      for key in list(self.selector.get_map().values()):
+        if key.data is not None:
+          self._close(key.data)
+      self.ready = False
+
+  def _serve_once(self, timeout):
+    for key, _ in self.selector.select(timeout):
+      if key.data is None:
+        self._accept()
+      else:
+        self._read(key.data)
+
+  def _accept(self):
+    for _ in range(self.request_queue_size):
+      try:
+        sock, client_address = self.socket.accept()
+      except (BlockingIOError, InterruptedError):
+        return
+      sock.setblocking(False)
+      connection = _LogConnection(
+          sock, self.RequestHandlerClass.for_connection(self, client_address),
+          self.read_size)
+      self.selector.register(sock, selectors.EVENT_READ, connection)
+
+  def _read(self, connection):
+    try:
+      received = connection.receive()
+    except (BlockingIOError, InterruptedError):
+      return
+    except OSError:
+      received = 0
+    if not received:
+      self._close(connection)
+      return
+
+    try:
+      connection.process(self.max_frame_size)
+    except Exception:
+      self.handle_error(connection.handler.client_address)
+      self._close(connection)
+
+  def _close(self, connection):
+    self.selector.unregister(connection.sock)
+    connection.sock.close()
+
+  def handle_error(self, client_address):
+    '''
+    Called when a connection sends something that can't be logged. Prints the
+    traceback to stderr, like :mod:`socketserver` does, since logging it could
+    fail the same way
+    '''
+    print('-' * 40, file=sys.stderr)
+    print('Exception occurred while logging records from '
+          f'{client_address!r}', file=sys.stderr)
+    traceback.print_exc()
+    print('-' * 40, file=sys.stderr)
+
+  def server_close(self):
+    self.selector.close()
+    self.socket.close()
 
 
 def cleanup_named_socket(server_address):
@@ -251,6 +807,64 @@ def cleanup_named_socket(server_address):
     pass
 
 
+_caller_lookup = None
+# (root logger handlers, whether any formatter uses the caller), so that
+# Logger.findCaller can skip walking the stack when none does. None when it
+# has to be worked out again, see reset_caller_lookup
+
+_caller_fields = re.compile(r'\b(pathname|filename|module|lineno|funcName)\b')
+
+
+def _uses_caller(formatter):
+  '''
+  Check if a formatter uses the caller information of a record
+  '''
+  if formatter is None:
+    # logging's default formatter, only the message
+    return False
+  fmt = getattr(formatter, '_fmt', None)
+  if not isinstance(fmt, str):
+    # Can't tell, so assume it does
+    return True
+  return _caller_fields.search(fmt) is not None
+
+
+def _caller_needed():
+  '''
+  Check if the formatter of any handler, of any logger, uses the caller
+  information of a record. Worked out again after :func:`reset_caller_lookup`
+  or when the handlers of the root logger change
+  '''
+  global _caller_lookup
+  cached = _caller_lookup
+  root_handlers = logging.root.handlers
+  if cached is not None and cached[0] == root_handlers:
+    return cached[1]
+
+  handlers = list(root_handlers)
+  for _logger in list(logging.Logger.manager.loggerDict.values()):
+    handlers.extend(getattr(_logger, 'handlers', ()))
+  # Buffers don't format, the handlers they are flushed to do
+  needed = any(_uses_caller(handler.formatter) for handler in handlers
+               if not isinstance(handler, logging.handlers.BufferingHandler))
+  _caller_lookup = (list(root_handlers), needed)
+  return needed
+
+
+def reset_caller_lookup():
+  '''
+  Work out again if the caller of each log call has to be looked up (see
+  :meth:`Logger.findCaller`), the next time something is logged.
+
+  Adding or removing a handler, on the root logger or on a :class:`Logger`,
+  does this on its own. Call this after changing the formatter of a handler,
+  or the handlers of a logger that is not a :class:`Logger`, once logging is
+  configured. Else records might be missing their caller information
+  '''
+  global _caller_lookup
+  _caller_lookup = None
+
+
 class _SetupTerraLogger():
   '''
   A simple logger class used internally to configure the logger before and
@@ -269,20 +883,6 @@ class _SetupTerraLogger():
     # ever defined, don't use it to get the root logger
     self.root_logger = logging.getLogger(None)
     self.root_logger.setLevel(0)
-    # Add the Terra filter to the rootlogger, so that it gets the same extra
-    # args any other terra.logger.Logger would get
-    self.root_logger.addFilter(TerraAddFilter())
-
-    # In cases where getLogger is called before _SetupTerraLogger, this will
-    # patch all the loggers in the manager, to have have TerraAddFilter. This
-    # will solve the KeyError: 'hostname' and 'zone' issue that sometimes pops
-    # up.
-    for _logger in logging.Logger.manager.loggerDict.values():
-      if isinstance(_logger, logging.PlaceHolder):
-        continue
-      if not any(isinstance(filter, TerraAddFilter)
-                 for filter in _logger.filters):
-        _logger.addFilter(TerraAddFilter())
 
     # stream -> stderr
     self.stderr_handler = logging.StreamHandler(sys.stderr)
@@ -349,6 +949,8 @@ class _SetupTerraLogger():
                             category=DeprecationWarning, module='osgeo',
                             message="the imp module is deprecated")
 
+    self.set_caller_lookup()
+
   @property
   def main_log_handler(self):
     try:
@@ -398,6 +1000,40 @@ class _SetupTerraLogger():
     _demoteLevel(('kombu.pidbox', 'celery.bootsteps', 'filelock'),
                  DEBUG1, DEBUG4)
 
+    self.set_root_level()
+    self.set_caller_lookup()
+
+  def set_root_level(self):
+    '''
+    Set the root logger to the lowest level that any handler (stderr, main
+    log, report buffer, etc.), of the root logger or of any other logger,
+    needs. Log calls below that level are then rejected by
+    :meth:`logging.Logger.isEnabledFor`, before a record is made. This must be
+    called again when a handler or its level is changed.
+
+    Handlers of a logger that has a level of its own (or that a parent logger
+    other than the root logger has) are not limited by the root level, and
+    :class:`logging.NullHandler` handles nothing, so neither counts
+    '''
+    levels = [handler.level for handler in self.root_logger.handlers]
+    for _logger in logging.Logger.manager.loggerDict.values():
+      node = _logger
+      while (node is not self.root_logger
+             and isinstance(node, logging.Logger) and node.level == NOTSET):
+        node = node.parent
+      if node is self.root_logger:
+        levels.extend(handler.level for handler in _logger.handlers
+                      if not isinstance(handler, logging.NullHandler))
+    self.root_logger.setLevel(min(levels, default=NOTSET))
+
+  def set_caller_lookup(self):
+    '''
+    Only look up the caller of each log call (see :meth:`Logger.findCaller`)
+    when the formatter of a handler uses it. Called once the formatters are
+    set, see :func:`reset_caller_lookup`
+    '''
+    reset_caller_lookup()
+
   def configure_logger(self, sender=None, signal=None, **kwargs):
     '''
     Call back function to configure the logger after settings have been
@@ -408,6 +1044,9 @@ class _SetupTerraLogger():
     from terra.core.settings import TerraJSONEncoder
 
     if self._configured:
+      if settings._isolated:
+        # The settings of an isolate context share the process wide logger
+        return
       self.root_logger.error("Configure logger called twice, this is "
                              "unexpected")
       raise ImproperlyConfigured()
@@ -416,13 +1055,16 @@ class _SetupTerraLogger():
     # imported at the end of LazySettings.configure. We don't import Executor
     # here to reduce the concerns of this module
     import terra.core.signals
-    terra.core.signals.logger_configure.send(sender=self, **kwargs)
+    terra.core.signals.logger_configure.send_async(sender=self, **kwargs)
     self.set_level_and_formatter()
 
     # Now that the real logger has been set up, swap some handlers
     self.root_logger.removeHandler(self.preconfig_stderr_handler)
     self.root_logger.removeHandler(self.preconfig_main_log_handler)
     self.root_logger.removeHandler(self.tmp_handler)
+    # Only the configured handlers are left to decide the level
+    self.set_root_level()
+    self.set_caller_lookup()
 
     if not settings.terra.disable_settings_dump:
       settings_dump_file = ('settings_%Y_%m_%d_%H_%M_%S_%f_'
@@ -526,19 +1168,94 @@ class _SetupTerraLogger():
     except Exception:
       pass
 
+    try:
+      self.print_signal_report()
+    except Exception:
+      pass
+
+  def print_signal_report(self):
+    '''
+    Print the time spent in each signal receiver, slowest first, when
+    :envvar:`TERRA_SIGNAL_TIMING` is ``1``
+    '''
+    from terra.core.signals import receiver_timings
+    timings = receiver_timings()
+    if not timings:
+      return
+
+    print('\nTerra Signal receiver report', file=sys.stderr)
+    print('============================', file=sys.stderr)
+    print(f'{"count":>7} {"total (s)":>10} {"max (s)":>10}  signal: receiver',
+          file=sys.stderr)
+    for (signal, receiver), (count, total, maximum) in sorted(
+        timings.items(), key=lambda timing: timing[1][1], reverse=True):
+      print(f'{count:7d} {total:10.4f} {maximum:10.4f}  {signal}: {receiver}',
+            file=sys.stderr)
+
+
+class _RecordContext:
+  '''
+  The ``hostname`` and ``zone`` that :func:`_record_factory` adds to every
+  log record. The hostname is looked up once, and the zone is cached until
+  the settings change (or are swapped, e.g. by
+  :meth:`terra.core.settings.LazySettings.isolate`)
+  '''
+
+  def __init__(self):
+    self.hostname = platform.node()
+    # (settings, settings version, zone)
+    self._zone = (None, None, 'preconfig')
+
+  @property
+  def zone(self):
+    try:
+      if not terra.settings.configured:
+        return 'preconfig'
+      wrapped = terra.settings._wrapped
+      # Read the version before the zone, so that a change made while reading
+      # results in a stale cache. The zone is a string, it can't be changed in
+      # place
+      version = wrapped._tree_version()
+      cached = self._zone
+      if cached[0] is wrapped and cached[1] == version:
+        return cached[2]
+      zone = wrapped.terra.zone
+      self._zone = (wrapped, version, zone)
+      return zone
+    except BaseException:
+      return 'preconfig'
+
+
+_record_context = _RecordContext()
+_original_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs):
+  '''
+  Log record factory that adds the ``hostname`` and ``zone`` of this process
+  to every record. Records received from other processes (see
+  :func:`logging.makeLogRecord`) keep their own ``hostname`` and ``zone``
+  '''
+  record = _original_record_factory(*args, **kwargs)
+  record.hostname = _record_context.hostname
+  record.zone = _record_context.zone
+  return record
+
 
 class TerraAddFilter(Filter):
+  '''
+  Deprecated, does nothing. Every record already has a ``hostname`` and a
+  ``zone``, added by the log record factory. Will be removed in the next
+  release.
+  '''
+
+  def __init__(self, *args, **kwargs):
+    warnings.warn('TerraAddFilter is deprecated and does nothing, the '
+                  'hostname and zone are added to every log record',
+                  DeprecationWarning, stacklevel=2)
+    super().__init__(*args, **kwargs)
+
   def filter(self, record):
-    if not hasattr(record, 'hostname'):
-      record.hostname = platform.node()
-    if not hasattr(record, 'zone'):
-      try:
-        if terra.settings.configured:
-          record.zone = terra.settings.terra.zone
-        else:
-          record.zone = 'preconfig'
-      except BaseException:
-        record.zone = 'preconfig'
     return True
 
 
@@ -578,18 +1295,17 @@ class ColorFormatter(Formatter):
 
 
 class Logger(Logger_original):
-  def __init__(self, *args, **kwargs):
-    super().__init__(*args, **kwargs)
-    # I like https://stackoverflow.com/a/17558764/4166604 better than
-    # https://stackoverflow.com/a/28050837/4166604, it has the ability to add
-    # logic/function calls, if I so desire
-    self.addFilter(TerraAddFilter())
-
   def findCaller(self, stack_info=False, stacklevel=1):
     """
     Find the stack frame of the caller so that we can note the source
     file name, line number and function name.
+
+    The stack is not walked when no formatter uses the caller (see
+    :func:`reset_caller_lookup`), unless ``stack_info`` is requested.
     """
+    rv = "(unknown file)", 0, "(unknown function)", None
+    if not stack_info and not _caller_needed():
+      return rv
     f = currentframe()
     # On some versions of IronPython, currentframe() returns None if
     # IronPython isn't run with -X:Frames.
@@ -601,12 +1317,14 @@ class Logger(Logger_original):
       stacklevel -= 1
     if not f:
       f = orig_f
-    rv = "(unknown file)", 0, "(unknown function)", None
     while hasattr(f, "f_code"):
       co = f.f_code
-      filename = os.path.normcase(co.co_filename)
-      # I have to fix this line to be smarter
-      if filename in _srcfiles:
+      try:
+        skip = _srcfile_cache[co.co_filename]
+      except KeyError:
+        skip = os.path.normcase(co.co_filename) in _srcfiles
+        _srcfile_cache[co.co_filename] = skip
+      if skip:
         f = f.f_back
         continue
       sinfo = None
@@ -622,6 +1340,14 @@ class Logger(Logger_original):
       break
     return rv
 
+  def addHandler(self, hdlr):
+    super().addHandler(hdlr)
+    reset_caller_lookup()
+
+  def removeHandler(self, hdlr):
+    super().removeHandler(hdlr)
+    reset_caller_lookup()
+
   # Define _log instead of logger adapter if needed, this works better
   # (setLoggerClass) https://stackoverflow.com/a/28050837/4166604
 
@@ -684,6 +1410,8 @@ def handle_warning(message, category, filename, lineno, file=None, line=None):
 _srcfiles = (logging_srcfile,
              os.path.normcase(Logger.debug1.__code__.co_filename),
              warnings.showwarning.__code__.co_filename)
+# Whether the normcase of a code object's filename is in _srcfiles
+_srcfile_cache = {}
 
 
 DEBUG1 = 10
@@ -723,6 +1451,8 @@ logging.addLevelName(DEBUG3, "DEBUG3")
 logging.addLevelName(DEBUG4, "DEBUG4")
 
 logging.setLoggerClass(Logger)
+# Every record gets the hostname and zone, no matter which logger created it
+logging.setLogRecordFactory(_record_factory)
 
 # Get the logger here, AFTER all the changes to the logger class
 logger = getLogger(__name__)
@@ -173,9 +173,10 @@ def subprocess(self, *args, **kwargs):
 
   # retrieve settings from request metadata
   # (note this is expected to be a simple dictionary able to be serialized
-  # with the built-in json package)
+  # with the built-in json package, using TerraJSONEncoder for PathList)
   settings = getattr(self.request, 'settings', None)
-  logger.debug1(f'Input settings: {json.dumps(settings, indent=2)}')
+  logger.debug1('Input settings: '
+                f'{json.dumps(settings, indent=2, cls=TerraJSONEncoder)}')
 
   # run command with settings saved to temporary file
   if settings:
@@ -184,7 +185,7 @@ def subprocess(self, *args, **kwargs):
       # save settings to file
       settings_file = os.path.join(temp_dir, 'settings.json')
       with open(settings_file, 'w') as fid:
-        json.dump(settings, fid, indent=2)
+        json.dump(settings, fid, indent=2, cls=TerraJSONEncoder)
 
       # add settings file to environment
       env['TERRA_SETTINGS_FILE'] = settings_file
@@ -4,6 +4,7 @@ import json
 from unittest import mock, skipIf
 
 from terra import settings
+from terra.core.settings import snapshot_load
 from terra.executor.utils import Executor
 from terra.compute import base
 import terra.compute.container
@@ -55,7 +56,7 @@ class TestContainerService(TestComputeContainerCase,
     self.patches.append(mock.patch.dict(Executor.__dict__))
     super().setUp()
 
-  def json_dump(self, config, fid):
+  def json_dump(self, config, fid, **kwargs):
     self.config = config
 
   def common(self, compute, service):
@@ -85,6 +86,31 @@ class TestContainerService(TestComputeContainerCase,
                    if k.startswith('TERRA_VOLUME_')),
                   'Configuration failed to injected into container')
 
+  @skipIf(os.name != "posix", 'Requires Linux')
+  @mock.patch.object(base.BaseCompute, 'configuration_map_service', mock_map)
+  def test_service_snapshot(self):
+    with mock.patch.dict(settings._wrapped, {}):
+      compute = base.BaseCompute()
+      compute.configuration_map(SomeService())
+      settings.foo_dir = "/foo"  # From mock_map
+
+      with open(settings.logging.server.listen_address, 'w'):
+        pass
+
+      service = SomeService()
+      service.env['TERRA_SETTINGS_SNAPSHOT'] = '1'
+      service.env['TERRA_KEEP_TEMP_DIR'] = '1'
+      service.pre_run()
+      try:
+        self.assertEqual(service.env['TERRA_SETTINGS_FILE'],
+                         "/tmp_settings/config.pkl")
+        config = snapshot_load(os.path.join(service.temp_dir.name,
+                                            'config.pkl'))
+        self.assertEqual(config['foo_dir'], '/bar')
+        self.assertEqual(config['terra']['zone'], 'runner')
+      finally:
+        service.temp_dir.cleanup()
+
   @skipIf(os.name != "posix", 'Requires Linux')
   @mock.patch.object(base.BaseCompute, 'configuration_map_service', mock_map)
   def test_service_simple(self):
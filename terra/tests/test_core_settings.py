@@ -3,6 +3,9 @@ import sys
 import json
 import time
 import pickle
+import copy
+import threading
+import stat
 from unittest import mock
 from tempfile import TemporaryDirectory, NamedTemporaryFile
 import tempfile
@@ -13,10 +16,14 @@ from .utils import TestCase, TestLoggerCase, TestLoggerConfigureCase
 from terra import settings
 from terra import logger
 from terra.core.exceptions import ImproperlyConfigured
+from terra.core.utils import PathList
 from terra.core.settings import (
   ObjectDict, settings_property, Settings, LazyObject, TerraJSONEncoder,
   ExpandedString, LazySettings, override_config, json_load,
-  default_settings, validate_keys
+  default_settings, validate_keys, OverlaySettings, FrozenSettings,
+  settings_property_trace, settings_schema, snapshot_dump, snapshot_load,
+  _serialize_settings, templates_changed, _TemplateList,
+  LazySettingsThreaded
 )
 
 
@@ -348,6 +355,113 @@ class TestObjectDictSettings(TestObjectDict):
     self.cls = Settings
 
 
+class TestObjectDictOverlaySettings(TestObjectDict):
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    self.cls = OverlaySettings
+
+
+class TestOverlaySettings(TestCase):
+  def setUp(self):
+    self.shared = Settings({'a': {'b': 1, 'c': [1, 2]},
+                            'd': {'e': {'f': 'value'}},
+                            'g': 12})
+    super().setUp()
+
+  def test_copy_on_access(self):
+    overlay = OverlaySettings.overlay(self.shared)
+    self.assertEqual(overlay, self.shared)
+
+    # Nothing is copied until accessed
+    self.assertIs(dict.__getitem__(overlay, 'a'), self.shared['a'])
+    self.assertIs(dict.__getitem__(overlay, 'd'), self.shared['d'])
+
+    overlay.a.b = 2
+    overlay.a.c.append(3)
+    overlay.g = 13
+    overlay.h = {'i': 1}
+
+    self.assertIsNot(dict.__getitem__(overlay, 'a'), self.shared['a'])
+    self.assertIs(dict.__getitem__(overlay, 'd'), self.shared['d'])
+
+    self.assertEqual(overlay.a, {'b': 2, 'c': [1, 2, 3]})
+    self.assertEqual(overlay.g, 13)
+    self.assertEqual(overlay.h.i, 1)
+    self.assertEqual(self.shared, {'a': {'b': 1, 'c': [1, 2]},
+                                   'd': {'e': {'f': 'value'}},
+                                   'g': 12})
+
+  def test_nested(self):
+    overlay = OverlaySettings.overlay(self.shared)
+    overlay.d.e.f = 'other'
+    overlay.update({'d': {'e': {'j': 15}}})
+    overlay.moveattr('a.b', 'd.b')
+
+    self.assertEqual(overlay.d.e, {'f': 'other', 'j': 15})
+    self.assertEqual(overlay.d.b, 1)
+    self.assertNotIn('a.b', overlay)
+    self.assertEqual(self.shared.d.e, {'f': 'value'})
+    self.assertEqual(self.shared.a.b, 1)
+
+  def test_contains_does_not_copy(self):
+    overlay = OverlaySettings.overlay(self.shared)
+    self.assertIn('d.e.f', overlay)
+    self.assertIs(dict.__getitem__(overlay, 'd'), self.shared['d'])
+
+  def test_context(self):
+    overlay = OverlaySettings.overlay(self.shared)
+    overlay.g = 13
+
+    with overlay:
+      overlay.a.b = 2
+      overlay.a.c.append(3)
+      overlay['d'] = 15
+      overlay.g = 14
+      self.assertEqual(overlay.a, {'b': 2, 'c': [1, 2, 3]})
+
+    self.assertEqual(overlay, {'a': {'b': 1, 'c': [1, 2]},
+                               'd': {'e': {'f': 'value'}},
+                               'g': 13})
+    overlay.d.e.f = 'other'
+    self.assertEqual(self.shared.d.e.f, 'value')
+
+  def test_settings_property(self):
+    calls = []
+
+    @settings_property
+    def prop(self):
+      calls.append(1)
+      return 'value'
+    self.shared.d.prop = prop
+    self.shared.prop = prop
+
+    # Evaluated once, in the shared settings, for all the overlays
+    overlays = [OverlaySettings.overlay(self.shared) for _ in range(2)]
+    for overlay in overlays:
+      with mock.patch.object(settings, '_wrapped', overlay):
+        self.assertEqual(overlay.d.prop, 'value')
+    self.assertEqual(calls, [1])
+    self.assertEqual(dict.__getitem__(self.shared.d, 'prop'), 'value')
+
+    # Once an overlay is changed, it evaluates on its own
+    overlays[0].g = 13
+    with mock.patch.object(settings, '_wrapped', overlays[0]):
+      self.assertEqual(overlays[0].prop, 'value')
+    self.assertEqual(calls, [1, 1])
+    self.assertIs(dict.__getitem__(self.shared, 'prop'), prop)
+
+  def test_copy(self):
+    overlay = OverlaySettings.overlay(self.shared)
+    overlay.a.b = 2
+
+    for copied in (overlay.deepcopy(), pickle.loads(pickle.dumps(overlay))):
+      self.assertIs(type(copied), Settings)
+      self.assertIs(type(copied.d), Settings)
+      self.assertEqual(copied, overlay)
+      copied.d.e.f = 'copied'
+      self.assertEqual(self.shared.d.e.f, 'value')
+
+
 class TestSettings(TestLoggerCase):
   # TestLoggerCase sets TERRA_SETTINGS_FILE to a valid file, in order to get
   # an ImproperlyConfigured Exception here, TERRA_SETTINGS_FILE must be set to
@@ -430,6 +544,59 @@ class TestSettings(TestLoggerCase):
     self.assertNotIn('q.t', settings)
     self.assertIn('q.foo.t', settings)
 
+  def test_path(self):
+    settings.configure({'q': {'x': 33, 'foo': {'t': 15}},
+                        'test_dir': '~/foo'})
+
+    path = settings.path('q.foo.t')
+    self.assertEqual(repr(path), '<SettingsPath q.foo.t>')
+    self.assertTrue(path.contains())
+    self.assertEqual(path.get(), 15)
+
+    path.set(16)
+    self.assertEqual(settings.q.foo.t, 16)
+    self.assertEqual(path.get(), 16)
+
+    # Strings are expanded, just like attribute access
+    self.assertEqual(settings.path('test_dir').get(),
+                     os.path.expanduser('~/foo'))
+    self.assertIsInstance(settings._wrapped['test_dir'], ExpandedString)
+
+    # Missing settings
+    missing = settings.path('q.bar.t')
+    self.assertFalse(missing.contains())
+    with self.assertRaises(AttributeError):
+      missing.get()
+    self.assertIsNone(missing.get(None))
+    missing.set(17)
+    self.assertEqual(settings.q.bar.t, 17)
+
+    # Non-scalars still get a nested update
+    settings.path('q.foo').set({'u': 1})
+    self.assertEqual(settings.q.foo, {'t': 16, 'u': 1})
+    self.assertIsInstance(settings.q.foo, Settings)
+
+  def test_path_context(self):
+    settings.configure({'q': {'x': 33}})
+    path = settings.path('q.x')
+
+    with settings:
+      path.set(34)
+      self.assertEqual(settings.q.x, 34)
+    self.assertEqual(path.get(), 33)
+
+  @mock.patch('terra.core.settings.global_templates', [({}, {})])
+  def test_path_settings_property(self):
+    @settings_property
+    def a(self):
+      return self.c.b + 1
+
+    settings.configure({'c': {'b': 11}, 'q': {'a': a}})
+    path = settings.path('q.a')
+    self.assertEqual(path.get(), 12)
+    # Verify cached
+    self.assertEqual(settings._wrapped['q']['a'], 12)
+
   @mock.patch('terra.core.settings.global_templates',
               [({},
                 {'a': 11, 'b': 22, 'q': {'x': 33, 'y': 44, 'foo': {'t': 15}}}),
@@ -463,6 +630,35 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(settings.e.f, 15)
     self.assertTrue(settings.configured)
 
+  @mock.patch('terra.core.settings.global_templates',
+              [({'a': 1}, {'b': 2}),
+               ({}, {'a': 1, 'c': {'d': 3}, 'l': [1]}),
+               ({'a': 1}, {'e': 4}),
+               ({'c': {'d': 3}}, {'f': 5, 'c': {'x': 8}}),
+               ({'c': {}}, {'g': 6, 'c': {'x': 9, 'y': 10}}),
+               ({'a': 2}, {'h': 7}),
+               ({'a': 1, 'c': {'d': 4}}, {'i': 8})])
+  def test_global_templates_order(self):
+    import terra.core.settings
+    templates = copy.deepcopy(terra.core.settings.global_templates)
+
+    settings.configure({})
+    # Templates only match the defaults of templates before them
+    self.assertNotIn('b', settings)
+    self.assertNotIn('h', settings)
+    self.assertNotIn('i', settings)
+    self.assertEqual(settings.a, 1)
+    self.assertEqual(settings.e, 4)
+    self.assertEqual(settings.f, 5)
+    self.assertEqual(settings.g, 6)
+    # The first template to set a default wins
+    self.assertEqual(settings.c, {'d': 3, 'x': 8, 'y': 10})
+
+    # The templates are not changed by the settings
+    settings.c.d = 15
+    settings.l.append(2)
+    self.assertEqual(terra.core.settings.global_templates, templates)
+
   @mock.patch('terra.core.settings.global_templates', [({}, {})])
   def test_settings_property(self):
     import terra.core.settings
@@ -502,6 +698,79 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(settings.d, d)
     self.assertEqual(settings.d(None), 3)
 
+  def test_settings_property_trace(self):
+    @settings_property
+    def a(self):
+      return self.b + self.c.d
+
+    @settings_property
+    def b(self):
+      return self.c.d + 1
+
+    @settings_property
+    def d(self):
+      return 1
+
+    settings_property_trace.clear()
+    settings.configure({'a': a, 'b': b, 'c': {'d': d}})
+    # b is already cached when a uses it
+    self.assertEqual(settings.b, 2)
+    self.assertEqual(settings.a, 3)
+
+    deps = {name.rsplit('.', 1)[-1]: {x.rsplit('.', 1)[-1] for x in value}
+            for name, value in settings_property_trace.dependencies.items()}
+    self.assertEqual(deps, {'a': {'b', 'd'}, 'b': {'d'}, 'd': set()})
+    self.assertEqual(
+        [x.rsplit('.', 1)[-1] for x in settings_property_trace.independent()],
+        ['d'])
+    self.assertEqual(
+        {x.rsplit('.', 1)[-1] for x in settings_property_trace.dependent()},
+        {'a', 'b'})
+    self.assertEqual(len(settings_property_trace.wall_time), 3)
+    self.assertIn('(uses ', settings_property_trace.report())
+    self.assertEqual(settings_property_trace.active, 0)
+
+  @mock.patch.dict(os.environ, TERRA_EAGER_SETTINGS_PROPERTIES='1')
+  def test_eager_settings_properties(self):
+    threads = {}
+
+    @settings_property(io_bound=True)
+    def a(self):
+      threads['a'] = threading.current_thread()
+      return 1
+
+    @settings_property(io_bound=True)
+    def b(self):
+      threads['b'] = threading.current_thread()
+      return 2
+
+    @settings_property
+    def c(self):
+      return 3
+
+    settings.configure({'a': a, 'b': {'b': b}, 'c': c})
+    self.assertEqual(settings._wrapped['a'], 1)
+    self.assertEqual(settings._wrapped['b']['b'], 2)
+    self.assertIs(settings._wrapped['c'], c)
+    self.assertIsNot(threads['a'], threading.current_thread())
+    self.assertIsNot(threads['a'], threads['b'])
+
+    # Properties known to use other properties are left for first access
+    @settings_property(io_bound=True)
+    def e(self):
+      return self.a + 1
+
+    settings._wrapped = None
+    settings_property_trace.clear()
+    settings.configure({'a': a, 'e': e})
+    self.assertEqual(settings._wrapped['e'], 2)
+    self.assertIn(e.__qualname__, settings_property_trace.dependent())
+
+    settings._wrapped = None
+    settings.configure({'a': a, 'e': e})
+    self.assertIs(settings._wrapped['e'], e)
+    self.assertEqual(settings._wrapped['a'], 1)
+
   @mock.patch('terra.core.settings.global_templates',
               [({}, {'a': 11, 'b': 22})])
   def test_configure(self):
@@ -611,6 +880,265 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(settings.b, 22)
     self.assertFalse(hasattr(settings, 'c'))
 
+  def test_with_context_nested(self):
+    settings._wrapped = Settings({'a': {'b': {'c': 1, 'd': [1, 2]}},
+                                  'e': {'f': 2}, 'g': 3})
+    original = settings._wrapped.deepcopy()
+    e = settings._wrapped['e']
+
+    with settings:
+      settings.a.b.c = 11
+      settings.a.b.d.append(3)
+      settings.update({'a': {'h': 4}})
+      settings.e.pop('f')
+      settings.moveattr('g', 'a.g')
+      self.assertEqual(settings.a, {'b': {'c': 11, 'd': [1, 2, 3]},
+                                    'h': 4, 'g': 3})
+      self.assertNotIn('g', settings)
+      self.assertEqual(settings.e, {})
+
+      # Contexts only record what changed
+      journal = settings._wrapped._journal[-1]
+      self.assertEqual({key for _, key, _ in journal.values()},
+                       {'c', 'd', 'h', 'f', 'g'})
+
+    self.assertEqual(settings._wrapped, original)
+    self.assertIs(settings._wrapped['e'], e)
+
+  def test_with_context_any_node(self):
+    settings._wrapped = Settings({'a': {'b': 1, 'c': [1]}, 'd': {'e': [1]}})
+    original = settings._wrapped.deepcopy()
+
+    # Captured before the context
+    a = settings.a
+    with settings:
+      a.b = 5
+      a.c.append(7)
+      for key, value in settings.d.items():
+        value.append(7)
+      for value in settings.a.values():
+        if isinstance(value, list):
+          value.append(8)
+      # Added in the context
+      settings.f = {'g': {'h': 1}}
+      g = settings.f.g
+      self.assertEqual(settings.a, {'b': 5, 'c': [1, 7, 8]})
+      self.assertEqual(settings.d.e, [1, 7])
+
+    self.assertEqual(settings._wrapped, original)
+    self.assertEqual((a.b, a.c), (1, [1]))
+
+    with settings:
+      g.h = 2
+    self.assertEqual(g.h, 1)
+
+  def test_with_context_mutable_before(self):
+    settings._wrapped = Settings({'a': {'l': [1, 2]}, 'files': ['x']})
+
+    # Taken before the context, changed in place in it
+    items = settings.a.l
+    f = settings.files
+    with settings:
+      items.append(3)
+      f.append('y')
+      self.assertEqual(settings.a.l, [1, 2, 3])
+    self.assertEqual(settings.a.l, [1, 2])
+    self.assertEqual(settings.files, ['x'])
+
+  def test_with_context_ior(self):
+    settings._wrapped = Settings({'a': 1, 'b': {'c': 2}})
+    with settings:
+      settings._wrapped |= {'a': 11, 'd': 4}
+      settings.b |= [('c', 22)]
+      self.assertEqual(settings.a, 11)
+      self.assertEqual(settings.b.c, 22)
+      self.assertEqual(settings.d, 4)
+    self.assertEqual(settings._wrapped, {'a': 1, 'b': {'c': 2}})
+
+  def test_with_context_clear(self):
+    settings._wrapped = Settings({'a': {'b': 1}, 'c': 2})
+    a = settings._wrapped['a']
+
+    with settings:
+      settings._wrapped.clear()
+      settings._wrapped.update({'d': {'e': 3}})
+      settings.d.e = 4
+      self.assertEqual(settings._wrapped, {'d': {'e': 4}})
+
+    self.assertEqual(settings._wrapped, {'a': {'b': 1}, 'c': 2})
+    self.assertIs(settings._wrapped['a'], a)
+
+  def test_isolate(self):
+    settings.configure({'a': 1})
+
+    with settings.isolate():
+      self.assertFalse(settings.configured)
+      settings.configure({'a': 2})
+      self.assertEqual(settings.a, 2)
+
+      # Other threads use the process settings
+      results = []
+      thread = threading.Thread(target=lambda: results.append(settings.a))
+      thread.start()
+      thread.join()
+      self.assertEqual(results, [1])
+
+    self.assertEqual(settings.a, 1)
+
+    with settings.isolate(Settings({'a': 3})):
+      self.assertEqual(settings.a, 3)
+    self.assertEqual(settings.a, 1)
+
+  def test_lazy_settings_threaded_deprecated(self):
+    from concurrent.futures import ThreadPoolExecutor
+    lazy = LazySettings()
+    lazy._wrapped = Settings({'a': {'b': 1}})
+    with self.assertWarns(DeprecationWarning):
+      LazySettingsThreaded.downcast(lazy)
+    self.assertIsInstance(lazy, LazySettingsThreaded)
+
+    def change(value):
+      lazy.a.b = value
+      return lazy.a.b
+
+    # One worker thread, that keeps its own overlay of the settings
+    with ThreadPoolExecutor(1) as executor:
+      self.assertEqual(executor.submit(change, 2).result(), 2)
+      self.assertIsInstance(executor.submit(lambda: lazy._wrapped).result(),
+                            OverlaySettings)
+      self.assertEqual(executor.submit(lambda: lazy.a.b).result(), 2)
+    self.assertEqual(lazy.a.b, 1)
+
+    # Other threads use the shared settings
+    thread = threading.Thread(target=change, args=(3,))
+    thread.start()
+    thread.join()
+    self.assertEqual(lazy.a.b, 3)
+
+    with self.assertWarns(DeprecationWarning):
+      LazySettingsThreaded()
+
+  def test_settings_property_single_flight(self):
+    calls = []
+    barrier = threading.Barrier(4)
+
+    @settings_property
+    def slow(self):
+      calls.append(1)
+      time.sleep(0.05)
+      return object()
+
+    @settings_property
+    def fail_once(self):
+      calls.append(1)
+      if len(calls) == 1:
+        raise ValueError('first try')
+      return object()
+
+    def read(name, results):
+      barrier.wait()
+      try:
+        results.append(getattr(settings, name))
+      except ValueError as error:
+        results.append(error)
+
+    for name, prop, expected_calls in (('slow', slow, 1),
+                                       ('fail_once', fail_once, 2)):
+      calls.clear()
+      settings._wrapped = Settings({name: prop})
+      results = []
+      threads = [threading.Thread(target=read, args=(name, results))
+                 for _ in range(4)]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+
+      self.assertEqual(len(calls), expected_calls)
+      values = [r for r in results if not isinstance(r, ValueError)]
+      self.assertEqual(len(values), 4 - expected_calls + 1)
+      self.assertTrue(all(value is values[0] for value in values))
+
+  def test_isolate_asyncio(self):
+    import asyncio
+
+    async def run(value):
+      with settings.isolate():
+        settings.configure({'a': value})
+        await asyncio.sleep(0)
+
+        async def child():
+          return settings.a
+        # Tasks created in the context use its settings
+        child_value = await asyncio.create_task(child())
+        await asyncio.sleep(0)
+        return settings.a, child_value
+
+    async def main():
+      return await asyncio.gather(*(run(value) for value in range(5)))
+
+    self.assertEqual(asyncio.run(main()), [(value, value)
+                                           for value in range(5)])
+    self.assertFalse(settings.configured)
+
+  def test_with_context_copy(self):
+    settings._wrapped = Settings({'a': {'b': 1}})
+    with settings:
+      settings.a.b = 2
+      copied = settings._wrapped.deepcopy()
+      pickled = pickle.loads(pickle.dumps(settings._wrapped))
+    self.assertNotIn('_journal', copied.__dict__)
+    self.assertNotIn('_journal', copied.a.__dict__)
+    self.assertNotIn('_journal', pickled.__dict__)
+    self.assertEqual(copied.a.b, 2)
+    self.assertEqual(pickled.a.b, 2)
+    self.assertEqual(settings.a.b, 1)
+
+  @mock.patch.dict(os.environ, TERRA_FREEZE_TEST_VAR='foo')
+  def test_freeze(self):
+    @settings_property
+    def c(self):
+      return self.a + 1
+
+    settings.configure({'a': 11,
+                        'b': {'c': c, 'd': '${TERRA_FREEZE_TEST_VAR}'},
+                        'e_dir': '~/bar', 'f': [{'g': 1}, 2]})
+    frozen = settings.freeze()
+
+    self.assertIsInstance(frozen, FrozenSettings)
+    self.assertIsInstance(frozen.b, FrozenSettings)
+    self.assertEqual(frozen.b.c, 12)
+    self.assertEqual(frozen['b']['d'], 'foo')
+    self.assertEqual(getattr(frozen, 'b.d'), 'foo')
+    self.assertEqual(frozen.e_dir, os.path.expanduser('~/bar'))
+    self.assertEqual(frozen.f, ({'g': 1}, 2))
+    self.assertEqual(frozen.f[0].g, 1)
+    self.assertEqual(frozen.processing_dir, settings.processing_dir)
+    self.assertIn('b.c', frozen)
+
+    # The evaluated values are cached in settings too
+    self.assertEqual(settings._wrapped['b']['c'], 12)
+
+    # Snapshot is independent of settings
+    settings.a = 15
+    self.assertEqual(frozen.a, 11)
+
+    with self.assertRaises(TypeError):
+      frozen.a = 12
+    with self.assertRaises(TypeError):
+      frozen.b['c'] = 12
+    with self.assertRaises(TypeError):
+      frozen.update({'a': 12})
+    with self.assertRaises(TypeError):
+      frozen.pop('a')
+    with self.assertRaises(AttributeError):
+      frozen.z
+
+    pickled = pickle.loads(pickle.dumps(frozen))
+    self.assertIsInstance(pickled.b, FrozenSettings)
+    self.assertEqual(pickled, frozen)
+    self.assertEqual(json.loads(TerraJSONEncoder.dumps(frozen))['a'], 11)
+
   def test_lazy_context(self):
     with NamedTemporaryFile(mode='w', dir=self.temp_dir.name,
                             delete=False) as fid:
@@ -693,6 +1221,84 @@ class TestSettings(TestLoggerCase):
         json_load(os.path.join(self.temp_dir.name, 'does_not_exist.json'))
     self.assertIn("Cannot find JSON config file", str(cm.output))
 
+  def test_json_load_trailing_commas(self):
+    with NamedTemporaryFile(mode='w', dir=self.temp_dir.name,
+                            delete=False) as fid:
+      fid.write('''{"a": [1, 2, ],
+                    "b": "not // a comment, /* either */",
+                    "c": "\\"quoted\\" // ",
+                    "d": {"e": 1, // comment
+                          },
+                    }''')
+    self.assertDictEqual(json_load(fid.name),
+                         {"a": [1, 2],
+                          "b": "not // a comment, /* either */",
+                          "c": '"quoted" // ',
+                          "d": {"e": 1}})
+
+  def test_json_load_cache(self):
+    cache_dir = os.path.join(self.temp_dir.name, 'cache')
+    filename = os.path.join(self.temp_dir.name, 'config.json')
+    with open(filename, 'w') as fid:
+      fid.write('{"a": [1, 2]}')
+
+    with EnvironmentContext(TERRA_JSON_CACHE_DIR=cache_dir), \
+        mock.patch.dict('terra.core.settings._json_cache', clear=True):
+      first = json_load(filename)
+      self.assertEqual(first, {"a": [1, 2]})
+      self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+      with mock.patch('terra.core.settings.json_parser') as mock_parser:
+        second = json_load(filename)
+        self.assertEqual(second, first)
+        # Not shared
+        self.assertIsNot(second['a'], first['a'])
+
+        # From the disk cache, in a "new process"
+        import terra.core.settings
+        terra.core.settings._json_cache.clear()
+        self.assertEqual(json_load(filename), first)
+      mock_parser.assert_not_called()
+
+      # Changed file
+      with open(filename, 'w') as fid:
+        fid.write('{"a": [1, 2, 3]}')
+      self.assertEqual(json_load(filename), {"a": [1, 2, 3]})
+
+  def test_json_load_big_int(self):
+    filename = os.path.join(self.temp_dir.name, 'config.json')
+    big = 2**64 + 1
+    with open(filename, 'w') as fid:
+      fid.write(f'{{"a": {big}, "b": -{big}, "c": 1.5, "d": "x"}}')
+    with mock.patch.dict('terra.core.settings._json_cache', clear=True):
+      loaded = json_load(filename)
+    # Not rounded to a float
+    self.assertEqual(loaded, {"a": big, "b": -big, "c": 1.5, "d": "x"})
+    self.assertIsInstance(loaded['a'], int)
+
+  @mock.patch('terra.core.settings.global_templates', [])
+  def test_snapshot(self):
+    filename = os.path.join(self.temp_dir.name, 'config.pkl')
+    paths = PathList(['/a/b', '/a/c'])
+    snapshot_dump({'a': 11, 'b': {'c': [1, 2]}, 'd_files': paths}, filename)
+
+    os.environ['TERRA_SETTINGS_FILE'] = filename
+    with mock.patch('terra.core.settings.json_load') as mock_json_load:
+      self.assertEqual(settings.a, 11)
+    mock_json_load.assert_not_called()
+    self.assertEqual(settings.b.c, [1, 2])
+    self.assertEqual(settings.d_files, paths)
+
+    with open(filename, 'wb') as fid:
+      fid.write(b'{"a": 11}')
+    with self.assertRaises(ImproperlyConfigured):
+      snapshot_load(filename)
+
+    with open(filename, 'wb') as fid:
+      fid.write(b'TERRA_SETTINGS_SNAPSHOT\xff')
+    with self.assertRaisesRegex(ImproperlyConfigured, 'version'):
+      snapshot_load(filename)
+
   @mock.patch('terra.core.settings.global_templates', [])
   def test_json(self):
     with NamedTemporaryFile(mode='w', dir=self.temp_dir.name,
@@ -719,6 +1325,34 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(settings.c_json.b, "22")
     self.assertEqual(settings.c_json.c, True)
 
+  @mock.patch('terra.core.settings.global_templates', [])
+  def test_json_lazy(self):
+    with NamedTemporaryFile(mode='w', dir=self.temp_dir.name,
+                            delete=False) as fid:
+      fid.write('{"a": 15, "b": [1, 2]}')
+
+    with mock.patch('terra.core.settings.json_load',
+                    wraps=json_load) as mock_json_load:
+      settings.configure({'a_json': fid.name,
+                          'b': {'b_json': fid.name},
+                          'c_json': os.path.join(self.temp_dir.name, '..',
+                                                 os.path.basename(
+                                                     self.temp_dir.name),
+                                                 os.path.basename(fid.name))})
+      # Not loaded until used
+      mock_json_load.assert_not_called()
+
+      self.assertEqual(settings.a_json.a, 15)
+      self.assertEqual(settings.b.b_json.a, 15)
+      self.assertEqual(settings.c_json.b, [1, 2])
+      # Only read once
+      self.assertEqual(mock_json_load.call_count, 1)
+
+    # Each include is separate
+    settings.a_json.b.append(3)
+    self.assertEqual(settings.b.b_json.b, [1, 2])
+    self.assertIsInstance(settings.c_json, Settings)
+
   def test_json_serializer(self):
 
     @settings_property
@@ -748,6 +1382,126 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(j['q']['y'], 33)
     self.assertEqual(j['q']['foo']['t'][0], 33)
 
+  def test_json_serializer_cache(self):
+    calls = []
+
+    @settings_property
+    def c(self):
+      calls.append(1)
+      return self.a + self.b
+
+    settings._wrapped = Settings({'a': 11, 'b': 22, 'c': c,
+                                  'q': {'x_dir': '~/foo', 'y': [1]}})
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertEqual(j.c, 33)
+    self.assertEqual(j.q.x_dir, os.path.expanduser('~/foo'))
+    self.assertEqual(len(calls), 1)
+
+    # Unchanged settings are not serialized again
+    self.assertEqual(TerraJSONEncoder.serializableSettings(settings), j)
+    self.assertEqual(len(calls), 1)
+
+    # Any change, nested or not, is picked up
+    settings.q.x_dir = '/bar'
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertEqual(j.q.x_dir, '/bar')
+    self.assertEqual(len(calls), 2)
+
+    settings.q.y.append(2)
+    self.assertEqual(TerraJSONEncoder.serializableSettings(settings).q.y,
+                     [1, 2])
+
+    with settings:
+      settings.a = 1
+      self.assertEqual(TerraJSONEncoder.serializableSettings(settings).c, 23)
+    self.assertEqual(TerraJSONEncoder.serializableSettings(settings).c, 33)
+
+  def test_json_serializer_cache_reads(self):
+    settings._wrapped = Settings({'q': {'y': [1], 'z': {'k': 1}}})
+    j = TerraJSONEncoder.serializableSettings(settings)
+
+    patch = mock.patch('terra.core.settings._serialize_settings',
+                       wraps=_serialize_settings)
+    serialize = patch.start()
+    self.addCleanup(patch.stop)
+
+    def assertCached():
+      count = serialize.call_count
+      result = TerraJSONEncoder.serializableSettings(settings)
+      self.assertEqual(serialize.call_count, count)
+      self.assertEqual(result, j)
+
+    # Only reading mutable values does not invalidate the cache
+    self.assertEqual(settings.q.y, [1])
+    self.assertEqual(settings.q.z.k, 1)
+    self.assertEqual(list(settings.q.items())[0][1], [1])
+    assertCached()
+
+    # Neither do changes to other settings
+    other = Settings({'y': [1]})
+    other.y.append(2)
+    other.x = 1
+    assertCached()
+
+    # Changing a value that was read earlier does
+    y = settings.q.y
+    y.append(2)
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertEqual(j.q.y, [1, 2])
+    assertCached()
+
+    # A value no longer in the settings isn't tracked anymore
+    settings.q.y = [3]
+    j = TerraJSONEncoder.serializableSettings(settings)
+    y.append(3)
+    assertCached()
+
+    # A subtree added from another tree is tracked as part of this tree
+    settings.r = other
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertEqual(j.r.y, [1, 2])
+    settings.r.y.append(3)
+    self.assertEqual(TerraJSONEncoder.serializableSettings(settings).r.y,
+                     [1, 2, 3])
+
+  def test_json_serializer_copy(self):
+    settings._wrapped = Settings({'a': 1, 'q': {'y': [1], 'z': {'k': 1}}})
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertIsInstance(j.q, Settings)
+
+    # Changing a result changes neither the settings nor the cached result
+    j.a = 2
+    j.q.y.append(2)
+    j.q.z.k = 2
+    self.assertEqual(settings.a, 1)
+    self.assertEqual(settings.q.y, [1])
+    j = TerraJSONEncoder.serializableSettings(settings)
+    self.assertEqual(j, {'a': 1, 'q': {'y': [1], 'z': {'k': 1}}})
+
+    # Not even when the result is put back in the settings
+    settings.r = j
+    settings.r.q.y.append(2)
+    self.assertEqual(settings.q.y, [1])
+    self.assertEqual(TerraJSONEncoder.serializableSettings(settings).q.y, [1])
+
+  def test_json_serializer_path_list(self):
+    paths = PathList(['~/a/1', '~/a/2', '/b/3'])
+    settings._wrapped = Settings({'input_files': paths, 'other': paths})
+    serialized = TerraJSONEncoder.serializableSettings(settings)
+    self.assertIsInstance(serialized.input_files, PathList)
+    self.assertEqual(serialized.input_files,
+                     [os.path.expanduser('~/a/1'),
+                      os.path.expanduser('~/a/2'), '/b/3'])
+    self.assertIs(serialized.other, paths)
+
+    # Compact json block, loaded back into a PathList by configure
+    config = json.loads(TerraJSONEncoder.dumps(settings))
+    self.assertTrue(PathList.is_json(config['other']))
+    settings._wrapped = None
+    settings.configure(config)
+    self.assertIsInstance(settings.other, PathList)
+    self.assertEqual(settings.other, paths)
+
   def test_properties_status_file(self):
     settings.configure({})
     with settings:
@@ -889,6 +1643,72 @@ class TestSettings(TestLoggerCase):
     self.assertEqual(settings.compute.arch, "terra.compute.dummy")
     self.assertEqual(settings.a.b.c, 12)
 
+  @mock.patch.dict(os.environ, TERRA_RESOLVE_HOSTNAME_TIMEOUT='0.1',
+                   TERRA_HOSTNAME_CACHE_TTL='600')
+  def test_check_is_loopback(self):
+    from terra.core.settings import check_is_loopback, _hostname_cache_file
+    cache_file = _hostname_cache_file()
+    # The test case keeps the cache out of the user's home
+    self.assertTrue(cache_file.startswith(self.temp_dir.name))
+
+    with mock.patch('socket.getaddrinfo', return_value=[
+        (None, None, None, None, ('127.0.0.1', 0))]) as getaddrinfo:
+      self.assertTrue(check_is_loopback('foo'))
+      self.assertTrue(check_is_loopback('foo'))
+      # Second call is from the cache
+      self.assertEqual(getaddrinfo.call_count, 1)
+
+    with mock.patch('socket.getaddrinfo', return_value=[
+        (None, None, None, None, ('10.1.2.3', 0))]):
+      self.assertFalse(check_is_loopback('bar'))
+    with open(cache_file, 'r') as fid:
+      self.assertEqual(set(json.load(fid)), {'foo', 'bar'})
+
+    # Expired
+    with open(cache_file, 'r') as fid:
+      cache = json.load(fid)
+    cache['foo'][1] -= 601
+    with open(cache_file, 'w') as fid:
+      json.dump(cache, fid)
+    with mock.patch('socket.getaddrinfo', return_value=[
+        (None, None, None, None, ('10.1.2.3', 0))]) as getaddrinfo:
+      self.assertFalse(check_is_loopback('foo'))
+      self.assertFalse(check_is_loopback('foo'))
+      # Looked up again, and cached again
+      self.assertEqual(getaddrinfo.call_count, 1)
+
+    # A ttl of 0 turns the cache off
+    with mock.patch.dict(os.environ, TERRA_HOSTNAME_CACHE_TTL='0'), \
+        mock.patch('socket.getaddrinfo', return_value=[
+            (None, None, None, None, ('127.0.0.1', 0))]):
+      self.assertTrue(check_is_loopback('bar'))
+
+    # DNS that never answers
+    event = threading.Event()
+    with mock.patch('socket.getaddrinfo',
+                    side_effect=lambda *args: event.wait(10)):
+      start = time.time()
+      self.assertTrue(check_is_loopback('baz'))
+      self.assertLess(time.time() - start, 5)
+    event.set()
+    # Timeouts are not cached
+    with open(cache_file, 'r') as fid:
+      self.assertNotIn('baz', json.load(fid))
+    with mock.patch('socket.getaddrinfo', return_value=[
+        (None, None, None, None, ('10.1.2.3', 0))]):
+      self.assertFalse(check_is_loopback('baz'))
+
+    # Only the user can read or write the cache
+    self.assertEqual(stat.S_IMODE(os.stat(cache_file).st_mode), 0o600)
+
+    # A cache anyone can write to is ignored
+    os.chmod(cache_file, 0o666)
+    with mock.patch('socket.getaddrinfo', return_value=[
+        (None, None, None, None, ('127.0.0.1', 0))]) as getaddrinfo:
+      self.assertTrue(check_is_loopback('bar'))
+      self.assertEqual(getaddrinfo.call_count, 1)
+      event.set()
+
   def test_tty(self):
     '''Test tty for default compute'''
     settings.configure({})
@@ -1079,6 +1899,57 @@ class TestValidateKeys(TestLoggerCase):
     validate_keys()
     mock_obj.func.assert_not_called()
 
+  @mock.patch('terra.core.settings.global_templates',
+              [({'a': 111}, {'foo': 'bar'}),
+               ({}, {'a': 11, 'b': {'c': 33}}),
+               ({'a': 11}, {'b': {'d': 44}, 'e': 55})])
+  def test_settings_schema(self):
+    '''Test the schema has the same keys as the default settings'''
+
+    schema = settings_schema()
+    self.assertEqual(schema, {'a': None, 'b': {'c': None, 'd': None},
+                              'e': None})
+    _settings = default_settings()
+    self.assertEqual(set(schema), set(_settings.keys()))
+    self.assertEqual(set(schema['b']), set(_settings.b.keys()))
+    # Compiled once
+    self.assertIs(settings_schema(), schema)
+
+    # Templates changed in place
+    import terra.core.settings
+    terra.core.settings.global_templates[1][1]['b']['h'] = 66
+    templates_changed()
+    self.assertEqual(settings_schema()['b'], {'c': None, 'd': None,
+                                              'h': None})
+    terra.core.settings.global_templates[2][0]['a'] = 111
+    templates_changed()
+    self.assertEqual(settings_schema(), {'a': None,
+                                         'b': {'c': None, 'h': None}})
+
+    settings.add_templates([({}, {'f': {'g': 1}})])
+    self.assertEqual(settings_schema()['f'], {'g': None})
+
+  @mock.patch('terra.core.settings.global_templates',
+              _TemplateList([({}, {'a': 11})]))
+  def test_settings_schema_list_changes(self):
+    import terra.core.settings
+    schema = settings_schema()
+    self.assertEqual(schema, {'a': None})
+
+    # Only compiled again after a change to the list
+    self.assertIs(settings_schema(), schema)
+    terra.core.settings.global_templates.append(({'a': 11}, {'b': 22}))
+    self.assertEqual(settings_schema(), {'a': None, 'b': None})
+    terra.core.settings.global_templates[1] = ({}, {'c': 33})
+    self.assertEqual(settings_schema(), {'a': None, 'c': None})
+    del terra.core.settings.global_templates[0]
+    self.assertEqual(settings_schema(), {'c': None})
+
+    # A different list of templates
+    with mock.patch('terra.core.settings.global_templates', [({}, {'d': 1})]):
+      self.assertEqual(settings_schema(), {'d': None})
+    self.assertEqual(settings_schema(), {'c': None})
+
 
 class TestUnitTests(TestCase):
   # Don't make this part of the TestSettings class, it's a TestLoggerCase
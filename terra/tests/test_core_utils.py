@@ -1,9 +1,13 @@
 from unittest import mock
+import os
 import sys
+import copy
+import json
+import pickle
 
 from .utils import TestCase
 from terra.core.utils import (
-    cached_property, Handler, ClassHandler
+    cached_property, Handler, ClassHandler, PathList
 )
 
 
@@ -211,3 +215,87 @@ class TestClassHandler(TestCase):
 class TestThreadedHandler(TestCase):
   def test_class_handler(self):
     pass
+
+
+class TestPathList(TestCase):
+  paths = ['/data/a/1.tif', '/data/a/2.tif', '/data/b/1.tif', 'rel.tif',
+           '/data/a/3.tif', '/', 'x/', '/data/a/\u00e9.tif']
+
+  def test_sequence(self):
+    path_list = PathList(self.paths)
+    self.assertEqual(len(path_list), len(self.paths))
+    self.assertEqual(list(path_list), self.paths)
+    self.assertEqual(path_list, self.paths)
+    self.assertEqual(self.paths, path_list)
+    self.assertNotEqual(path_list, self.paths[:-1])
+    self.assertEqual(path_list[1], '/data/a/2.tif')
+    self.assertEqual(path_list[-1], self.paths[-1])
+    self.assertEqual(path_list[1:3], self.paths[1:3])
+    self.assertIn('rel.tif', path_list)
+    with self.assertRaises(IndexError):
+      path_list[len(self.paths)]
+    self.assertEqual(path_list.prefixes, ('/data/a/', '/data/b/', '', '/',
+                                          'x/'))
+    self.assertEqual(PathList(), [])
+
+  def test_windows_paths(self):
+    paths = ['C:\\data\\a\\1.tif', 'C:\\data\\a\\2.tif',
+             'C:/data/b/1.tif', 'C:rel.tif']
+    with mock.patch.object(PathList, '_seps', ('\\', '/')):
+      path_list = PathList(paths)
+    self.assertEqual(path_list, paths)
+    self.assertEqual(path_list.prefixes, ('C:\\data\\a\\', 'C:/data/b/', ''))
+    mapped = path_list.map_prefixes(
+        lambda directory: directory.replace('C:', 'D:'))
+    self.assertEqual(mapped, [path.replace('C:', 'D:') for path in paths[:3]]
+                     + ['C:rel.tif'])
+
+    # A \\ is part of the file name on posix
+    with mock.patch.object(PathList, '_seps', ('/',)):
+      self.assertEqual(PathList(paths).prefixes, ('', 'C:/data/b/'))
+
+  def test_immutable(self):
+    path_list = PathList(self.paths)
+    self.assertIs(copy.deepcopy(path_list), path_list)
+    with self.assertRaises(TypeError):
+      path_list[0] = 'foo'
+
+  def test_map_prefixes(self):
+    path_list = PathList(self.paths)
+    mapped = path_list.map_prefixes(
+        lambda directory: directory.replace('/data', '/mnt'))
+    self.assertEqual(mapped, [path.replace('/data', '/mnt')
+                              for path in self.paths])
+    # The original is unchanged
+    self.assertEqual(path_list, self.paths)
+
+    mapped = path_list.map_prefixes(lambda directory: 'C:\\data')
+    self.assertEqual(mapped[0], 'C:\\data\\1.tif')
+
+  def test_json(self):
+    path_list = PathList(self.paths)
+    block = json.loads(json.dumps(path_list.to_json()))
+    self.assertTrue(PathList.is_json(block))
+    self.assertFalse(PathList.is_json({'a': 1}))
+    self.assertEqual(PathList.from_json(block), self.paths)
+    self.assertEqual(PathList.from_json(PathList().to_json()), [])
+
+    for key, value in (('names', 'extra'), ('typecode', 'd'),
+                       ('offsets', 'AAAA'), ('index', '!')):
+      corrupt = copy.deepcopy(block)
+      corrupt[PathList.json_key][key] = value
+      with self.assertRaises(ValueError):
+        PathList.from_json(corrupt)
+
+  def test_undecodable(self):
+    # A file name that isn't valid UTF-8, as os.listdir would return it
+    paths = [os.fsdecode(b'/data/\xff.tif'), '/data/a.tif']
+    path_list = PathList(paths)
+    self.assertEqual(path_list, paths)
+    self.assertEqual(PathList.from_json(
+        json.loads(json.dumps(path_list.to_json()))), paths)
+
+  def test_pickle(self):
+    path_list = pickle.loads(pickle.dumps(PathList(self.paths)))
+    self.assertIsInstance(path_list, PathList)
+    self.assertEqual(path_list, self.paths)
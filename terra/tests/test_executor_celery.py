@@ -1,6 +1,8 @@
 import sys
 import os
 import time
+import logging
+from types import SimpleNamespace
 from unittest import mock, skipUnless
 
 try:
@@ -8,6 +10,8 @@ try:
 except:   # noqa
   celery = None
 
+from terra import settings
+from terra.core.settings import Settings
 from .utils import TestCase
 
 
@@ -196,6 +200,50 @@ class TestCeleryExecutor(TestCase):
     with self.assertRaisesRegex(RuntimeError, "cannot .* after shutdown"):
       self.executor.submit(test)
 
+
+@skipUnless(celery, "Celery not installed")
+class TestCeleryExecutorLogger(TestCase):
+  def setUp(self):
+    self.patches.append(mock.patch.object(settings, '_wrapped', Settings({
+        'terra': {'zone': 'task'},
+        'logging': {'queue_size': 10, 'queue_full': 'block',
+                    'server': {'hostname': 'localhost',
+                               'listen_address': [None, 1234],
+                               'batch_size': 100, 'batch_delay': 0.05,
+                               'batch_compress': True}}})))
+    super().setUp()
+
+  def test_task_log_handler(self):
+    from terra.executor.celery import CeleryExecutor
+    root_logger = logging.getLogger(f'{__name__}.task')
+    sender = SimpleNamespace(main_log_handler=None, root_logger=root_logger)
+
+    CeleryExecutor.reconfigure_logger(sender, pre_run_task=True)
+    handler = sender.main_log_handler
+    self.addCleanup(handler.close)
+    self.assertIn(handler, root_logger.handlers)
+
+    # Not logging to the controller between tasks
+    CeleryExecutor.reconfigure_logger(sender, post_settings_context=True)
+    self.assertNotIn(handler, root_logger.handlers)
+    self.assertIsInstance(sender.main_log_handler, logging.NullHandler)
+
+    # The next task reuses the handler, and its threads
+    CeleryExecutor.reconfigure_logger(sender, pre_run_task=True)
+    self.assertIs(sender.main_log_handler, handler)
+    self.assertEqual(root_logger.handlers, [handler])
+
+    # Unless it logs to another controller
+    settings.logging.server.listen_address = [None, 5678]
+    CeleryExecutor.reconfigure_logger(sender, pre_run_task=True)
+    self.addCleanup(sender.main_log_handler.close)
+    self.assertIsNot(sender.main_log_handler, handler)
+    self.assertEqual(sender.main_log_handler.target.port, 5678)
+    self.assertTrue(handler._closed)
+    self.assertEqual(root_logger.handlers, [sender.main_log_handler])
+    root_logger.removeHandler(sender.main_log_handler)
+
+
 #   def test_import(self):
 #     import terra.executor.celery
 #     from celery._state import _apps
@@ -1,5 +1,6 @@
 from unittest import SkipTest
 import concurrent.futures
+import threading
 
 from terra import settings
 from .utils import (
@@ -9,6 +10,7 @@ from .utils import (
 from terra.executor.utils import ExecutorHandler, Executor
 from terra.executor.dummy import DummyExecutor
 from terra.executor.sync import SyncExecutor
+from terra.executor.thread import ThreadPoolExecutor
 
 
 class TestExecutorHandler(TestExecutorCase, TestSettingsUnconfiguredCase):
@@ -71,6 +73,33 @@ class TestThreadExecutorHandler(TestThreadPoolExecutorCase,
     self.assertIsInstance(Executor._connection(),
                           concurrent.futures.ThreadPoolExecutor)
 
+  def test_thread_settings(self):
+    settings.configure({'executor': {'type': 'ThreadPoolExecutor'},
+                        'a': {'b': 1, 'c': [1]},
+                        'd': {'e': 2}})
+
+    # Make sure each task runs in its own thread
+    barrier = threading.Barrier(2)
+
+    def task(value):
+      barrier.wait(timeout=10)
+      settings.a.b = value
+      settings.a.c.append(value)
+      return settings.a.b, settings.a.c, dict.__getitem__(settings._wrapped,
+                                                          'd')
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      results = list(executor.map(task, [2, 3]))
+
+    for value, (b, c, d) in zip([2, 3], results):
+      self.assertEqual(b, value)
+      self.assertEqual(c, [1, value])
+      # Settings the thread never touched are not copied
+      self.assertIs(d, settings._wrapped['d'])
+
+    self.assertEqual(settings.a.b, 1)
+    self.assertEqual(settings.a.c, [1])
+
 
 class TestUnitTests(TestCase):
   # Don't name this "test*" so normal discover doesn't pick it up, "last*" are
@@ -1,8 +1,15 @@
 from unittest import mock
 import io
+import json
 import os
 import sys
 import logging
+import logging.handlers
+import socket
+import struct
+import tempfile
+import threading
+import time
 import uuid
 import platform
 import warnings
@@ -50,6 +57,16 @@ class TestLogger(TestLoggerConfigureCase):
       with self.assertRaises(ImproperlyConfigured):
         self._logs.configure_logger(None)
 
+  def test_configure_isolated(self):
+    settings._setup()
+    with settings.isolate():
+      # Configured with signals enabled, without configuring the logger again
+      settings.configure({'processing_dir': self.temp_dir.name,
+                          'a': 1})
+      self.assertEqual(settings.a, 1)
+    self.assertTrue(self._logs._configured)
+    self.assertNotIn('a', settings)
+
   def test_port_0(self):
     settings.configure({'logging': {'server': {'port': 0,
                                                'family': 'AF_INET'}},
@@ -160,6 +177,42 @@ class TestLogger(TestLoggerConfigureCase):
     self.assertIn(f'({platform.node()}:controller)',
                   self._logs.stderr_handler.format(record))
 
+  def test_record_factory(self):
+    test_logger = logger.getLogger(f'{__name__}.test_record_factory')
+
+    def make_record():
+      return test_logger.makeRecord(__name__, logger.ERROR, __file__, 0,
+                                    "Hiya", (), None)
+
+    record = make_record()
+    self.assertEqual(record.hostname, platform.node())
+    self.assertEqual(record.zone, 'preconfig')
+
+    settings._setup()
+    self.assertEqual(make_record().zone, 'controller')
+
+    # The cached zone is used until the settings change
+    with mock.patch.object(type(settings._wrapped), '__getattr__',
+                           side_effect=AssertionError):
+      self.assertEqual(make_record().zone, 'controller')
+    settings.terra.zone = 'task'
+    self.assertEqual(make_record().zone, 'task')
+    with settings:
+      settings.terra.zone = 'runner'
+      self.assertEqual(make_record().zone, 'runner')
+    self.assertEqual(make_record().zone, 'task')
+
+    # Records from another process keep their hostname and zone
+    record = logging.makeLogRecord({'hostname': 'host', 'zone': 'runner'})
+    self.assertEqual((record.hostname, record.zone), ('host', 'runner'))
+
+  def test_terra_add_filter_deprecated(self):
+    with self.assertWarns(DeprecationWarning):
+      add_filter = logger.TerraAddFilter()
+    record = logging.makeLogRecord({'hostname': 'host', 'zone': 'runner'})
+    self.assertTrue(add_filter.filter(record))
+    self.assertEqual((record.hostname, record.zone), ('host', 'runner'))
+
   # Test https://stackoverflow.com/q/19615876/4166604
   def test_funcName(self):
     stream = io.StringIO()
@@ -169,12 +222,59 @@ class TestLogger(TestLoggerConfigureCase):
     handler.setFormatter(formatter)
     handler.setLevel(logger.DEBUG2)
     test_logger.addHandler(handler)
+    self.addCleanup(test_logger.removeHandler, handler)
     test_logger.setLevel(logger.DEBUG2)
 
     test_logger.debug2('hiya')
     self.assertEqual(stream.getvalue(),
                      f'{os.path.basename(__file__)}:test_funcName hiya\n')
 
+  def test_caller_lookup(self):
+    test_logger = logger.getLogger(f'{__name__}.test_caller_lookup')
+    with mock.patch.object(logger, '_caller_lookup', None):
+      settings.configure({'processing_dir': self.temp_dir.name,
+                          'logging': {'format': '%(zone)s %(message)s'}})
+      self.assertFalse(logger._caller_needed())
+      self.assertEqual(test_logger.findCaller(),
+                       ("(unknown file)", 0, "(unknown function)", None))
+      # stack_info still needs the stack
+      self.assertEqual(test_logger.findCaller(stack_info=True)[2],
+                       'test_caller_lookup')
+
+      # Adding a handler is picked up on its own
+      handler = logging.StreamHandler(io.StringIO())
+      handler.setFormatter(logging.Formatter('{funcName} {message}',
+                                             style='{'))
+      test_logger.addHandler(handler)
+      try:
+        self.assertTrue(logger._caller_needed())
+        test_logger.error('Hiya')
+        self.assertEqual(handler.stream.getvalue(),
+                         'test_caller_lookup Hiya\n')
+      finally:
+        test_logger.removeHandler(handler)
+      self.assertFalse(logger._caller_needed())
+
+      # Also on the root logger
+      self._logs.root_logger.addHandler(handler)
+      try:
+        self.assertTrue(logger._caller_needed())
+      finally:
+        self._logs.root_logger.removeHandler(handler)
+      self.assertFalse(logger._caller_needed())
+
+      # Changing a formatter is not
+      formatter = self._logs.stderr_handler.formatter
+      self._logs.stderr_handler.setFormatter(
+          logging.Formatter('%(lineno)d %(message)s'))
+      try:
+        self.assertFalse(logger._caller_needed())
+        logger.reset_caller_lookup()
+        self.assertTrue(logger._caller_needed())
+      finally:
+        self._logs.stderr_handler.setFormatter(formatter)
+        logger.reset_caller_lookup()
+
   def test_funcName_stackinfo(self):
     stream = io.StringIO()
     test_logger = logger.getLogger(f'{__name__}.test_funcName')
@@ -183,6 +283,7 @@ class TestLogger(TestLoggerConfigureCase):
     handler.setFormatter(formatter)
     handler.setLevel(logger.DEBUG2)
     test_logger.addHandler(handler)
+    self.addCleanup(test_logger.removeHandler, handler)
     test_logger.setLevel(logger.DEBUG2)
 
     test_logger.debug2('byeee', stack_info=True)
@@ -198,17 +299,18 @@ class TestLogger(TestLoggerConfigureCase):
 
     self.assertEqual(settings.logging.level, "DEBUG1")
 
-    self.assertEqual(self._logs.root_logger.level, logger.NOTSET)
+    self.assertEqual(self._logs.root_logger.level, logger.DEBUG1)
     self.assertEqual(self._logs.stderr_handler.level, logger.DEBUG1)
 
   def test_level_case_insensitive(self):
     with self.assertLogs(level=logger.DEBUG2):
       settings.configure({'processing_dir': self.temp_dir.name,
                           'logging': {'level': 'debug2'}})
+      # assertLogs restores the root level on exit
+      self.assertEqual(self._logs.root_logger.level, logger.DEBUG2)
 
     self.assertEqual(settings.logging.level, "debug2")
 
-    self.assertEqual(self._logs.root_logger.level, logger.NOTSET)
     self.assertEqual(self._logs.stderr_handler.level, logger.DEBUG2)
 
   def test_replay(self):
@@ -250,7 +352,39 @@ class TestLogger(TestLoggerConfigureCase):
 
     # Test the defaults
     self.assertEqual(log_handler.level, logger.ERROR)
-    self.assertEqual(self._logs.root_logger.level, logger.NOTSET)
+    self.assertEqual(self._logs.root_logger.level, logger.ERROR)
+
+  def test_root_level(self):
+    settings._setup()
+    self.assertEqual(self._logs.root_logger.level, logger.ERROR)
+
+    # Disabled levels are rejected before a record is made
+    test_logger = logger.getLogger(f'{__name__}.test_root_level')
+    with mock.patch.object(logger.Logger, 'makeRecord') as make_record:
+      test_logger.debug4('Hiya')
+    make_record.assert_not_called()
+
+    with settings:
+      settings.logging.level = 'DEBUG2'
+      self._logs.reconfigure_logger()
+      self.assertEqual(self._logs.root_logger.level, logger.DEBUG2)
+    self.assertEqual(self._logs.root_logger.level, logger.ERROR)
+
+    # Handlers of other loggers need their records too
+    handler = logging.StreamHandler(io.StringIO())
+    handler.setLevel(logger.DEBUG3)
+    test_logger.addHandler(handler)
+    self.addCleanup(test_logger.removeHandler, handler)
+    self._logs.set_root_level()
+    self.assertEqual(self._logs.root_logger.level, logger.DEBUG3)
+    test_logger.debug3('Hiya')
+    self.assertEqual(handler.stream.getvalue(), 'Hiya\n')
+
+    # Unless their logger has a level of its own
+    test_logger.setLevel(logger.DEBUG3)
+    self.addCleanup(test_logger.setLevel, logger.NOTSET)
+    self._logs.set_root_level()
+    self.assertEqual(self._logs.root_logger.level, logger.ERROR)
 
   def test_debug1(self):
     message = str(uuid.uuid4())
@@ -323,6 +457,317 @@ class TestRingBuffer(TestLoggerCase):
     self.assertEqual(handler.buffer[1].msg, '13')
 
 
+class TestBatchingSocketHandler(TestCase):
+  def make_record(self, msg, *args):
+    return logging.makeLogRecord({'name': 'batch', 'msg': msg, 'args': args,
+                                  'levelno': logging.INFO,
+                                  'levelname': 'INFO'})
+
+  def receive(self, sock):
+    records = []
+    server = mock.Mock(logname=None, allow_pickle=False)
+    with mock.patch.object(logger.LogRecordStreamHandler, 'handleLogRecord',
+                           lambda self, record: records.append(record)):
+      logger.LogRecordStreamHandler(sock, None, server)
+    return records
+
+  def test_batches(self):
+    for compress in (True, False):
+      sender, receiver = socket.socketpair()
+      handler = logger.BatchingSocketHandler(None, None, batch_size=3,
+                                             batch_delay=10,
+                                             compress=compress)
+      handler.makeSocket = lambda timeout=1: sender
+      sent = []
+      send = handler.send
+
+      def record_send(data):
+        sent.append(data)
+        send(data)
+      handler.send = record_send
+
+      # Single record frames still work
+      logging.handlers.SocketHandler.send(
+          handler, handler.makePickle(self.make_record('single')))
+      for index in range(3):
+        handler.handle(self.make_record('batched %d', index))
+
+      # A full batch is sent without waiting for the delay
+      for _ in range(500):
+        if sent:
+          break
+        time.sleep(0.01)
+      self.assertEqual(len(sent), 1)
+
+      handler.handle(self.make_record('flushed'))
+      handler.close()
+      self.assertEqual(len(sent), 2)
+      sender.close()
+
+      records = self.receive(receiver)
+      receiver.close()
+      self.assertEqual([record.getMessage() for record in records],
+                       ['single', 'batched 0', 'batched 1', 'batched 2',
+                        'flushed'])
+
+  def test_delay(self):
+    handler = logger.BatchingSocketHandler(None, None, batch_delay=0.01)
+    sent = []
+    handler.send = lambda data: sent.append(data)
+    handler.handle(self.make_record('delayed'))
+    for _ in range(500):
+      if sent:
+        break
+      time.sleep(0.01)
+    self.assertEqual(len(sent), 1)
+    handler.close()
+
+  def test_after_fork(self):
+    handler = logger.BatchingSocketHandler(None, None)
+    self.assertIn(handler, logger._fork_handlers)
+    handler.pending.append(b'parent')
+    # Held by a thread of the parent when it forked
+    handler._send_lock.acquire()
+    handler._after_fork_in_child()
+    self.assertEqual(handler.pending, [])
+    self.assertFalse(handler._send_lock.locked())
+    sent = []
+    handler.send = lambda data: sent.append(data)
+    handler.handle(self.make_record('child'))
+    handler.close()
+    self.assertEqual(len(sent), 1)
+
+
+class TestBackgroundQueueHandler(TestCase):
+  class SlowHandler(logging.Handler):
+    def __init__(self):
+      super().__init__()
+      self.unblock = threading.Event()
+      self.records = []
+      self.threads = set()
+
+    def emit(self, record):
+      self.unblock.wait(5)
+      self.threads.add(threading.current_thread())
+      self.records.append(record)
+
+  def test_background(self):
+    target = self.SlowHandler()
+    handler = logger.BackgroundQueueHandler(target)
+    try:
+      raise ValueError('oops')
+    except ValueError:
+      handler.handle(logging.makeLogRecord(
+          {'msg': 'Hi %s', 'args': ('there',), 'exc_info': sys.exc_info(),
+           'levelno': logging.ERROR}))
+    handler.handle(logging.makeLogRecord({'msg': 'second',
+                                          'levelno': logging.INFO}))
+    # Logging did not wait on the target
+    self.assertEqual(target.records, [])
+
+    target.unblock.set()
+    handler.close()
+    self.assertEqual([record.getMessage() for record in target.records],
+                     ['Hi there', 'second'])
+    self.assertIsNone(target.records[0].exc_info)
+    self.assertIn('ValueError: oops', target.records[0].exc_text)
+    self.assertNotIn(threading.current_thread(), target.threads)
+
+  def test_drop(self):
+    target = self.SlowHandler()
+    handler = logger.BackgroundQueueHandler(target, maxsize=2, block=False)
+    for index in range(10):
+      handler.handle(logging.makeLogRecord({'msg': str(index),
+                                            'levelno': logging.INFO}))
+    target.unblock.set()
+    with mock.patch('sys.stderr', io.StringIO()) as stderr:
+      handler.close()
+    # The listener may have taken one off the queue before it was full
+    self.assertIn(len(target.records), (2, 3))
+    self.assertEqual(handler.dropped, 10 - len(target.records))
+    self.assertIn(f'{handler.dropped} log record(s) were dropped',
+                  stderr.getvalue())
+
+  def test_after_fork(self):
+    target = self.SlowHandler()
+    target.unblock.set()
+    handler = logger.BackgroundQueueHandler(target)
+    self.addCleanup(handler.close)
+    self.assertIn(handler, logger._fork_handlers)
+    parent_listener = handler.listener
+    parent_queue = handler.queue
+
+    # As if in a forked child, where the listener thread is gone
+    handler._after_fork_in_child()
+    self.assertIsNone(handler.listener)
+    self.assertIsNot(handler.queue, parent_queue)
+
+    # Started again the first time the child logs
+    handler.handle(logging.makeLogRecord({'msg': 'child',
+                                          'levelno': logging.INFO}))
+    self.assertIsNotNone(handler.listener)
+    handler.flush()
+    self.assertEqual([record.getMessage() for record in target.records],
+                     ['child'])
+    parent_listener.stop()
+
+
+class TestLogRecordSocketReceiver(TestCase):
+  def serve(self, receiver):
+    self.records = []
+    patch = mock.patch.object(
+        logger.LogRecordStreamHandler, 'handleLogRecord',
+        lambda handler, record: self.records.append(record.getMessage()))
+    patch.start()
+    self.addCleanup(patch.stop)
+    self.addCleanup(receiver.server_close)
+
+    thread = threading.Thread(target=receiver.serve_until_stopped, daemon=True)
+    thread.start()
+
+    def stop():
+      receiver.abort = True
+      thread.join(timeout=5)
+    self.addCleanup(stop)
+
+  def wait_for(self, count):
+    for _ in range(500):
+      if len(self.records) >= count:
+        break
+      time.sleep(0.01)
+    return sorted(self.records)
+
+  def test_many_connections(self):
+    with tempfile.TemporaryDirectory() as temp_dir:
+      for family, address in (
+          ('AF_INET', ('127.0.0.1', 0)),
+          ('AF_UNIX', os.path.join(temp_dir, 'log.sock'))):
+        receiver = logger.LogRecordSocketReceiver(address, family)
+        self.serve(receiver)
+
+        handlers = []
+        for index in range(200):
+          if family == 'AF_UNIX':
+            handler = logger.JsonSocketHandler(receiver.server_address, None)
+          else:
+            handler = logger.JsonSocketHandler(*receiver.server_address)
+          handlers.append(handler)
+          handler.handle(logging.makeLogRecord({'msg': f'{index:03d}'}))
+        for handler in handlers:
+          handler.handle(logging.makeLogRecord({'msg': 'last'}))
+          handler.close()
+
+        self.assertEqual(self.wait_for(400),
+                         [f'{index:03d}' for index in range(200)]
+                         + ['last'] * 200)
+        receiver.abort = True
+
+  def test_frame_too_large(self):
+    receiver = logger.LogRecordSocketReceiver(('127.0.0.1', 0))
+    receiver.max_frame_size = 1000
+    self.serve(receiver)
+
+    with mock.patch.object(receiver, 'handle_error') as handle_error, \
+         socket.create_connection(receiver.server_address) as sock:
+      sock.sendall(struct.pack('>L', 1001) + b'x' * 100)
+      sock.settimeout(5)
+      # The receiver hangs up
+      self.assertEqual(sock.recv(1), b'')
+    handle_error.assert_called_once()
+
+    # Other connections are not affected
+    handler = logger.JsonSocketHandler(*receiver.server_address)
+    handler.handle(logging.makeLogRecord({'msg': 'fine'}))
+    handler.close()
+    self.assertEqual(self.wait_for(1), ['fine'])
+
+  def test_large_record(self):
+    receiver = logger.LogRecordSocketReceiver(('127.0.0.1', 0))
+    receiver.read_size = 64
+    self.serve(receiver)
+
+    handler = logger.JsonSocketHandler(*receiver.server_address)
+    for msg in ('small', 'x' * 100000, 'after'):
+      handler.handle(logging.makeLogRecord({'msg': msg}))
+    handler.close()
+    self.assertEqual(self.wait_for(3), sorted(['small', 'x' * 100000,
+                                               'after']))
+
+  def test_connection_buffer(self):
+    sock, other = socket.socketpair()
+    self.addCleanup(sock.close)
+    self.addCleanup(other.close)
+    frames = []
+    handler = mock.Mock()
+    handler.handleFrame = lambda slen, frame: frames.append(bytes(frame))
+    connection = logger._LogConnection(sock, handler, 16)
+    self.assertEqual(len(connection.buffer), 16)
+
+    # Grows to fit the frame being read
+    other.sendall(struct.pack('>L', 100) + b'x' * 10)
+    while connection.end < 14:
+      connection.receive()
+    connection.process(1000)
+    self.assertEqual(len(connection.buffer), 104)
+
+    # And shrinks back once it is read
+    other.sendall(b'x' * 90 + struct.pack('>L', 2) + b'yy')
+    while len(frames) < 2:
+      connection.receive()
+      connection.process(1000)
+    self.assertEqual(frames, [b'x' * 100, b'yy'])
+    self.assertEqual(len(connection.buffer), 16)
+
+  def test_pickle(self):
+    record = logging.makeLogRecord({'msg': 'pickled'})
+    for allow_pickle in (False, True):
+      receiver = logger.LogRecordSocketReceiver(('127.0.0.1', 0),
+                                                allow_pickle=allow_pickle)
+      self.serve(receiver)
+      handler = logging.handlers.SocketHandler(*receiver.server_address)
+      with mock.patch.object(receiver, 'handle_error') as handle_error:
+        handler.handle(record)
+        handler.close()
+        if allow_pickle:
+          self.assertEqual(self.wait_for(1), ['pickled'])
+        else:
+          for _ in range(500):
+            if handle_error.called:
+              break
+            time.sleep(0.01)
+          handle_error.assert_called_once()
+          self.assertEqual(self.records, [])
+      receiver.abort = True
+
+  def test_json_record(self):
+    record = logging.makeLogRecord({'msg': 'Hi %s', 'args': ('there',),
+                                    'levelno': logging.WARNING,
+                                    'hostname': 'host', 'zone': 'task'})
+    try:
+      raise ValueError('oops')
+    except ValueError:
+      record.exc_info = sys.exc_info()
+    data = logger.JsonSocketHandler(None, None).makePickle(record)
+
+    slen = struct.unpack('>L', data[:4])[0]
+    handler = logger.LogRecordStreamHandler.for_connection(
+        mock.Mock(logname=None), None)
+    decoded = logging.makeLogRecord(handler.decode(slen, data[4:]))
+    self.assertEqual(decoded.getMessage(), 'Hi there')
+    self.assertEqual(decoded.levelno, logging.WARNING)
+    self.assertEqual(decoded.zone, 'task')
+    self.assertIn('ValueError: oops', decoded.exc_text)
+
+    # Nothing in a JSON record can replace a method, or have the wrong type
+    for obj in ({'msg': 'x', 'getMessage': 'oops'},
+                {'msg': 'x', '__class__': 'oops'},
+                {'msg': 'x', 'levelno': 'oops'},
+                ['msg']):
+      data = json.dumps(obj).encode()
+      with self.assertRaises(ValueError):
+        handler.decode(logger._json_frame | len(data), data)
+
+
 class TestUnitTests(TestCase):
   def last_test_logger(self):
     import logging
@@ -1,6 +1,7 @@
 import os
 
-from .utils import TestCase
+# Not .utils' TestCase, whose setUp changes the environment this checks
+from vsi.test.utils import TestCase
 from terra.tests import original_environ
 
 
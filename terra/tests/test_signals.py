@@ -1,3 +1,9 @@
+import asyncio
+import threading
+import contextvars
+from unittest import mock
+
+from terra.core import signals
 from terra.core.signals import Signal, receiver
 from .utils import TestSignalCase
 
@@ -148,6 +154,207 @@ class TestSignals(TestSignalCase):
     self.signal.send(sender=self.sender)
     self.assertEqual(self.count, 1.1)
 
+  def test_dispatch_table(self):
+    self.signal = Signal()
+    self.sender = object()
+    other = object()
+
+    def receiver1(sender, **kwargs):
+      return 1
+
+    def receiver2(sender, **kwargs):
+      return 2
+
+    self.signal.connect(receiver1)
+    self.signal.connect(receiver2, sender=self.sender)
+    self.assertEqual(self.signal.send(sender=self.sender),
+                     [(receiver1, 1), (receiver2, 2)])
+    self.assertEqual(self.signal.send(sender=other), [(receiver1, 1)])
+    dispatch = self.signal._dispatch
+
+    # Sending does not rebuild the table
+    self.signal.send(sender=self.sender)
+    self.assertIs(self.signal._dispatch, dispatch)
+    self.assertIsInstance(dispatch[0], tuple)
+
+    self.signal.disconnect(receiver1)
+    self.assertEqual(self.signal.send(sender=other), [])
+    self.assertEqual(self.signal.send(sender=self.sender), [(receiver2, 2)])
+
+    # Garbage collected receiver
+    del receiver2
+    self.assertIsNone(self.signal._dispatch)
+    self.assertEqual(self.signal.send(sender=self.sender), [])
+    self.assertEqual(self.signal.receivers, [])
+
+  def test_disabled(self):
+    self.signal = Signal()
+    self.signal.connect(self.signal_handle1)
+    self.sender = object()
+
+    with signals.disabled():
+      self.assertEqual(self.signal.send(sender=self.sender), [])
+      self.assertEqual(self.signal.send_robust(sender=self.sender), [])
+    self.assertEqual(self.signal.send(sender=self.sender),
+                     [(self.signal_handle1, 57)])
+
+  def test_send_async(self):
+    self.signal = Signal()
+    self.sender = object()
+    release = threading.Event()
+    threads = {}
+
+    def critical(sender, **kwargs):
+      threads['critical'] = threading.current_thread()
+      return 1
+
+    def background(sender, **kwargs):
+      release.wait(5)
+      threads['background'] = threading.current_thread()
+      return 2
+
+    def background_fail(sender, **kwargs):
+      raise TypeError('Foo is not Bar')
+
+    async def background_coroutine(sender, **kwargs):
+      await asyncio.sleep(0)
+      return 3
+
+    self.signal.connect(background, ordering_critical=False)
+    self.signal.connect(critical)
+    self.signal.connect(background_fail, ordering_critical=False)
+    self.signal.connect(background_coroutine, ordering_critical=False)
+
+    logged = threading.Event()
+    with mock.patch.object(signals.logger, 'error',
+                           side_effect=lambda *a, **kw: logged.set()):
+      # Does not wait for the background receivers
+      results = self.signal.send_async(sender=self.sender)
+      self.assertEqual([r for r, _ in results],
+                       [background, critical, background_fail,
+                        background_coroutine])
+      self.assertTrue(results[1][1].done())
+      self.assertEqual(results[1][1].result(), 1)
+      self.assertFalse(results[0][1].done())
+      release.set()
+
+      self.assertEqual(results[0][1].result(timeout=5), 2)
+      with self.assertRaises(TypeError):
+        results[2][1].result(timeout=5)
+      self.assertTrue(logged.wait(5))
+    self.assertEqual(results[3][1].result(timeout=5), 3)
+    self.assertIs(threads['critical'], threading.current_thread())
+    self.assertIsNot(threads['background'], threading.current_thread())
+
+    # send still waits for everything
+    self.signal.disconnect(background_fail)
+    self.assertEqual(self.signal.send(sender=self.sender),
+                     [(background, 2), (critical, 1),
+                      (background_coroutine, 3)])
+
+  def test_send_async_coroutine(self):
+    self.signal = Signal(name='test_signal')
+    self.sender = object()
+    var = contextvars.ContextVar('var', default=None)
+    logged = threading.Event()
+
+    async def coroutine(sender, **kwargs):
+      await asyncio.sleep(0)
+      return var.get()
+
+    async def coroutine_fail(sender, **kwargs):
+      raise TypeError('Foo is not Bar')
+
+    self.signal.connect(coroutine, ordering_critical=False)
+    self.signal.connect(coroutine_fail, ordering_critical=False)
+
+    def send():
+      var.set(57)
+      return self.signal.send_async(sender=self.sender)
+
+    with mock.patch.object(signals, '_timing', True), \
+         mock.patch.object(signals, '_timings', {}), \
+         mock.patch.object(signals.logger, 'error',
+                           side_effect=lambda *a, **kw: logged.set()) \
+            as error:
+      # Runs in the sender's context
+      results = contextvars.copy_context().run(send)
+      self.assertEqual(results[0][1].result(timeout=5), 57)
+      with self.assertRaises(TypeError):
+        results[1][1].result(timeout=5)
+
+      # Timed like any other receiver
+      name = f'{__name__}.TestSignals.test_send_async_coroutine.<locals>.'
+      self.assertEqual(signals.receiver_timings()[
+          ('test_signal', name + 'coroutine')][0], 1)
+
+      # The error is logged, even if nobody looks at the result
+      self.assertTrue(logged.wait(5))
+      self.assertEqual(error.call_count, 1)
+      self.assertIsInstance(error.call_args[1]['exc_info'], TypeError)
+
+  def test_send_async_critical_error(self):
+    self.signal = Signal()
+    self.sender = object()
+    self.signal.connect(self.fail2)
+    with self.assertRaises(TypeError):
+      self.signal.send_async(sender=self.sender)
+
+  def test_async_receiver(self):
+    self.signal = Signal()
+    self.sender = object()
+
+    async def coroutine(sender, **kwargs):
+      await asyncio.sleep(0)
+      return 57
+
+    self.signal.connect(coroutine)
+    self.assertEqual(self.signal.send(sender=self.sender),
+                     [(coroutine, 57)])
+    self.assertEqual(self.signal.send_robust(sender=self.sender),
+                     [(coroutine, 57)])
+    self.assertEqual(self.signal.send_async(sender=self.sender)[0][1].result(),
+                     57)
+
+  def test_async_receiver_on_background_loop(self):
+    self.signal = Signal()
+    self.sender = object()
+    inner = Signal()
+
+    async def coroutine(sender, **kwargs):
+      return 57
+
+    async def send_inner(sender, **kwargs):
+      # Runs on the background event loop
+      with self.assertRaisesRegex(RuntimeError, 'deadlock'):
+        inner.send(sender=sender)
+      # send_async does not wait, so it works
+      return inner.send_async(sender=sender)[0][1]
+
+    inner.connect(coroutine, ordering_critical=False)
+    self.signal.connect(send_inner)
+    future = self.signal.send(sender=self.sender)[0][1]
+    self.assertEqual(future.result(timeout=5), 57)
+
+  def test_receiver_timings(self):
+    self.signal = Signal(name='test_signal')
+    self.sender = object()
+    self.signal.connect(self.signal_handle1)
+    self.signal.connect(self.fail2)
+
+    with mock.patch.object(signals, '_timing', True), \
+         mock.patch.object(signals, '_timings', {}):
+      self.signal.send_robust(sender=self.sender)
+      self.signal.send_robust(sender=self.sender)
+      timings = signals.receiver_timings()
+
+    name = f'{__name__}.TestSignals.'
+    self.assertEqual(set(timings), {('test_signal', name + 'signal_handle1'),
+                                    ('test_signal', name + 'fail2')})
+    count, total, maximum = timings[('test_signal', name + 'fail2')]
+    self.assertEqual(count, 2)
+    self.assertGreaterEqual(total, maximum)
+
 
 # This no longer matters, as signals are disabled in unitted tests now?
 # class TestUnitTests(TestCase):
@@ -8,6 +8,7 @@ from .utils import TestCase, TestSettingsConfigureCase
 # from .test_compute_utils import TestComputeUtilsCase
 import terra.utils.path as utils
 from terra.core.settings import ObjectDict
+from terra.core.utils import PathList
 from terra import settings
 
 
@@ -137,6 +138,28 @@ class TestTranslateUtils(TestCase):
   def test_translate_settings_paths_windows(self):
     self._test_translate_settings_paths('windows')
 
+  def test_patch_volume_path_list(self):
+    volume_map = [('/foo/bar', '/dst')]
+    paths = ['/foo/bar/car/a', '/foo/bar/b', '/dst/same', '/foo/far/c']
+    patched = utils.patch_volume(PathList(paths), volume_map)
+    self.assertIsInstance(patched, PathList)
+    self.assertEqual(patched, [utils.patch_volume(path, volume_map)
+                               for path in paths])
+
+    # A volume inside a directory in the list
+    volume_map = [('/foo/bar/b', '/b'), ('/foo', '/dst')]
+    patched = utils.patch_volume(PathList(paths), iter(volume_map))
+    self.assertEqual(patched, [utils.patch_volume(path, volume_map)
+                               for path in paths])
+    self.assertEqual(patched[1], '/b')
+
+  def test_translate_settings_paths_path_list(self):
+    volume_map = [('/foo/bar', '/dst')]
+    config = self._mock_terra_config(
+        {'some_files': PathList(['/foo/bar/a', '/foo/bar/car/b'])})
+    new_config = utils.translate_settings_paths(config, volume_map)
+    self.assertEqual(new_config['some_files'], ['/dst/a', '/dst/car/b'])
+
   def test_logger_address(self):
     # Test that the BSD Unix Socket translates the name properly
     config = self._mock_terra_config()
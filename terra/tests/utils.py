@@ -1,14 +1,17 @@
 import os
 import sys
 import json
+import logging
 from unittest import mock
 
 from vsi.test.utils import (
-  TestCase, make_traceback, TestNamedTemporaryFileCase
+  TestCase as _TestCase, make_traceback,
+  TestNamedTemporaryFileCase as _TestNamedTemporaryFileCase
 )
 
 from terra import settings
 from terra.core.settings import ObjectDict
+import terra.core.signals
 
 
 __all__ = ["TestCase", "make_traceback", "TestNamedTemporaryFileCase",
@@ -17,6 +20,24 @@ __all__ = ["TestCase", "make_traceback", "TestNamedTemporaryFileCase",
            "TestLoggerConfigureCase"]
 
 
+class TestCase(_TestCase):
+  '''
+  A Test Case that keeps the user's cache directory (e.g. the host name cache
+  of :func:`terra.core.settings.check_is_loopback`) in the test's temporary
+  directory, so tests never read or leave answers in the real one
+  '''
+
+  def setUp(self):
+    self.patches.append(mock.patch.dict(
+        os.environ,
+        {'XDG_CACHE_HOME': os.path.join(self.temp_dir.name, 'cache')}))
+    super().setUp()
+
+
+class TestNamedTemporaryFileCase(TestCase, _TestNamedTemporaryFileCase):
+  pass
+
+
 class TestSettingsUnconfiguredCase(TestCase):
   '''
   A Test Case that is ready to allow terra settings to be configured for each
@@ -108,6 +129,7 @@ class TestLoggerCase(TestSettingsUnconfiguredCase, TestNamedTemporaryFileCase):
     except AttributeError:
       pass
     self._logs.root_logger.handlers = []
+    self._logs.root_logger.setLevel(logging.NOTSET)
     import terra.core.signals
     terra.core.signals.post_settings_configured.disconnect(
         self._logs.configure_logger)
@@ -147,28 +169,10 @@ class TestExecutorCase(TestCase):
 
 class TestThreadPoolExecutorCase(TestExecutorCase):
   '''
-  Special care is needed for ThreadPoolExecutor because it downcasts settings
+  Test case for the :class:`terra.executor.thread.ThreadPoolExecutor`, which
+  runs tasks in isolated settings contexts
   '''
 
-  def setUp(self):
-    self.settings_class_patch = mock.patch.object(
-        settings, '__class__', type(settings), create=False)
-    super().setUp()
-    self.settings_class_patch.start()
-    # This mock behavior needs to be modified, because setting __class__ is
-    # unlike normal attributes, it doesn't get overwritten in __dict__, so
-    # setting is_local prevents delattr being called on __class__, which would
-    # be the wrong thing to do.
-    self.settings_class_patch.is_local = True
-
-    # This class does not mock or clean up __wrapped or __tls, but they do not
-    # introduce sideeffects.
-
-  def tearDown(self):
-    # This has to be stopped before the rest, or else a setattr error occurs.
-    self.settings_class_patch.stop()
-    super().tearDown()
-
 
 class TestSignalCase(TestCase):
   '''
@@ -180,6 +184,9 @@ class TestSignalCase(TestCase):
 
   def setUp(self):
     self.patches.append(mock.patch.dict(os.environ, TERRA_UNITTEST='0'))
+    # The signals only read TERRA_UNITTEST once, on import
+    self.patches.append(mock.patch.object(terra.core.signals, '_disabled',
+                                          False))
     super().setUp()
 
 
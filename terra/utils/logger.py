@@ -157,4 +157,6 @@ def connect_log_terra_version(app_name, terra_prefix=None):
                  app_name=app_name,
                  terra_prefix=terra_prefix)
 
-  terra.core.signals.logger_configure.connect(func, weak=False)
+  # git describe can be slow, and nothing depends on it
+  terra.core.signals.logger_configure.connect(func, weak=False,
+                                              ordering_critical=False)
@@ -5,6 +5,7 @@ from vsi.tools.python import nested_patch
 
 from terra import settings
 from terra.core.settings import filename_suffixes, TerraJSONEncoder
+from terra.core.utils import PathList
 from terra.logger import getLogger
 logger = getLogger(__name__)
 
@@ -55,9 +56,13 @@ def patch_volume(value, volume_map, container_platform='linux'):
   '''
   Translate path value according to volume_map.
 
+  A :class:`terra.core.utils.PathList` is translated by translating the
+  directories in its prefix table, unless a volume is mounted below one of
+  them.
+
   Parameters
   ----------
-  value : :obj:`str`
+  value : :obj:`str` or :class:`terra.core.utils.PathList`
     Path value on the host
   volume_map : :obj:`list` of :obj:`tuple` of :obj:`str`
     List of tuples. Each tuple contains two strings of the form
@@ -73,6 +78,9 @@ def patch_volume(value, volume_map, container_platform='linux'):
     function returns the original value.
 
   '''
+  if isinstance(value, PathList):
+    return _patch_path_list(value, list(volume_map), container_platform)
+
   if isinstance(value, str):
     # If we don't expand before resolve, then both ${FOO} and ~/foo are treated
     # as relative paths, and the PWD is prepended. Further, without proper
@@ -98,19 +106,32 @@ def patch_volume(value, volume_map, container_platform='linux'):
   return value
 
 
+def _patch_path_list(value, volume_map, container_platform):
+  host_paths = [host for host, _ in pathlib_map(volume_map,
+                                                container_platform)]
+  for prefix in value.prefixes:
+    directory = pathlib.Path(os.path.expandvars(prefix or '.'))
+    directory = directory.expanduser().resolve()
+    if any(directory in host.parents for host in host_paths):
+      # A volume is mounted inside the directory (e.g. a single file), so the
+      # directory alone can't tell where its files go
+      return PathList(patch_volume(path, volume_map, container_platform)
+                      for path in value)
+
+  return value.map_prefixes(
+      lambda directory: patch_volume(directory, volume_map,
+                                     container_platform))
+
+
 def translate_settings_paths(container_config, volume_map,
                              container_platform='linux'):
 
   if os.name == "nt":  # pragma: no linux cover
     logger.warning("Windows volume mapping is experimental.")
 
-  if container_config.logging.server.family == 'AF_UNIX':
-    container_config.logging.server.listen_address = patch_volume(
-        container_config.logging.server.listen_address,
-        reversed(volume_map))
-
-  # Apply map translation to settings configuration
-  return nested_patch(
+  # Apply map translation to settings configuration. This is a copy, so
+  # container_config is unchanged
+  container_config = nested_patch(
       container_config,
       lambda key, value: (isinstance(key, str)
                           and any(key.endswith(pattern)
@@ -118,6 +139,13 @@ def translate_settings_paths(container_config, volume_map,
       lambda key, value: patch_volume(value, reversed(volume_map))
   )
 
+  if container_config.logging.server.family == 'AF_UNIX':
+    container_config.logging.server.listen_address = patch_volume(
+        container_config.logging.server.listen_address,
+        reversed(volume_map))
+
+  return container_config
+
 
 def reverse_volume_map(volume_map):
   reverse_map = [[x[1], x[0]] for x in volume_map]